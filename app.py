@@ -1,33 +1,97 @@
 import sys
 import os
-import subprocess
 import tempfile
-from PyQt5.QtWidgets import (
-    QApplication,
-    QMainWindow,
-    QWidget,
-    QVBoxLayout,
-    QHBoxLayout,
-    QPushButton,
-    QFileDialog,
-    QLabel,
-    QSlider,
-    QComboBox,
-    QLineEdit,
-    QSpinBox,
-    QDoubleSpinBox,
-    QCheckBox,
-    QGroupBox,
-    QTabWidget,
-    QColorDialog,
-    QMessageBox,
-    QSizePolicy,
-)
-from PyQt5.QtCore import Qt, QTimer, QUrl, QDir
-from PyQt5.QtGui import QPixmap, QColor
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from PyQt5.QtMultimediaWidgets import QVideoWidget
-import ffmpeg
+import threading
+import time
+from startup_profile import PROFILE
+
+# QtMultimedia, el backend de reproducción y NumPy (formas de onda) se cargan
+# la primera vez que hacen falta para que la ventana aparezca cuanto antes
+with PROFILE.phase("importar PyQt5"):
+    from PyQt5.QtWidgets import (
+        QApplication,
+        QMainWindow,
+        QWidget,
+        QVBoxLayout,
+        QHBoxLayout,
+        QPushButton,
+        QFileDialog,
+        QLabel,
+        QSlider,
+        QComboBox,
+        QLineEdit,
+        QSpinBox,
+        QDoubleSpinBox,
+        QCheckBox,
+        QGroupBox,
+        QTabWidget,
+        QColorDialog,
+        QMessageBox,
+        QSizePolicy,
+        QProgressBar,
+        QDockWidget,
+        QTableWidget,
+        QTableWidgetItem,
+    )
+    from PyQt5.QtCore import Qt, QTimer, QUrl, QDir, pyqtSignal
+    from PyQt5.QtGui import QPixmap, QColor, QImage, QPainter, QPen, QKeySequence
+
+with PROFILE.phase("importar módulos del editor"):
+    from jobs import JobManager, FFmpegJob, format_eta
+    from edit_graph import EditGraph
+    from media_tools import FFMPEG, probe, parse_rate, run_command, video_stream
+    from packet_index import PacketIndex
+    from frame_decoder import PipeFrameDecoder
+    from frame_cache import (
+        FrameCache,
+        FULL_TIER,
+        THUMBNAIL_TIER,
+        frame_index,
+        frame_time_ms,
+    )
+    from thumbnails import ThumbnailTrack
+    from parallel_encode import default_workers
+    from export_planner import describe_plan, estimate_seconds
+    from history import EditHistory
+    from scrubber import ScrubController
+    from telemetry import TELEMETRY
+    from encoding_profiles import (
+        DEFAULT_MIN_SSIM,
+        DEFAULT_PROFILE,
+        PROFILE_LABELS,
+        PROFILE_NAMES,
+        calibrate,
+        suggest_profile,
+    )
+    from mezzanine import (
+        DEFAULT_INTERMEDIATE,
+        INTERMEDIATE_FORMATS,
+        INTERMEDIATE_NAMES,
+        copy_extension,
+        intermediate_extension,
+        intermediate_output_args,
+    )
+    import proxy_media
+    from audio_pipeline import load_or_decode
+    from render_queue import (
+        DEFAULT_PRIORITY,
+        FINISHED_STATUSES,
+        PRIORITY_LABELS,
+        PRIORITY_NAMES,
+        STATUS_LABELS,
+        entry_speed,
+        entry_wait,
+    )
+
+
+# Intervalo (ms) con el que el reproductor informa la posición al reproducir
+POSITION_NOTIFY_INTERVAL = 40
+# Espera (ms) tras el último cambio de ajustes antes de renderizar la vista
+# previa
+SETTINGS_PREVIEW_DELAY = 250
+# Tiempo (ms) que se muestran en la barra de estado los errores de las tareas
+# en segundo plano
+STATUS_MESSAGE_TIMEOUT = 10000
 
 
 class VideoEditor(QMainWindow):
@@ -47,6 +111,29 @@ class VideoEditor(QMainWindow):
         self.total_frames = 0
         self.fps = 0
         self.resolution = (0, 0)
+        self.has_audio = True
+        self.media_duration = 0
+        self.packet_index = None
+        self.packet_index_path = None
+        self.thumbnail_track = None
+        self.thumbnail_track_path = None
+        # Proxies de vista previa (original -> proxy); solo uno se genera a
+        # la vez y al cerrar se interrumpe
+        self.proxies = {}
+        self.proxy_building = None
+        self.proxy_next = None
+        self.proxy_stop = threading.Event()
+        # Archivo que se está reproduciendo (el original, su proxy o un render
+        # de vista previa)
+        self.playback_path = None
+        self.proxy_switch_pending = False
+        self.frame_cache = FrameCache()
+        # Resultados de las operaciones, reutilizables entre sesiones; el
+        # índice se lee en el primer uso (ensure_render_cache)
+        self.render_cache = None
+        # Historial de deshacer/rehacer sobre los resultados renderizados
+        self.history = EditHistory()
+        self.graph_redo_nodes = []
         self.temp_files = []
         self.cut_segments = []
         self.current_text_overlay = None
@@ -55,36 +142,67 @@ class VideoEditor(QMainWindow):
         self.text_overlay_size = 24
         self.text_overlay_opacity = 1.0
 
+        # Edición diferida: las operaciones se guardan en un grafo y se
+        # renderizan una sola vez al exportar
+        self.edit_graph = None
+        self.preview_job = None
+        # Vista previa de los ajustes: plan del render que se muestra (con su
+        # ventana de tiempo) y trabajo en curso
+        self.settings_preview = None
+        self.settings_preview_job = None
+
+        # Render paralelo por fragmentos en curso (se puede cancelar)
+        self.chunked_render = None
+
+        # El reproductor se crea al cargar el primer video
+        self.media_player = None
+        self.controls_enabled = False
+        self.busy = False
+        self.calibrating = False
+
+        # Trabajos de FFmpeg en segundo plano
+        self.job_manager = JobManager(self)
+        self.job_manager.job_started.connect(self.job_started)
+        self.job_manager.job_finished.connect(self.job_finished)
+        # Cola de renders persistente: exportaciones y lotes que se ejecutan
+        # en paralelo con la edición. Se carga después de mostrar la ventana
+        self.render_queue_runner = None
+        self.render_queue_panel = None
+
         # Configurar el layout principal
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
 
         # Crear las secciones de la interfaz
-        self.create_video_preview_section()
-        self.create_timeline_section()
-        self.create_tools_section()
-        self.create_export_section()
+        with PROFILE.phase("vista previa"):
+            self.create_video_preview_section()
+        with PROFILE.phase("línea de tiempo"):
+            self.create_timeline_section()
+        with PROFILE.phase("herramientas"):
+            self.create_tools_section()
+        with PROFILE.phase("exportación"):
+            self.create_export_section()
+        with PROFILE.phase("registro de FFmpeg"):
+            self.create_telemetry_panel()
 
         # Desactivar controles hasta que se cargue un video
         self.toggle_controls(False)
 
-        # Crear el reproductor multimedia
-        self.setup_media_player()
-
-        # Configurar temporizador para actualizaciones
-        self.update_timer = QTimer(self)
-        self.update_timer.setInterval(50)  # 50ms
-        self.update_timer.timeout.connect(self.update_ui)
+        # Construir solo la pestaña visible; el resto se crea al mostrarse
+        self.ensure_tool_tab(self.tools_tabs.currentIndex())
 
     def create_video_preview_section(self):
         preview_group = QGroupBox("Vista previa")
         preview_layout = QVBoxLayout(preview_group)
 
-        # Contenedor para la vista previa de video
-        self.video_widget = QVideoWidget()
+        # Contenedor para la vista previa de video; el QVideoWidget lo
+        # reemplaza al crear el reproductor
+        self.preview_layout = preview_layout
+        self.video_widget = QLabel()
         self.video_widget.setMinimumSize(640, 360)
         self.video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.video_widget.setStyleSheet("background-color: black;")
         preview_layout.addWidget(self.video_widget)
 
         # Información del video
@@ -106,6 +224,26 @@ class VideoEditor(QMainWindow):
         self.frame_label = QLabel("Frame: 0/0")
         playback_layout.addWidget(self.frame_label)
 
+        # Proxy de baja resolución para videos 4K o de bitrate alto
+        self.proxy_check = QCheckBox("Usar proxy")
+        self.proxy_check.setChecked(True)
+        self.proxy_check.toggled.connect(self.reload_playback)
+        playback_layout.addWidget(self.proxy_check)
+
+        self.proxy_label = QLabel("")
+        playback_layout.addWidget(self.proxy_label)
+
+        # Render de unos segundos alrededor del cabezal con los ajustes de
+        # las herramientas, repetido cada vez que cambian
+        self.settings_preview_check = QCheckBox("Vista previa de ajustes")
+        self.settings_preview_check.toggled.connect(self.toggle_settings_preview)
+        playback_layout.addWidget(self.settings_preview_check)
+
+        self.settings_preview_timer = QTimer(self)
+        self.settings_preview_timer.setSingleShot(True)
+        self.settings_preview_timer.setInterval(SETTINGS_PREVIEW_DELAY)
+        self.settings_preview_timer.timeout.connect(self.render_settings_preview)
+
         preview_layout.addLayout(playback_layout)
 
         self.main_layout.addWidget(preview_group)
@@ -114,6 +252,17 @@ class VideoEditor(QMainWindow):
         timeline_group = QGroupBox("Línea de tiempo")
         timeline_layout = QVBoxLayout(timeline_group)
 
+        # Tira de miniaturas sobre el slider de navegación
+        self.filmstrip = FilmstripWidget(self.frame_cache)
+        timeline_layout.addWidget(self.filmstrip)
+
+        # Generar miniaturas de detalle cuando el cabezal se detiene
+        self.thumbnail_detail_timer = QTimer(self)
+        self.thumbnail_detail_timer.setSingleShot(True)
+        self.thumbnail_detail_timer.setInterval(400)
+        self.thumbnail_detail_timer.timeout.connect(self.prefetch_thumbnail_detail)
+        self.thumbnail_detail_pending = False
+
         # Slider de navegación global
         self.timeline_slider = QSlider(Qt.Horizontal)
         self.timeline_slider.setMinimum(0)
@@ -121,6 +270,9 @@ class VideoEditor(QMainWindow):
         self.timeline_slider.setTickInterval(100)
         self.timeline_slider.setTickPosition(QSlider.TicksBelow)
         self.timeline_slider.sliderMoved.connect(self.seek_position)
+        # Agrupa las búsquedas del arrastre (vista previa en keyframes y
+        # búsqueda precisa al detenerse)
+        self.scrubber = ScrubController(self.seek_media, self.snap_to_keyframe, self)
         self.timeline_slider.sliderPressed.connect(self.on_slider_pressed)
         self.timeline_slider.sliderReleased.connect(self.on_slider_released)
         timeline_layout.addWidget(self.timeline_slider)
@@ -172,17 +324,51 @@ class VideoEditor(QMainWindow):
         self.join_segments_button.clicked.connect(self.join_segments)
         cut_layout.addWidget(self.join_segments_button)
 
+        self.smart_cut_check = QCheckBox("Corte preciso (recodificar solo bordes)")
+        cut_layout.addWidget(self.smart_cut_check)
+
         timeline_layout.addLayout(cut_layout)
 
         self.main_layout.addWidget(timeline_group)
 
     def create_tools_section(self):
-        # Usar pestañas para organizar las herramientas
-        tools_tabs = QTabWidget()
+        # Usar pestañas para organizar las herramientas; el contenido de cada
+        # pestaña se construye la primera vez que se muestra
+        self.tools_tabs = QTabWidget()
+        self.tool_tab_builders = {}
+        self.tool_tab_index = {}
+        self.built_tool_tabs = set()
+        self.add_tool_tab("text", "Texto", self.create_text_tab)
+        self.add_tool_tab("audio", "Audio", self.create_audio_tab)
+        self.add_tool_tab("tech", "Herramientas técnicas", self.create_tech_tab)
+        self.tools_tabs.currentChanged.connect(self.ensure_tool_tab)
+
+        self.main_layout.addWidget(self.tools_tabs)
+
+    def add_tool_tab(self, key, title, builder):
+        tab = QWidget()
+        QVBoxLayout(tab)
+        index = self.tools_tabs.addTab(tab, title)
+        self.tool_tab_builders[index] = (key, builder)
+        self.tool_tab_index[key] = index
+
+    def ensure_tool_tab(self, index):
+        if index not in self.tool_tab_builders:
+            return
+        key, builder = self.tool_tab_builders[index]
+        if key in self.built_tool_tabs:
+            return
+        with PROFILE.phase(f"pestaña {self.tools_tabs.tabText(index)}"):
+            builder(self.tools_tabs.widget(index).layout())
+        self.built_tool_tabs.add(key)
+
+        # Los controles nuevos toman el estado actual de la ventana
+        self.toggle_controls(self.controls_enabled)
+        self.set_busy(self.busy)
+        self.update_render_cache_label()
 
+    def create_text_tab(self, text_layout):
         # Pestaña 1: Edición de texto
-        text_tab = QWidget()
-        text_layout = QVBoxLayout(text_tab)
 
         # Agregar texto
         text_input_layout = QHBoxLayout()
@@ -222,19 +408,63 @@ class VideoEditor(QMainWindow):
 
         text_layout.addLayout(properties_layout)
 
+        # Intervalo del texto; fuera de él el video se copia sin recodificar
+        range_layout = QHBoxLayout()
+        self.text_range_check = QCheckBox("Solo en un intervalo")
+        range_layout.addWidget(self.text_range_check)
+        range_layout.addWidget(QLabel("Desde (s):"))
+        self.text_start_spin = QDoubleSpinBox()
+        self.text_start_spin.setRange(0.0, 24 * 3600.0)
+        self.text_start_spin.setDecimals(2)
+        range_layout.addWidget(self.text_start_spin)
+        range_layout.addWidget(QLabel("Hasta (s):"))
+        self.text_end_spin = QDoubleSpinBox()
+        self.text_end_spin.setRange(0.0, 24 * 3600.0)
+        self.text_end_spin.setDecimals(2)
+        self.text_end_spin.setValue(5.0)
+        range_layout.addWidget(self.text_end_spin)
+        text_layout.addLayout(range_layout)
+
+        # Cualquier cambio de ajustes actualiza la vista previa
+        self.text_input.textChanged.connect(self.schedule_settings_preview)
+        self.text_position_combo.currentIndexChanged.connect(self.schedule_settings_preview)
+        self.text_size_spin.valueChanged.connect(self.schedule_settings_preview)
+        self.text_opacity_spin.valueChanged.connect(self.schedule_settings_preview)
+        self.text_range_check.toggled.connect(self.schedule_settings_preview)
+        self.text_start_spin.valueChanged.connect(self.schedule_settings_preview)
+        self.text_end_spin.valueChanged.connect(self.schedule_settings_preview)
+
         # Botón para aplicar texto
         self.apply_text_button = QPushButton("Aplicar texto")
         self.apply_text_button.clicked.connect(self.apply_text_overlay)
         text_layout.addWidget(self.apply_text_button)
 
+    def create_audio_tab(self, audio_layout):
         # Pestaña 2: Audio
-        audio_tab = QWidget()
-        audio_layout = QVBoxLayout(audio_tab)
+
+        # Formas de onda del audio del video y del audio cargado
+        audio_layout.addWidget(QLabel("Audio del video:"))
+        self.video_waveform = WaveformWidget()
+        audio_layout.addWidget(self.video_waveform)
+
+        audio_layout.addWidget(QLabel("Audio cargado:"))
+        self.audio_waveform = WaveformWidget()
+        audio_layout.addWidget(self.audio_waveform)
 
         # Mute original audio
         self.mute_original_check = QCheckBox("Silenciar audio original")
         audio_layout.addWidget(self.mute_original_check)
 
+        # Desplazamiento del audio nuevo respecto al video
+        offset_layout = QHBoxLayout()
+        offset_layout.addWidget(QLabel("Desfase del audio nuevo (s):"))
+        self.audio_offset_spin = QDoubleSpinBox()
+        self.audio_offset_spin.setRange(-600.0, 600.0)
+        self.audio_offset_spin.setDecimals(3)
+        self.audio_offset_spin.setSingleStep(0.1)
+        offset_layout.addWidget(self.audio_offset_spin)
+        audio_layout.addLayout(offset_layout)
+
         # Cargar audio nuevo
         audio_button_layout = QHBoxLayout()
         self.load_audio_button = QPushButton("Cargar audio nuevo")
@@ -251,9 +481,12 @@ class VideoEditor(QMainWindow):
         self.apply_audio_button.clicked.connect(self.apply_audio_changes)
         audio_layout.addWidget(self.apply_audio_button)
 
+        # La forma de onda del video se calcula al abrir la pestaña
+        if self.current_video_path and self.has_audio:
+            self.request_waveform(self.current_video_path, self.video_waveform)
+
+    def create_tech_tab(self, tech_layout):
         # Pestaña 3: Herramientas técnicas
-        tech_tab = QWidget()
-        tech_layout = QVBoxLayout(tech_tab)
 
         # Cambiar resolución
         resolution_layout = QHBoxLayout()
@@ -273,6 +506,41 @@ class VideoEditor(QMainWindow):
         format_layout.addWidget(self.format_combo)
         tech_layout.addLayout(format_layout)
 
+        # Perfil de codificación y calibración en esta máquina
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Perfil de codificación:"))
+        self.profile_combo = QComboBox()
+        for name in PROFILE_NAMES:
+            self.profile_combo.addItem(PROFILE_LABELS[name], name)
+        self.profile_combo.setCurrentIndex(PROFILE_NAMES.index(DEFAULT_PROFILE))
+        profile_layout.addWidget(self.profile_combo)
+        profile_layout.addWidget(QLabel("SSIM mínimo:"))
+        self.min_ssim_spin = QDoubleSpinBox()
+        self.min_ssim_spin.setRange(0.8, 0.999)
+        self.min_ssim_spin.setDecimals(3)
+        self.min_ssim_spin.setSingleStep(0.005)
+        self.min_ssim_spin.setValue(DEFAULT_MIN_SSIM)
+        profile_layout.addWidget(self.min_ssim_spin)
+        profile_layout.addWidget(QLabel("Tamaño máximo (MB):"))
+        self.max_size_spin = QSpinBox()
+        self.max_size_spin.setRange(0, 1024 * 1024)
+        self.max_size_spin.setSpecialValueText("Sin límite")
+        profile_layout.addWidget(self.max_size_spin)
+        self.calibrate_button = QPushButton("Calibrar perfiles")
+        self.calibrate_button.clicked.connect(self.calibrate_profiles)
+        profile_layout.addWidget(self.calibrate_button)
+        tech_layout.addLayout(profile_layout)
+
+        # Formato de los archivos de trabajo (el perfil se aplica al exportar)
+        intermediate_layout = QHBoxLayout()
+        intermediate_layout.addWidget(QLabel("Formato intermedio:"))
+        self.intermediate_combo = QComboBox()
+        for name in INTERMEDIATE_NAMES:
+            self.intermediate_combo.addItem(INTERMEDIATE_FORMATS[name]["label"], name)
+        self.intermediate_combo.setCurrentIndex(INTERMEDIATE_NAMES.index(DEFAULT_INTERMEDIATE))
+        intermediate_layout.addWidget(self.intermediate_combo)
+        tech_layout.addLayout(intermediate_layout)
+
         # Cambiar velocidad
         speed_layout = QHBoxLayout()
         speed_layout.addWidget(QLabel("Velocidad:"))
@@ -281,21 +549,43 @@ class VideoEditor(QMainWindow):
             ["0.25x", "0.5x", "0.75x", "1.0x (normal)", "1.25x", "1.5x", "2.0x"]
         )
         self.speed_combo.setCurrentIndex(3)  # 1.0x por defecto
+        self.resolution_combo.currentIndexChanged.connect(self.schedule_settings_preview)
+        self.speed_combo.currentIndexChanged.connect(self.schedule_settings_preview)
         speed_layout.addWidget(self.speed_combo)
         tech_layout.addLayout(speed_layout)
 
+        # Codificación paralela por fragmentos
+        parallel_layout = QHBoxLayout()
+        self.parallel_check = QCheckBox("Codificación paralela por fragmentos")
+        parallel_layout.addWidget(self.parallel_check)
+        parallel_layout.addWidget(QLabel("Procesos:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 64)
+        self.workers_spin.setValue(default_workers())
+        parallel_layout.addWidget(self.workers_spin)
+        tech_layout.addLayout(parallel_layout)
+
+        # Presupuesto y estadísticas de la caché de renders
+        render_cache_layout = QHBoxLayout()
+        render_cache_layout.addWidget(QLabel("Caché de renders (MB):"))
+        self.render_cache_spin = QSpinBox()
+        self.render_cache_spin.setRange(256, 1024 * 1024)
+        self.render_cache_spin.setSingleStep(1024)
+        self.render_cache_spin.setValue(self.ensure_render_cache().budget // (1024 * 1024))
+        self.render_cache_spin.valueChanged.connect(self.set_render_cache_budget)
+        render_cache_layout.addWidget(self.render_cache_spin)
+        self.clear_render_cache_button = QPushButton("Vaciar caché")
+        self.clear_render_cache_button.clicked.connect(self.clear_render_cache)
+        render_cache_layout.addWidget(self.clear_render_cache_button)
+        self.render_cache_label = QLabel()
+        render_cache_layout.addWidget(self.render_cache_label)
+        tech_layout.addLayout(render_cache_layout)
+
         # Aplicar cambios técnicos
         self.apply_tech_button = QPushButton("Aplicar cambios técnicos")
         self.apply_tech_button.clicked.connect(self.apply_technical_changes)
         tech_layout.addWidget(self.apply_tech_button)
 
-        # Agregar pestañas al widget
-        tools_tabs.addTab(text_tab, "Texto")
-        tools_tabs.addTab(audio_tab, "Audio")
-        tools_tabs.addTab(tech_tab, "Herramientas técnicas")
-
-        self.main_layout.addWidget(tools_tabs)
-
     def create_export_section(self):
         export_layout = QHBoxLayout()
 
@@ -307,10 +597,121 @@ class VideoEditor(QMainWindow):
         self.export_button.clicked.connect(self.export_video)
         export_layout.addWidget(self.export_button)
 
+        self.undo_button = QPushButton("Deshacer")
+        self.undo_button.setShortcut(QKeySequence.Undo)
+        self.undo_button.clicked.connect(self.undo_edit)
+        self.undo_button.setEnabled(False)
+        export_layout.addWidget(self.undo_button)
+
+        self.redo_button = QPushButton("Rehacer")
+        self.redo_button.setShortcut(QKeySequence.Redo)
+        self.redo_button.clicked.connect(self.redo_edit)
+        self.redo_button.setEnabled(False)
+        export_layout.addWidget(self.redo_button)
+
+        self.deferred_check = QCheckBox("Edición diferida (renderizar al exportar)")
+        self.deferred_check.toggled.connect(self.toggle_deferred_mode)
+        export_layout.addWidget(self.deferred_check)
+
+        self.queue_export_check = QCheckBox("Añadir a la cola de renders")
+        export_layout.addWidget(self.queue_export_check)
+        self.queue_priority_combo = QComboBox()
+        for name in PRIORITY_NAMES:
+            self.queue_priority_combo.addItem(PRIORITY_LABELS[name], name)
+        self.queue_priority_combo.setCurrentIndex(PRIORITY_NAMES.index(DEFAULT_PRIORITY))
+        export_layout.addWidget(self.queue_priority_combo)
+
         self.main_layout.addLayout(export_layout)
 
+        # Progreso del trabajo en curso
+        job_layout = QHBoxLayout()
+
+        self.job_progress_bar = QProgressBar()
+        self.job_progress_bar.setRange(0, 100)
+        self.job_progress_bar.setValue(0)
+        job_layout.addWidget(self.job_progress_bar)
+
+        self.job_status_label = QLabel("Sin trabajos en curso")
+        job_layout.addWidget(self.job_status_label)
+
+        self.cancel_job_button = QPushButton("Cancelar")
+        self.cancel_job_button.clicked.connect(self.cancel_job)
+        self.cancel_job_button.setEnabled(False)
+        job_layout.addWidget(self.cancel_job_button)
+
+        self.telemetry_button = QPushButton("Registro de FFmpeg")
+        self.telemetry_button.setCheckable(True)
+        job_layout.addWidget(self.telemetry_button)
+
+        self.render_queue_button = QPushButton("Cola de renders")
+        self.render_queue_button.setCheckable(True)
+        self.render_queue_button.toggled.connect(self.toggle_render_queue_panel)
+        job_layout.addWidget(self.render_queue_button)
+
+        self.main_layout.addLayout(job_layout)
+
+    def create_telemetry_panel(self):
+        # Panel acoplable con cada invocación de ffmpeg/ffprobe; los registros
+        # llegan desde cualquier hilo y se entregan al de la interfaz con una
+        # señal
+        self.telemetry_panel = TelemetryPanel(self)
+        self.telemetry_panel.hide()
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.telemetry_panel)
+        self.telemetry_button.toggled.connect(self.telemetry_panel.setVisible)
+        self.telemetry_panel.visibilityChanged.connect(self.telemetry_button.setChecked)
+        TELEMETRY.add_listener(self.telemetry_panel.recorded.emit)
+
+    def ensure_render_queue(self):
+        # Carga la cola guardada y retoma los trabajos pendientes de la
+        # sesión anterior; se llama justo después de mostrar la ventana
+        if self.render_queue_runner is not None:
+            return self.render_queue_runner
+        with PROFILE.phase("diferido: cola de renders"):
+            from queue_runner import RenderQueueRunner
+
+            self.render_queue_runner = RenderQueueRunner(self.job_manager, parent=self)
+        self.render_queue_runner.schedule()
+        return self.render_queue_runner
+
+    def toggle_render_queue_panel(self, visible):
+        if self.render_queue_panel is None:
+            if not visible:
+                return
+            self.render_queue_panel = RenderQueuePanel(self.ensure_render_queue(), self)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.render_queue_panel)
+            self.tabifyDockWidget(self.telemetry_panel, self.render_queue_panel)
+            self.render_queue_panel.visibilityChanged.connect(
+                self.render_queue_button.setChecked
+            )
+        self.render_queue_panel.setVisible(visible)
+
+    def show_background_error(self, message):
+        # Errores de tareas en segundo plano que no interrumpen la edición
+        self.statusBar().showMessage(message, STATUS_MESSAGE_TIMEOUT)
+
+    def ensure_media_player(self):
+        if self.media_player is not None:
+            return self.media_player
+        with PROFILE.phase("importar QtMultimedia"):
+            from PyQt5.QtMultimediaWidgets import QVideoWidget
+
+        with PROFILE.phase("crear reproductor"):
+            video_widget = QVideoWidget()
+            video_widget.setMinimumSize(640, 360)
+            video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+            self.preview_layout.replaceWidget(self.video_widget, video_widget)
+            self.video_widget.deleteLater()
+            self.video_widget = video_widget
+            self.setup_media_player()
+        return self.media_player
+
     def setup_media_player(self):
+        from PyQt5.QtMultimedia import QMediaPlayer
+
         self.media_player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
+        # La posición llega por positionChanged mientras se reproduce (sin
+        # temporizador propio); en pausa no se emite nada
+        self.media_player.setNotifyInterval(POSITION_NOTIFY_INTERVAL)
         self.media_player.setVideoOutput(self.video_widget)
         self.media_player.stateChanged.connect(self.media_state_changed)
         self.media_player.positionChanged.connect(self.position_changed)
@@ -349,18 +750,226 @@ class VideoEditor(QMainWindow):
                 {"path": file_path, "start": 0, "end": self.duration}
             )
 
+            # El historial empieza de nuevo con el video original
+            self.history.reset("Video original", self.history_state())
+
+            # Empezar un grafo de edición nuevo si la edición diferida está activa
+            if self.deferred_check.isChecked():
+                self.reset_edit_graph()
+            self.update_history_buttons()
+
     def load_media_file(self, file_path):
-        self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(file_path)))
+        # Con un proxy disponible se reproduce el proxy; las operaciones
+        # siguen usando current_video_path (el original)
+        self.cancel_settings_preview()
+        self.settings_preview = None
+        if file_path == self.current_video_path:
+            proxy = self.proxies.get(file_path) or proxy_media.find_proxy(file_path)
+            if proxy:
+                self.proxies[file_path] = proxy
+                self.proxy_label.setText("Proxy listo")
+            elif file_path in self.proxies:
+                # Ya se comprobó que no necesita proxy
+                self.proxy_label.setText("")
+            else:
+                self.request_proxy(file_path)
+        self.set_playback_media(self.playback_source(file_path))
         self.play_button.setText("Pausar")
         self.media_player.play()
         self.is_playing = True
-        self.update_timer.start()
+
+        # Indexar en segundo plano el video sobre el que se edita
+        if file_path == self.current_video_path:
+            self.request_packet_index(file_path)
+            # La forma de onda solo se calcula si la pestaña de audio existe
+            if "audio" in self.built_tool_tabs:
+                if self.has_audio:
+                    self.request_waveform(file_path, self.video_waveform)
+                else:
+                    self.video_waveform.set_waveform(None)
+
+    def set_playback_media(self, path):
+        from PyQt5.QtMultimedia import QMediaContent
+
+        self.ensure_media_player()
+        self.playback_path = path
+        self.media_player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+
+    def playback_source(self, file_path):
+        proxy = self.proxies.get(file_path)
+        if proxy and self.proxy_check.isChecked() and os.path.exists(proxy):
+            return proxy
+        return file_path
+
+    def reload_playback(self):
+        # Cambiar entre el original y su proxy sin perder la posición; no se
+        # toca si se está mostrando un render de vista previa
+        path = self.current_video_path
+        if self.media_player is None or not path:
+            return
+        if self.playback_path not in (path, self.proxies.get(path)):
+            return
+        source = self.playback_source(path)
+        if source == self.playback_path:
+            return
+        position = self.media_player.position()
+        playing = self.is_playing
+        self.proxy_switch_pending = True
+        self.set_playback_media(source)
+        self.media_player.setPosition(position)
+        if playing:
+            self.media_player.play()
+        else:
+            self.media_player.pause()
+
+    def request_proxy(self, file_path):
+        if self.proxy_building is not None:
+            # Se genera cuando termine el proxy en curso si sigue cargado
+            self.proxy_next = file_path
+            self.proxy_label.setText("")
+            return
+        self.proxy_building = file_path
+
+        def proxy_progress(progress):
+            if file_path == self.current_video_path:
+                self.proxy_label.setText(f"Generando proxy: {progress['percent']:.0f}%")
+
+        def proxy_failed(error):
+            self.show_background_error(f"Error al generar el proxy: {error}")
+            self.proxy_finished(file_path, None)
+
+        self.job_manager.run_task(
+            proxy_media.load_or_build,
+            file_path,
+            stop_event=self.proxy_stop,
+            on_result=lambda proxy: self.proxy_finished(file_path, proxy),
+            on_error=proxy_failed,
+            on_progress=proxy_progress,
+        )
+
+    def proxy_finished(self, file_path, proxy):
+        self.proxy_building = None
+        self.proxies[file_path] = proxy
+        if file_path == self.current_video_path:
+            self.proxy_label.setText("Proxy listo" if proxy else "")
+            if proxy:
+                self.reload_playback()
+                # Las miniaturas también se generan desde el proxy
+                if self.packet_index is not None and self.packet_index_path == file_path:
+                    self.packet_index_ready(file_path, self.packet_index)
+
+        next_path, self.proxy_next = self.proxy_next, None
+        if next_path == self.current_video_path and next_path not in self.proxies:
+            self.request_proxy(next_path)
+
+    def request_packet_index(self, file_path):
+        if self.packet_index_path == file_path:
+            return
+        self.packet_index = None
+        self.packet_index_path = file_path
+        self.job_manager.run_task(
+            PacketIndex.load_or_build,
+            file_path,
+            on_result=lambda index: self.packet_index_ready(file_path, index),
+            on_error=lambda error: self.show_background_error(
+                f"Error al indexar el video: {error}"
+            ),
+        )
+
+    def packet_index_ready(self, file_path, index):
+        # Descartar índices de archivos que ya no están cargados
+        if file_path != self.packet_index_path:
+            return
+        self.packet_index = index
+        if index.frame_count:
+            self.total_frames = index.frame_count
+            self.frame_label.setText(f"Frame: {self.current_frame}/{self.total_frames}")
+
+        # Con el índice listo las miniaturas se alinean a keyframes; el proxy
+        # tiene todos los frames intra y se decodifica rápido sin alinearlas
+        duration = index.pts[-1] if index.frame_count else self.media_duration / 1000.0
+        proxy = self.proxies.get(file_path)
+        if proxy:
+            self.request_thumbnail_track(proxy, duration)
+        else:
+            self.request_thumbnail_track(file_path, duration, index.keyframe_times())
+
+    def request_waveform(self, file_path, widget):
+        from waveform import WaveformPyramid
+
+        if widget.source_path == file_path:
+            return
+        widget.source_path = file_path
+        widget.set_waveform(None)
+
+        def waveform_ready(waveform):
+            # Ignorar resultados de un archivo que ya se reemplazó
+            if widget.source_path == file_path:
+                widget.set_waveform(waveform)
+
+        self.job_manager.run_task(
+            WaveformPyramid.load_or_build,
+            file_path,
+            on_result=waveform_ready,
+            on_error=lambda error: self.show_background_error(
+                f"Error al generar la forma de onda: {error}"
+            ),
+        )
+
+    def request_thumbnail_track(self, file_path, duration, keyframes=None):
+        if self.thumbnail_track_path == file_path or duration <= 0:
+            return
+        self.thumbnail_track_path = file_path
+        self.job_manager.run_task(
+            ThumbnailTrack.load_or_generate,
+            file_path,
+            duration,
+            keyframes,
+            on_result=lambda track: self.thumbnail_track_ready(file_path, track),
+            on_error=lambda error: self.show_background_error(
+                f"Error al generar miniaturas: {error}"
+            ),
+        )
+
+    def thumbnail_track_ready(self, file_path, track):
+        if file_path != self.thumbnail_track_path:
+            track.close()
+            return
+        if self.thumbnail_track is not None:
+            self.thumbnail_track.close()
+        self.thumbnail_track = track
+        self.filmstrip.set_track(track)
+
+    def prefetch_thumbnail_detail(self):
+        track = self.thumbnail_track
+        if track is None or self.thumbnail_detail_pending or self.edit_graph:
+            return
+        seconds = self.media_player.position() / 1000.0
+        if track.has_detail(seconds):
+            return
+
+        def detail_ready(result):
+            self.thumbnail_detail_pending = False
+            if track is self.thumbnail_track:
+                track.add_detail(*result)
+                self.filmstrip.update()
+
+        def detail_failed(error):
+            self.thumbnail_detail_pending = False
+
+        self.thumbnail_detail_pending = True
+        self.job_manager.run_task(
+            track.generate_detail,
+            seconds,
+            on_result=detail_ready,
+            on_error=detail_failed,
+        )
 
     def analyze_video(self, file_path):
         try:
-            # Obtenemos la información del video usando ffmpeg
-            probe = ffmpeg.probe(file_path)
-            video_info = next(s for s in probe["streams"] if s["codec_type"] == "video")
+            # Obtenemos la información del video usando ffprobe
+            info = probe(file_path)
+            video_info = next(s for s in info["streams"] if s["codec_type"] == "video")
 
             # Extracción de metadatos
             self.fps = eval(video_info.get("r_frame_rate", "24/1"))
@@ -378,6 +987,9 @@ class VideoEditor(QMainWindow):
                 int(video_info.get("height", 0)),
             )
 
+            self.has_audio = any(s["codec_type"] == "audio" for s in info["streams"])
+            self.media_duration = float(info["format"].get("duration", 0)) * 1000
+
             # Actualizar etiqueta de información
             info_str = f"Resolución: {self.resolution[0]}x{self.resolution[1]} | FPS: {self.fps:.2f} | Frames: {self.total_frames}"
             self.video_info_label.setText(f"{os.path.basename(file_path)} | {info_str}")
@@ -387,7 +999,7 @@ class VideoEditor(QMainWindow):
             )
 
     def toggle_playback(self):
-        if self.media_player.state() == QMediaPlayer.PlayingState:
+        if self.media_player.state() == self.media_player.PlayingState:
             self.media_player.pause()
             self.play_button.setText("Reproducir")
             self.is_playing = False
@@ -397,7 +1009,7 @@ class VideoEditor(QMainWindow):
             self.is_playing = True
 
     def media_state_changed(self, state):
-        if state == QMediaPlayer.PlayingState:
+        if state == self.media_player.PlayingState:
             self.play_button.setText("Pausar")
             self.is_playing = True
         else:
@@ -405,10 +1017,21 @@ class VideoEditor(QMainWindow):
             self.is_playing = False
 
     def position_changed(self, position):
-        self.current_frame = int((position / 1000.0) * self.fps)
-        self.timeline_slider.setValue(
-            int(position * 1000 / self.duration) if self.duration > 0 else 0
-        )
+        if self.showing_settings_preview():
+            # Posición en la vista previa -> posición en el video editado
+            start, _ = self.settings_preview["window"]
+            position = int(start + position * self.settings_preview["speed"])
+        if self.packet_index is not None and self.edit_graph is None:
+            self.current_frame = self.packet_index.frame_at(position / 1000.0)
+        else:
+            self.current_frame = int((position / 1000.0) * self.fps)
+        # Mientras se arrastra, el slider lo controla el usuario
+        if not self.timeline_slider.isSliderDown():
+            self.timeline_slider.setValue(
+                int(position * 1000 / self.duration) if self.duration > 0 else 0
+            )
+        self.filmstrip.set_position(position / 1000.0)
+        self.thumbnail_detail_timer.start()
 
         # Actualizar etiquetas de tiempo y frame
         current_time = self.format_time(position)
@@ -417,6 +1040,17 @@ class VideoEditor(QMainWindow):
         self.frame_label.setText(f"Frame: {self.current_frame}/{self.total_frames}")
 
     def duration_changed(self, duration):
+        if self.showing_settings_preview():
+            # La vista previa dura unos segundos; la línea de tiempo no cambia
+            return
+        if self.proxy_switch_pending:
+            # Cambio entre original y proxy: se mantiene el rango de recorte
+            if duration > 0:
+                self.proxy_switch_pending = False
+                self.duration = duration
+                self.end_time = min(self.end_time, duration)
+                self.update_trim_labels()
+            return
         self.duration = duration
         self.timeline_slider.setRange(0, 1000)  # Usamos 1000 pasos para mayor precisión
         self.end_time = duration
@@ -425,13 +1059,35 @@ class VideoEditor(QMainWindow):
     def seek_position(self, position):
         # Convertir posición relativa (0-1000) a milisegundos
         seek_pos = int(position * self.duration / 1000)
-        self.media_player.setPosition(seek_pos)
+        self.scrubber.move(seek_pos)
+
+    def seek_media(self, position):
+        if self.showing_settings_preview():
+            # Fuera de la ventana renderizada: volver al video y renderizar
+            # la vista previa en la nueva posición
+            self.leave_settings_preview(position)
+            self.schedule_settings_preview()
+            return
+        if self.media_player is not None:
+            self.media_player.setPosition(int(position))
+
+    def snap_to_keyframe(self, position):
+        # Los keyframes del índice solo valen para el video que se edita (o
+        # su proxy, con los mismos tiempos), no para la vista previa diferida
+        if self.packet_index is None or self.edit_graph is not None:
+            return None
+        if self.packet_index_path != self.current_video_path:
+            return None
+        keyframe = self.packet_index.nearest_keyframe(position / 1000.0)
+        return None if keyframe is None else int(keyframe * 1000)
 
     def on_slider_pressed(self):
+        self.scrubber.begin()
         if self.is_playing:
             self.media_player.pause()
 
     def on_slider_released(self):
+        self.scrubber.end()
         if self.is_playing:
             self.media_player.play()
 
@@ -466,50 +1122,69 @@ class VideoEditor(QMainWindow):
             self, "Error de Media", f"Error: {self.media_player.errorString()}"
         )
 
-    def update_ui(self):
-        # Actualizar UI con información actual
-        if self.media_player.state() == QMediaPlayer.PlayingState:
-            # Si está reproduciendo, actualizar la posición actual
-            position = self.media_player.position()
-            self.position_changed(position)
-
     def trim_video(self):
+        import core
+
         if not self.current_video_path:
             return
 
-        # Crear archivo temporal para el recorte
-        output_file = tempfile.mktemp(suffix=".mp4")
-        self.temp_files.append(output_file)
+        if self.edit_graph is not None:
+            self.add_edit_node(
+                {"type": "trim", "start": self.start_time, "end": self.end_time},
+                "Recorte",
+            )
+            return
 
-        try:
+        source = self.current_video_path
+        start_time = self.start_time
+        end_time = self.end_time
+        smart = self.smart_cut_check.isChecked()
+        duration_sec = (end_time - start_time) / 1000.0
+
+        def render(outputs, done):
+            if smart:
+                self.run_smart_cut(
+                    "Recortando",
+                    source,
+                    [(start_time, end_time, outputs[0])],
+                    done,
+                    "Error al recortar el video",
+                )
+                return
             # Ejecutar el recorte con ffmpeg
-            start_time_sec = self.start_time / 1000.0
-            duration_sec = (self.end_time - self.start_time) / 1000.0
+            plan = core.trim_plan(source, start_time, end_time, outputs[0])
+            self.run_plan("Recortando", plan, done, "Error al recortar el video")
 
-            # Crear el comando de recorte
-            (
-                ffmpeg.input(self.current_video_path, ss=start_time_sec)
-                .output(output_file, t=duration_sec, c="copy")
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+        try:
+            self.cached_render(
+                [source],
+                "trim",
+                {"start": start_time, "end": end_time, "smart": smart},
+                [copy_extension(source)],
+                render,
+                lambda output_file: self.on_trim_finished(output_file, duration_sec),
+                "Recorte",
             )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al recortar el video: {str(e)}")
 
-            # Actualizar la ruta del video actual
-            self.current_video_path = output_file
+    def on_trim_finished(self, output_file, duration_sec):
+        # Actualizar la ruta del video actual
+        self.current_video_path = output_file
 
-            # Cargar el nuevo video recortado
-            self.load_media_file(output_file)
+        # Cargar el nuevo video recortado
+        self.load_media_file(output_file)
 
-            # Actualizar los segmentos
-            self.cut_segments = [
-                {"path": output_file, "start": 0, "end": duration_sec * 1000}
-            ]
+        # Actualizar los segmentos
+        self.cut_segments = [
+            {"path": output_file, "start": 0, "end": duration_sec * 1000}
+        ]
 
-            QMessageBox.information(self, "Éxito", "Video recortado correctamente.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al recortar el video: {str(e)}")
+        QMessageBox.information(self, "Éxito", "Video recortado correctamente.")
 
     def split_video(self):
+        import core
+
         if not self.current_video_path:
             return
 
@@ -520,43 +1195,70 @@ class VideoEditor(QMainWindow):
             QMessageBox.warning(self, "Advertencia", "Posición de división no válida.")
             return
 
-        try:
-            # Crear archivos temporales para las dos partes
-            part1_file = tempfile.mktemp(suffix=".mp4")
-            part2_file = tempfile.mktemp(suffix=".mp4")
-            self.temp_files.extend([part1_file, part2_file])
-
-            # Split en primera parte
-            (
-                ffmpeg.input(self.current_video_path)
-                .output(part1_file, t=split_point / 1000, c="copy")
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-
-            # Split en segunda parte
-            (
-                ffmpeg.input(self.current_video_path, ss=split_point / 1000)
-                .output(part2_file, c="copy")
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-
-            # Actualizar los segmentos
-            self.cut_segments = [
-                {"path": part1_file, "start": 0, "end": split_point},
-                {"path": part2_file, "start": 0, "end": self.duration - split_point},
-            ]
+        if self.edit_graph is not None:
+            self.add_edit_node({"type": "split", "at": split_point}, "División")
+            return
 
-            # Cargar la primera parte
-            self.current_video_path = part1_file
-            self.load_media_file(part1_file)
+        source = self.current_video_path
+        duration = self.duration
+        smart = self.smart_cut_check.isChecked()
+
+        def render(outputs, done):
+            part1_file, part2_file = outputs
+            if smart:
+                self.run_smart_cut(
+                    "Dividiendo",
+                    source,
+                    [(0, split_point, part1_file), (split_point, duration, part2_file)],
+                    done,
+                    "Error al dividir el video",
+                )
+                return
+            # Split en dos partes
+            plan = core.split_plan(source, split_point, duration, part1_file, part2_file)
+            self.run_plan("Dividiendo", plan, done, "Error al dividir el video")
 
-            QMessageBox.information(self, "Éxito", "Video dividido en dos partes.")
+        try:
+            self.cached_render(
+                [source],
+                "split",
+                {"at": split_point, "smart": smart},
+                [copy_extension(source)] * 2,
+                render,
+                lambda part1_file, part2_file: self.on_split_finished(
+                    part1_file, part2_file, split_point
+                ),
+                "División",
+            )
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al dividir el video: {str(e)}")
 
+    def on_split_finished(self, part1_file, part2_file, split_point):
+        # Actualizar los segmentos
+        self.cut_segments = [
+            {"path": part1_file, "start": 0, "end": split_point},
+            {"path": part2_file, "start": 0, "end": self.duration - split_point},
+        ]
+
+        # Cargar la primera parte
+        self.current_video_path = part1_file
+        self.load_media_file(part1_file)
+
+        QMessageBox.information(self, "Éxito", "Video dividido en dos partes.")
+
     def remove_segment(self):
+        if self.edit_graph is not None:
+            if self.edit_graph.segment_count() <= 1:
+                QMessageBox.warning(
+                    self, "Advertencia", "No hay segmentos para eliminar."
+                )
+                return
+            self.add_edit_node(
+                {"type": "remove_segment", "at": self.media_player.position()},
+                "Eliminación de segmento",
+            )
+            return
+
         if len(self.cut_segments) <= 1:
             QMessageBox.warning(self, "Advertencia", "No hay segmentos para eliminar.")
             return
@@ -571,66 +1273,67 @@ class VideoEditor(QMainWindow):
         if self.cut_segments:
             self.current_video_path = self.cut_segments[0]["path"]
             self.load_media_file(self.current_video_path)
+            self.record_history("Eliminación de segmento")
 
             QMessageBox.information(self, "Éxito", "Segmento eliminado correctamente.")
         else:
             QMessageBox.warning(self, "Advertencia", "No quedan segmentos disponibles.")
 
     def join_segments(self):
+        import core
+
+        if self.edit_graph is not None:
+            # En edición diferida los segmentos restantes se unen al exportar
+            QMessageBox.information(
+                self, "Información", "Los segmentos se unirán al exportar el video."
+            )
+            return
+
         if len(self.cut_segments) <= 1:
             QMessageBox.warning(
                 self, "Advertencia", "Se necesitan al menos dos segmentos para unir."
             )
             return
 
-        try:
-            # Crear un archivo temporal para la concatenación
-            concat_file = tempfile.mktemp(suffix=".txt")
-            output_file = tempfile.mktemp(suffix=".mp4")
-            self.temp_files.append(output_file)
-
-            # Crear el archivo de lista para ffmpeg
-            with open(concat_file, "w") as f:
-                for segment in self.cut_segments:
-                    f.write(f"file '{segment['path']}'\n")
-
-            # Concatenar los segmentos
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-f",
-                    "concat",
-                    "-safe",
-                    "0",
-                    "-i",
-                    concat_file,
-                    "-c",
-                    "copy",
-                    output_file,
-                ],
-                check=True,
-            )
-
-            # Actualizar la ruta del video actual
-            self.current_video_path = output_file
-
-            # Cargar el nuevo video concatenado
-            self.load_media_file(output_file)
-
-            # Actualizar los segmentos
-            self.cut_segments = [
-                {"path": output_file, "start": 0, "end": self.duration}
-            ]
+        paths = [segment["path"] for segment in self.cut_segments]
 
-            QMessageBox.information(self, "Éxito", "Segmentos unidos correctamente.")
+        def render(outputs, done):
+            # Concatenar los segmentos; los que tienen otro perfil de códec,
+            # resolución o audio se normalizan antes en paralelo
+            join = core.join_render(
+                paths, outputs[0], self.worker_count(), "Uniendo segmentos"
+            )
+            self.run_parallel_render(
+                "Uniendo segmentos", join, done, "Error al unir los segmentos"
+            )
 
-            # Eliminar el archivo temporal de concatenación
-            os.remove(concat_file)
+        try:
+            self.cached_render(
+                paths,
+                "join",
+                {},
+                [copy_extension(paths[0])],
+                render,
+                self.on_join_finished,
+                "Unión de segmentos",
+            )
         except Exception as e:
             QMessageBox.critical(
                 self, "Error", f"Error al unir los segmentos: {str(e)}"
             )
 
+    def on_join_finished(self, output_file):
+        # Actualizar la ruta del video actual
+        self.current_video_path = output_file
+
+        # Cargar el nuevo video concatenado
+        self.load_media_file(output_file)
+
+        # Actualizar los segmentos
+        self.cut_segments = [{"path": output_file, "start": 0, "end": self.duration}]
+
+        QMessageBox.information(self, "Éxito", "Segmentos unidos correctamente.")
+
     def load_audio(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self,
@@ -642,74 +1345,118 @@ class VideoEditor(QMainWindow):
         if file_path:
             self.current_audio_path = file_path
             self.audio_path_label.setText(f"Audio: {os.path.basename(file_path)}")
+            self.request_waveform(file_path, self.audio_waveform)
+            # Decodificar y remuestrear ya, para que aplicar el audio no espere
+            self.job_manager.run_task(
+                load_or_decode,
+                file_path,
+                on_error=lambda error: self.show_background_error(
+                    f"Error al decodificar el audio: {error}"
+                ),
+            )
 
     def apply_audio_changes(self):
+        import core
+
         if not self.current_video_path:
             return
 
-        try:
-            output_file = tempfile.mktemp(suffix=".mp4")
-            self.temp_files.append(output_file)
-
-            # Preparar el comando ffmpeg según las opciones
-            if self.current_audio_path and self.mute_original_check.isChecked():
-                # Reemplazar el audio original con el nuevo
-                (
-                    ffmpeg.input(self.current_video_path)
-                    .output(output_file, acodec="copy", map="0:v")
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-
-                # Agregar el nuevo audio
-                temp_file = output_file
-                output_file = tempfile.mktemp(suffix=".mp4")
-                self.temp_files.append(output_file)
-
-                (
-                    ffmpeg.input(temp_file)
-                    .input(self.current_audio_path)
-                    .output(output_file, acodec="aac", map=["0:v", "1:a"])
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
-            elif self.current_audio_path:
-                # Mezclar el audio original con el nuevo
-                (
-                    ffmpeg.input(self.current_video_path)
-                    .input(self.current_audio_path)
-                    .output(output_file, map=["0:v", "0:a", "1:a"])
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
+        if self.edit_graph is not None:
+            if self.current_audio_path:
+                mode = "replace" if self.mute_original_check.isChecked() else "mix"
+                node = {
+                    "type": "audio",
+                    "mode": mode,
+                    "path": self.current_audio_path,
+                    "offset": self.audio_offset_spin.value() * 1000,
+                }
             elif self.mute_original_check.isChecked():
-                # Solo quitar el audio original
-                (
-                    ffmpeg.input(self.current_video_path)
-                    .output(output_file, an=None, vcodec="copy")
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
-                )
+                node = {"type": "audio", "mode": "mute"}
             else:
                 QMessageBox.warning(
                     self, "Advertencia", "No se han seleccionado cambios de audio."
                 )
                 return
+            self.add_edit_node(node, "Cambios de audio")
+            return
 
-            # Actualizar la ruta del video actual
-            self.current_video_path = output_file
+        if not self.current_audio_path and not self.mute_original_check.isChecked():
+            QMessageBox.warning(
+                self, "Advertencia", "No se han seleccionado cambios de audio."
+            )
+            return
+
+        source = self.current_video_path
+        audio_path = self.current_audio_path
+        mute_original = self.mute_original_check.isChecked()
+        offset = self.audio_offset_spin.value() * 1000 if audio_path else 0
+        duration = self.duration
+        has_audio = self.has_audio
+        intermediate = self.intermediate_format()
+
+        def render(outputs, done):
+            # Un solo comando que copia el video; el audio cargado se
+            # decodifica fuera del hilo de la interfaz (suele estar en caché)
+            def plan_audio():
+                decoded = load_or_decode(audio_path) if audio_path else None
+                return core.audio_plan(
+                    source,
+                    outputs[0],
+                    duration,
+                    decoded,
+                    mute_original,
+                    intermediate,
+                    offset,
+                    has_audio,
+                )
 
-            # Cargar el nuevo video con los cambios de audio
-            self.load_media_file(output_file)
+            def planned(plan):
+                self.run_plan(
+                    "Aplicando audio", plan, done, "Error al aplicar cambios de audio"
+                )
 
-            QMessageBox.information(
-                self, "Éxito", "Cambios de audio aplicados correctamente."
+            def failed(error):
+                self.set_busy(False)
+                QMessageBox.critical(
+                    self, "Error", f"Error al aplicar cambios de audio: {error}"
+                )
+
+            self.set_busy(True)
+            self.job_status_label.setText("Aplicando audio: preparando el audio...")
+            self.job_manager.run_task(plan_audio, on_result=planned, on_error=failed)
+
+        try:
+            sources = [source, audio_path] if audio_path else [source]
+            self.cached_render(
+                sources,
+                "audio",
+                {
+                    "audio": bool(audio_path),
+                    "mute": mute_original,
+                    "offset": offset,
+                    "intermediate": intermediate,
+                },
+                [intermediate_extension(intermediate)],
+                render,
+                self.on_audio_changes_finished,
+                "Cambios de audio",
             )
         except Exception as e:
             QMessageBox.critical(
                 self, "Error", f"Error al aplicar cambios de audio: {str(e)}"
             )
 
+    def on_audio_changes_finished(self, output_file):
+        # Actualizar la ruta del video actual
+        self.current_video_path = output_file
+
+        # Cargar el nuevo video con los cambios de audio
+        self.load_media_file(output_file)
+
+        QMessageBox.information(
+            self, "Éxito", "Cambios de audio aplicados correctamente."
+        )
+
     def select_text_color(self):
         color = QColorDialog.getColor(self.text_overlay_color, self)
         if color.isValid():
@@ -717,8 +1464,11 @@ class VideoEditor(QMainWindow):
             # Actualizar el botón con el color seleccionado
             style = f"background-color: {color.name()};"
             self.text_color_button.setStyleSheet(style)
+            self.schedule_settings_preview()
 
     def apply_text_overlay(self):
+        import core
+
         if not self.current_video_path:
             return
 
@@ -727,46 +1477,41 @@ class VideoEditor(QMainWindow):
             QMessageBox.warning(self, "Advertencia", "Introduce un texto para agregar.")
             return
 
-        try:
-            output_file = tempfile.mktemp(suffix=".mp4")
-            self.temp_files.append(output_file)
+        start_ms = end_ms = None
+        if self.text_range_check.isChecked():
+            start_ms = self.text_start_spin.value() * 1000
+            end_ms = min(self.text_end_spin.value() * 1000, self.duration)
+            if end_ms <= start_ms:
+                QMessageBox.warning(
+                    self, "Advertencia", "El intervalo del texto no es válido."
+                )
+                return
+
+        if self.edit_graph is not None:
+            node = {
+                "type": "text",
+                "text": text,
+                "position": self.text_position_combo.currentIndex(),
+                "font_size": self.text_size_spin.value(),
+                "opacity": self.text_opacity_spin.value(),
+                "color": self.text_overlay_color.name().replace("#", "0x"),
+            }
+            if end_ms is not None:
+                node.update({"start": start_ms, "end": end_ms})
+            self.add_edit_node(node, "Texto")
+            return
 
+        try:
             # Obtener posición del texto
             position_index = self.text_position_combo.currentIndex()
-            position_map = {
-                0: "10:10",  # Superior
-                1: "main_w/2-text_w/2:main_h/2-text_h/2",  # Centro
-                2: "10:main_h-text_h-10",  # Inferior
-            }
-            position = position_map.get(position_index, "10:main_h-text_h-10")
 
             # Aplicar el texto con ffmpeg
             font_size = self.text_size_spin.value()
             opacity = self.text_opacity_spin.value()
             color = self.text_overlay_color.name().replace("#", "0x")
 
-            # Crear el filtro de texto
-            drawtext_filter = (
-                f"drawtext=text='{text}':fontsize={font_size}:fontcolor={color}@{opacity}:"
-                f"x={position.split(':')[0]}:y={position.split(':')[1]}:box=1:boxcolor=0x00000000@0.5"
-            )
-
-            # Aplicar el filtro al video
-            (
-                ffmpeg.input(self.current_video_path)
-                .output(output_file, vf=drawtext_filter)
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
-
-            # Actualizar la ruta del video actual
-            self.current_video_path = output_file
-
-            # Cargar el nuevo video con el texto agregado
-            self.load_media_file(output_file)
-
             # Guardar el overlay actual para referencia
-            self.current_text_overlay = {
+            text_overlay = {
                 "text": text,
                 "position": position_index,
                 "font_size": font_size,
@@ -774,75 +1519,234 @@ class VideoEditor(QMainWindow):
                 "color": self.text_overlay_color,
             }
 
-            QMessageBox.information(self, "Éxito", "Texto agregado correctamente.")
+            source = self.current_video_path
+            duration = self.duration
+            profile = self.encoding_profile()
+            intermediate = self.intermediate_format()
+            # Con intervalo el resultado es una copia del original salvo unos
+            # GOP, así que conserva su contenedor
+            if end_ms is not None:
+                extension = copy_extension(source)
+            else:
+                extension = intermediate_extension(intermediate)
+
+            def render(outputs, done):
+                if end_ms is not None:
+                    self.run_text_region(
+                        source,
+                        outputs[0],
+                        duration,
+                        text,
+                        start_ms,
+                        end_ms,
+                        position_index,
+                        font_size,
+                        color,
+                        opacity,
+                        profile,
+                        done,
+                    )
+                    return
+                # Aplicar el filtro de texto al video
+                plan = core.text_overlay_plan(
+                    source,
+                    outputs[0],
+                    duration,
+                    text,
+                    position_index,
+                    font_size,
+                    color,
+                    opacity,
+                    profile,
+                    intermediate,
+                )
+                self.run_plan("Agregando texto", plan, done, "Error al agregar texto")
+
+            self.cached_render(
+                [source],
+                "text",
+                {
+                    "text": text,
+                    "position": position_index,
+                    "font_size": font_size,
+                    "opacity": opacity,
+                    "color": color,
+                    "profile": profile,
+                    "intermediate": intermediate,
+                    "start": start_ms,
+                    "end": end_ms,
+                },
+                [extension],
+                render,
+                lambda output_file: self.on_text_overlay_finished(
+                    output_file, text_overlay
+                ),
+                "Texto",
+            )
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al agregar texto: {str(e)}")
 
+    def run_text_region(
+        self,
+        source,
+        output,
+        duration,
+        text,
+        start_ms,
+        end_ms,
+        position,
+        font_size,
+        color,
+        opacity,
+        profile,
+        on_success,
+    ):
+        import core
+
+        # El sondeo y el índice de keyframes se consultan fuera del hilo de
+        # la interfaz, como en el recorte inteligente
+        def planned(plan):
+            self.run_plan("Agregando texto", plan, on_success, "Error al agregar texto")
+
+        def failed(error):
+            self.set_busy(False)
+            QMessageBox.critical(self, "Error", f"Error al agregar texto: {error}")
+
+        self.set_busy(True)
+        self.job_status_label.setText("Agregando texto: analizando keyframes...")
+        self.job_manager.run_task(
+            core.text_region_plan,
+            source,
+            output,
+            duration,
+            text,
+            start_ms,
+            end_ms,
+            position,
+            font_size,
+            color,
+            opacity,
+            profile,
+            on_result=planned,
+            on_error=failed,
+        )
+
+    def on_text_overlay_finished(self, output_file, text_overlay):
+        # Actualizar la ruta del video actual
+        self.current_video_path = output_file
+
+        # Cargar el nuevo video con el texto agregado
+        self.load_media_file(output_file)
+
+        self.current_text_overlay = text_overlay
+
+        QMessageBox.information(self, "Éxito", "Texto agregado correctamente.")
+
     def apply_technical_changes(self):
+        import core
+
         if not self.current_video_path:
             return
 
-        try:
-            output_file = tempfile.mktemp(suffix=".mp4")
-            self.temp_files.append(output_file)
-
-            # Opciones base para ffmpeg
-            stream = ffmpeg.input(self.current_video_path)
-
-            # Verificar cambios de resolución
-            resolution_text = self.resolution_combo.currentText()
-            if resolution_text != "Original":
-                width, height = map(int, resolution_text.split("x"))
-                stream = ffmpeg.filter_(stream, "scale", width, height)
-
-            # Verificar cambios de velocidad
-            speed_text = self.speed_combo.currentText()
-            if speed_text != "1.0x (normal)":
-                speed = float(speed_text.replace("x", ""))
-
-                # Para cambios de velocidad, necesitamos filtros diferentes
-                if speed < 1.0:
-                    # Cámara lenta
-                    stream = ffmpeg.filter_(stream, "setpts", f"{1/speed}*PTS")
-                    # Ajustar el audio también
-                    audio_stream = ffmpeg.input(self.current_video_path).audio
-                    audio_stream = ffmpeg.filter_(audio_stream, "atempo", speed)
-                    # Combinar los streams
-                    stream = ffmpeg.output(stream, audio_stream, output_file)
-                else:
-                    # Cámara rápida
-                    stream = ffmpeg.filter_(stream, "setpts", f"{1/speed}*PTS")
-                    # Ajustar el audio también
-                    audio_stream = ffmpeg.input(self.current_video_path).audio
-                    audio_stream = ffmpeg.filter_(audio_stream, "atempo", speed)
-                    # Combinar los streams
-                    stream = ffmpeg.output(stream, audio_stream, output_file)
-            else:
-                # Si no hay cambios de velocidad, solo aplicar otros cambios
-                stream = ffmpeg.output(stream, output_file)
-
-            # Ejecutar el comando
-            stream.overwrite_output().run(capture_stdout=True, capture_stderr=True)
-
-            # Actualizar la ruta del video actual
-            self.current_video_path = output_file
+        resolution = core.parse_resolution(self.resolution_combo.currentText())
+        speed = core.parse_speed(self.speed_combo.currentText())
+
+        if self.edit_graph is not None:
+            nodes = []
+            if resolution:
+                width, height = resolution
+                nodes.append({"type": "scale", "width": width, "height": height})
+            if speed != 1.0:
+                nodes.append({"type": "speed", "factor": speed})
+            if not nodes:
+                QMessageBox.warning(
+                    self, "Advertencia", "No se han seleccionado cambios técnicos."
+                )
+                return
+            for node in nodes[:-1]:
+                self.edit_graph.add(node)
+            self.add_edit_node(nodes[-1], "Cambios técnicos")
+            return
 
-            # Cargar el nuevo video con los cambios técnicos
-            self.load_media_file(output_file)
+        source = self.current_video_path
+        duration = self.duration
+        has_audio = self.has_audio
+        parallel = self.parallel_check.isChecked()
+        profile = self.encoding_profile()
+        intermediate = self.intermediate_format()
+
+        def render(outputs, done):
+            if parallel:
+                self.run_chunked_render(
+                    "Aplicando cambios técnicos",
+                    source,
+                    outputs[0],
+                    duration,
+                    has_audio,
+                    resolution,
+                    speed,
+                    profile,
+                    done,
+                    "Error al aplicar cambios técnicos",
+                    intermediate,
+                )
+                return
+            # Escalado y cambio de velocidad (video y audio) en un único comando
+            plan = core.technical_plan(
+                source,
+                outputs[0],
+                duration,
+                resolution,
+                speed,
+                has_audio,
+                profile,
+                intermediate,
+            )
+            self.run_plan(
+                "Aplicando cambios técnicos", plan, done, "Error al aplicar cambios técnicos"
+            )
 
-            QMessageBox.information(
-                self, "Éxito", "Cambios técnicos aplicados correctamente."
+        try:
+            # La codificación paralela da el mismo resultado, así que no
+            # forma parte de la clave
+            self.cached_render(
+                [source],
+                "technical",
+                {
+                    "resolution": resolution,
+                    "speed": speed,
+                    "profile": profile,
+                    "intermediate": intermediate,
+                },
+                [intermediate_extension(intermediate)],
+                render,
+                self.on_technical_changes_finished,
+                "Cambios técnicos",
             )
         except Exception as e:
             QMessageBox.critical(
                 self, "Error", f"Error al aplicar cambios técnicos: {str(e)}"
             )
 
+    def on_technical_changes_finished(self, output_file):
+        # Actualizar la ruta del video actual
+        self.current_video_path = output_file
+
+        # Cargar el nuevo video con los cambios técnicos
+        self.load_media_file(output_file)
+
+        QMessageBox.information(
+            self, "Éxito", "Cambios técnicos aplicados correctamente."
+        )
+
     def export_video(self):
+        import core
+
         if not self.current_video_path:
             return
 
         # Seleccionar formato de salida
+        self.ensure_tool_tab(self.tool_tab_index["tech"])
         output_format = self.format_combo.currentText().lower()
 
         # Diálogo para guardar archivo
@@ -861,22 +1765,739 @@ class VideoEditor(QMainWindow):
             if not file_path.lower().endswith(output_format):
                 file_path += f".{output_format}"
 
-            # Copiar el archivo final
-            (
-                ffmpeg.input(self.current_video_path)
-                .output(file_path)
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
+            def on_exported():
+                QMessageBox.information(
+                    self, "Éxito", f"Video exportado correctamente a {file_path}"
+                )
 
-            QMessageBox.information(
-                self, "Éxito", f"Video exportado correctamente a {file_path}"
+            if self.edit_graph is not None:
+                # Un único pase de decodificación/codificación con todo el grafo
+                plan = core.new_plan([file_path])
+                command = self.edit_graph.compile(file_path)[:-1]
+                core.add_encode(
+                    plan,
+                    command,
+                    file_path,
+                    self.edit_graph.output_duration(),
+                    self.encoding_profile(),
+                )
+                if self.queue_export_check.isChecked():
+                    self.queue_plan(f"Exportar {os.path.basename(file_path)}", plan)
+                    return
+                self.run_plan("Exportando", plan, on_exported, "Error al exportar el video")
+                return
+
+            # Copiar las pistas compatibles con el formato y recodificar el resto
+            source = self.current_video_path
+            profile = self.encoding_profile()
+            plan = core.export_plan(source, file_path, profile=profile)
+            # En la cola el paralelismo lo reparte el planificador entre los
+            # trabajos, así que no se divide en fragmentos
+            queued = self.queue_export_check.isChecked()
+            parallel = (
+                plan["mode"] == "transcode" and self.parallel_check.isChecked() and not queued
             )
+            workers = self.workers_spin.value() if parallel else 1
+            if not self.confirm_export(plan, estimate_seconds(plan, workers)):
+                return
+
+            if queued:
+                self.queue_plan(f"Exportar {os.path.basename(file_path)}", plan)
+                return
+
+            if parallel:
+                self.run_chunked_render(
+                    "Exportando",
+                    source,
+                    file_path,
+                    self.duration,
+                    self.has_audio,
+                    None,
+                    1.0,
+                    profile,
+                    on_exported,
+                    "Error al exportar el video",
+                )
+                return
+
+            label = "Exportando (remux)" if plan["mode"] == "remux" else "Exportando"
+            self.run_plan(label, plan, on_exported, "Error al exportar el video")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al exportar el video: {str(e)}")
 
+    def queue_plan(self, label, plan):
+        priority = self.queue_priority_combo.currentData()
+        self.ensure_render_queue().add_plan(label, plan, priority)
+        self.job_status_label.setText(
+            f"{label}: añadido a la cola de renders (prioridad {PRIORITY_LABELS[priority]})"
+        )
+
+    def confirm_export(self, plan, estimate):
+        if plan["mode"] == "remux":
+            summary = "Exportación rápida (remux): todas las pistas se copian sin recodificar."
+        else:
+            summary = "Transcodificación: algunas pistas se deben recodificar."
+        details = "\n".join(describe_plan(plan))
+        answer = QMessageBox.question(
+            self,
+            "Exportar Video",
+            f"{summary}\n\n{details}\n\nTiempo estimado: {format_eta(estimate)}\n\n¿Continuar?",
+        )
+        return answer == QMessageBox.Yes
+
+    def cached_render(
+        self, sources, operation, params, extensions, render, on_success, description=None
+    ):
+        # Si la operación ya se ejecutó con los mismos parámetros sobre el
+        # mismo contenido se reutiliza el resultado; si no, render(outputs,
+        # done) lanza el trabajo que escribe outputs y llama a done al terminar.
+        # Con description el resultado se agrega al historial de deshacer
+        cache = self.ensure_render_cache()
+        key = cache.key(sources, operation, params)
+        recipe = {
+            "sources": list(sources),
+            "operation": operation,
+            "params": params,
+            "extensions": extensions,
+            "render": render,
+        }
+
+        def finished(outputs):
+            on_success(*outputs)
+            if description:
+                self.record_history(description, recipe)
+
+        outputs = cache.lookup(key)
+        if outputs is not None:
+            stats = cache.stats()
+            self.job_status_label.setText(
+                f"Resultado recuperado de la caché ({stats['hit_rate']:.0%} de aciertos, "
+                f"{stats['bytes_saved'] / 1024 ** 2:.0f} MB ahorrados)"
+            )
+            self.update_render_cache_label()
+            finished(outputs)
+            return
+
+        outputs = cache.output_paths(key, extensions)
+
+        def done():
+            cache.store(key, outputs, self.files_in_use() + outputs)
+            self.update_render_cache_label()
+            finished(outputs)
+
+        render(outputs, done)
+
+    def files_in_use(self):
+        # Archivos que la caché de renders no puede desalojar: los cargados y
+        # los de los pasos más recientes del historial
+        paths = [segment["path"] for segment in self.cut_segments]
+        if self.current_video_path:
+            paths.append(self.current_video_path)
+        paths += self.ensure_render_queue().queue.files_in_use()
+        return paths + self.history.pinned_files()
+
+    def history_state(self):
+        return {
+            "current": self.current_video_path,
+            "segments": [dict(segment) for segment in self.cut_segments],
+        }
+
+    def record_history(self, description, recipe=None):
+        self.history.push(description, self.history_state(), recipe)
+        self.update_history_buttons()
+
+    def update_history_buttons(self):
+        enabled = not self.busy
+        if self.edit_graph is not None:
+            self.undo_button.setEnabled(enabled and bool(self.edit_graph.nodes))
+            self.redo_button.setEnabled(enabled and bool(self.graph_redo_nodes))
+            return
+        self.undo_button.setEnabled(enabled and self.history.can_undo())
+        self.redo_button.setEnabled(enabled and self.history.can_redo())
+        self.undo_button.setToolTip(self.history.undo_description())
+        self.redo_button.setToolTip(self.history.redo_description())
+
+    def undo_edit(self):
+        if self.edit_graph is not None:
+            # En edición diferida basta con quitar el último nodo del grafo
+            if self.edit_graph.nodes:
+                self.graph_redo_nodes.append(self.edit_graph.nodes.pop())
+                self.refresh_graph_after_history()
+            return
+        description = self.history.undo_description()
+        step = self.history.undo()
+        if step is not None:
+            self.restore_history_step(self.history.position)
+            self.job_status_label.setText(f"Deshecho: {description}")
+
+    def redo_edit(self):
+        if self.edit_graph is not None:
+            if self.graph_redo_nodes:
+                self.edit_graph.add(self.graph_redo_nodes.pop())
+                self.refresh_graph_after_history()
+            return
+        step = self.history.redo()
+        if step is not None:
+            self.restore_history_step(self.history.position)
+            self.job_status_label.setText(f"Rehecho: {step['description']}")
+
+    def refresh_graph_after_history(self):
+        try:
+            self.render_graph_preview()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al actualizar la vista previa: {str(e)}")
+        self.update_history_buttons()
+
+    def restore_history_step(self, index):
+        # Cambiar al resultado ya renderizado del paso; si la caché lo
+        # desalojó, se vuelve a generar antes de cargarlo
+        if self.history.missing_files(index):
+            self.rebuild_history_step(index, lambda: self.apply_history_step(index))
+        else:
+            self.apply_history_step(index)
+
+    def apply_history_step(self, index):
+        if index != self.history.position:
+            return
+        if self.history.missing_files(index):
+            QMessageBox.warning(
+                self, "Advertencia", "No se pudieron recuperar los archivos de este paso."
+            )
+            return
+        state = self.history.steps[index]["state"]
+        self.current_video_path = state["current"]
+        self.cut_segments = [dict(segment) for segment in state["segments"]]
+        self.load_media_file(self.current_video_path)
+        self.update_history_buttons()
+
+    def rebuild_history_step(self, index, then):
+        step = self.history.steps[index]
+        recipe = step["recipe"]
+        if recipe is None:
+            # Pasos sin render propio (eliminar segmento) reutilizan los
+            # archivos del paso anterior
+            if index > 0:
+                self.rebuild_history_step(index - 1, then)
+            else:
+                then()
+            return
+        if index > 0 and any(not os.path.exists(p) for p in recipe["sources"]):
+            # Las entradas también se desalojaron: regenerarlas primero
+            self.rebuild_history_step(
+                index - 1, lambda: self.rebuild_history_step(index, then)
+            )
+            return
+        try:
+            self.job_status_label.setText(f"Regenerando: {step['description']}")
+            self.cached_render(
+                recipe["sources"],
+                recipe["operation"],
+                recipe["params"],
+                recipe["extensions"],
+                recipe["render"],
+                lambda *outputs: then(),
+            )
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"Error al regenerar el paso del historial: {str(e)}"
+            )
+
+    def ensure_render_cache(self):
+        # Leer el índice puede borrar renders huérfanos: no se hace al arrancar
+        if self.render_cache is None:
+            from render_cache import RenderCache
+
+            self.render_cache = RenderCache()
+        return self.render_cache
+
+    def update_render_cache_label(self):
+        if "tech" not in self.built_tool_tabs:
+            return
+        stats = self.ensure_render_cache().stats()
+        self.render_cache_label.setText(
+            f"{stats['entries']} renders, {stats['used'] / 1024 ** 2:.0f} MB | "
+            f"aciertos: {stats['hit_rate']:.0%} | "
+            f"ahorrado: {stats['bytes_saved'] / 1024 ** 2:.0f} MB"
+        )
+
+    def set_render_cache_budget(self, megabytes):
+        self.ensure_render_cache().set_budget(megabytes * 1024 * 1024, self.files_in_use())
+        self.update_render_cache_label()
+
+    def clear_render_cache(self):
+        self.ensure_render_cache().clear(self.files_in_use())
+        self.update_render_cache_label()
+
+    def run_chunked_render(
+        self,
+        label,
+        source,
+        output_path,
+        duration,
+        has_audio,
+        resolution,
+        speed,
+        profile,
+        on_success,
+        error_message,
+        intermediate=None,
+    ):
+        import core
+
+        # Divide el video en keyframes y codifica los fragmentos en paralelo;
+        # con intermediate la salida es un archivo de trabajo. El origen se
+        # recibe explícito porque al regenerar el historial puede no ser el
+        # video cargado
+        render = core.chunked_render(
+            source,
+            output_path,
+            duration,
+            self.worker_count(),
+            resolution,
+            speed,
+            has_audio,
+            label,
+            profile,
+            intermediate,
+        )
+        self.run_parallel_render(label, render, on_success, error_message)
+
+    def run_parallel_render(self, label, render, on_success, error_message):
+        # Ejecuta un ChunkedRender en un hilo de trabajo (se puede cancelar)
+        def finished(_):
+            self.chunked_render = None
+            self.set_busy(False)
+            self.job_progress_bar.setValue(100)
+            self.job_status_label.setText(f"{label}: terminado")
+            on_success()
+
+        def failed(error):
+            self.chunked_render = None
+            self.set_busy(False)
+            self.job_progress_bar.setValue(0)
+            if render.cancelled.is_set():
+                self.job_status_label.setText(f"{label}: cancelado")
+            else:
+                QMessageBox.critical(self, "Error", f"{error_message}: {error}")
+
+        self.chunked_render = render
+        self.set_busy(True)
+        self.job_progress_bar.setValue(0)
+        self.job_status_label.setText(f"{label}: preparando fragmentos...")
+        self.job_manager.run_task(
+            render.run,
+            on_result=finished,
+            on_error=failed,
+            on_progress=self.job_progress,
+        )
+
+    def worker_count(self):
+        # Procesos de ffmpeg simultáneos para los trabajos en paralelo
+        if "tech" in self.built_tool_tabs:
+            return self.workers_spin.value()
+        return default_workers()
+
+    def encoding_profile(self):
+        if "tech" in self.built_tool_tabs:
+            return self.profile_combo.currentData()
+        return DEFAULT_PROFILE
+
+    def intermediate_format(self):
+        if "tech" in self.built_tool_tabs:
+            return self.intermediate_combo.currentData()
+        return DEFAULT_INTERMEDIATE
+
+    def calibrate_profiles(self):
+        if not self.current_video_path:
+            return
+        output_format = self.format_combo.currentText().lower()
+        min_ssim = self.min_ssim_spin.value()
+        max_bytes = self.max_size_spin.value() * 1024 * 1024
+        duration = self.duration / 1000.0
+
+        def calibration_progress(progress):
+            self.job_status_label.setText(
+                f"Calibrando {PROFILE_LABELS[progress['profile']]} "
+                f"({progress['step'] + 1}/{progress['steps']})..."
+            )
+
+        def calibrated(results):
+            self.set_calibrating(False)
+            self.job_status_label.setText("Calibración terminada")
+            lines = [
+                f"{PROFILE_LABELS[result['profile']]}: {result['fps']:.1f} fps, "
+                f"{result['bitrate'] / 1000:.0f} kb/s, SSIM {result['ssim']:.4f}"
+                for result in results
+            ]
+            suggestion = suggest_profile(results, min_ssim, max_bytes, duration)
+            if suggestion is None:
+                lines.append("\nNingún perfil cumple el objetivo de calidad y tamaño.")
+            else:
+                self.profile_combo.setCurrentIndex(PROFILE_NAMES.index(suggestion))
+                lines.append(f"\nPerfil sugerido: {PROFILE_LABELS[suggestion]}")
+            QMessageBox.information(self, "Calibración", "\n".join(lines))
+
+        def calibration_failed(error):
+            self.set_calibrating(False)
+            self.job_status_label.setText("Calibración fallida")
+            QMessageBox.critical(self, "Error", f"Error al calibrar los perfiles: {error}")
+
+        self.set_calibrating(True)
+        self.job_manager.run_task(
+            calibrate,
+            self.current_video_path,
+            output_format,
+            on_result=calibrated,
+            on_error=calibration_failed,
+            on_progress=calibration_progress,
+        )
+
+    def set_calibrating(self, calibrating):
+        self.calibrating = calibrating
+        self.calibrate_button.setEnabled(self.controls_enabled and not calibrating)
+
+    def run_smart_cut(self, label, source, ranges, on_success, error_message):
+        import core
+
+        # ranges es una lista de (inicio_ms, fin_ms, archivo_salida); la
+        # búsqueda de keyframes se hace fuera del hilo de la interfaz
+        # El índice suele estar ya en disco, así que planificar es inmediato
+        def planned(plan):
+            self.run_plan(label, plan, on_success, error_message)
+
+        def failed(error):
+            self.set_busy(False)
+            QMessageBox.critical(self, "Error", f"{error_message}: {error}")
+
+        self.set_busy(True)
+        self.job_status_label.setText(f"{label}: analizando keyframes...")
+        self.job_manager.run_task(
+            core.smart_trim_plan, source, ranges, on_result=planned, on_error=failed
+        )
+
+    def toggle_deferred_mode(self, enabled):
+        if enabled:
+            if self.current_video_path:
+                self.reset_edit_graph()
+            self.update_history_buttons()
+            return
+
+        graph = self.edit_graph
+        self.edit_graph = None
+        self.graph_redo_nodes = []
+        self.cancel_graph_preview()
+        self.update_history_buttons()
+        if graph is None or graph.is_empty():
+            if self.current_video_path:
+                self.load_media_file(self.current_video_path)
+            return
+
+        # Al volver al modo inmediato se renderizan las ediciones pendientes
+        # en un archivo de trabajo
+        intermediate = self.intermediate_format()
+        output_file = tempfile.mktemp(suffix=intermediate_extension(intermediate))
+        self.temp_files.append(output_file)
+        try:
+            command = graph.compile(output_file, intermediate_output_args(intermediate))
+            self.run_ffmpeg_job(
+                "Aplicando ediciones pendientes",
+                [command],
+                [graph.output_duration()],
+                lambda: self.on_graph_render_finished(output_file),
+                "Error al aplicar las ediciones pendientes",
+            )
+        except Exception as e:
+            QMessageBox.critical(
+                self, "Error", f"Error al aplicar las ediciones pendientes: {str(e)}"
+            )
+
+    def on_graph_render_finished(self, output_file):
+        self.current_video_path = output_file
+        self.load_media_file(output_file)
+        self.cut_segments = [{"path": output_file, "start": 0, "end": self.duration}]
+        self.record_history("Ediciones diferidas")
+
+    def reset_edit_graph(self):
+        self.cancel_graph_preview()
+        self.graph_redo_nodes = []
+        self.edit_graph = EditGraph(
+            self.current_video_path,
+            self.media_duration or self.duration,
+            self.has_audio,
+        )
+
+    def add_edit_node(self, node, description):
+        self.edit_graph.add(node)
+        try:
+            self.render_graph_preview()
+        except Exception as e:
+            # Deshacer el nodo si el grafo resultante no es válido
+            self.edit_graph.nodes.pop()
+            QMessageBox.critical(self, "Error", f"{description}: {str(e)}")
+            return
+        # Una edición nueva descarta las que se podían rehacer
+        self.graph_redo_nodes = []
+        self.update_history_buttons()
+        self.job_status_label.setText(
+            f"{description} agregado ({len(self.edit_graph.nodes)} ediciones pendientes)"
+        )
+
+    def render_graph_preview(self):
+        # La vista previa es un render rápido a baja resolución del grafo
+        # completo; la exportación vuelve a partir del original
+        self.cancel_graph_preview()
+        output_file = tempfile.mktemp(suffix=".mp4")
+        self.temp_files.append(output_file)
+        command = self.edit_graph.compile(
+            output_file,
+            ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "30", "-c:a", "aac"],
+            preview_height=360,
+        )
+
+        job = FFmpegJob([command], [self.edit_graph.output_duration()], "Vista previa")
+        job.progress.connect(self.job_progress)
+        job.succeeded.connect(lambda: self.load_media_file(output_file))
+        job.failed.connect(
+            lambda error: self.job_status_label.setText(
+                f"Error en la vista previa: {error.splitlines()[-1] if error else ''}"
+            )
+        )
+        job.done.connect(job.deleteLater)
+        self.preview_job = job
+        job.start()
+
+    def schedule_settings_preview(self, *args):
+        if self.settings_preview_check.isChecked() and self.current_video_path:
+            self.settings_preview_timer.start()
+
+    def toggle_settings_preview(self, enabled):
+        if enabled:
+            self.schedule_settings_preview()
+            return
+        self.settings_preview_timer.stop()
+        self.cancel_settings_preview()
+        self.leave_settings_preview()
+
+    def showing_settings_preview(self):
+        return (
+            self.settings_preview is not None
+            and self.playback_path == self.settings_preview["outputs"][0]
+        )
+
+    def timeline_position(self):
+        # Posición del cabezal en el video editado, también con la vista
+        # previa en pantalla
+        if self.media_player is None:
+            return 0
+        position = self.media_player.position()
+        if self.showing_settings_preview():
+            start, _ = self.settings_preview["window"]
+            return int(start + position * self.settings_preview["speed"])
+        return position
+
+    def preview_settings(self):
+        import core
+
+        # Ajustes de las pestañas ya creadas; None si no cambian nada
+        text = None
+        if "text" in self.built_tool_tabs and self.text_input.text():
+            text = {
+                "text": self.text_input.text(),
+                "position": self.text_position_combo.currentIndex(),
+                "font_size": self.text_size_spin.value(),
+                "opacity": self.text_opacity_spin.value(),
+                "color": self.text_overlay_color.name().replace("#", "0x"),
+            }
+            if self.text_range_check.isChecked():
+                text["start"] = self.text_start_spin.value() * 1000
+                text["end"] = self.text_end_spin.value() * 1000
+        resolution = None
+        speed = 1.0
+        if "tech" in self.built_tool_tabs:
+            resolution = core.parse_resolution(self.resolution_combo.currentText())
+            speed = core.parse_speed(self.speed_combo.currentText())
+        if text is None and resolution is None and speed == 1.0:
+            return None
+        return {"text": text, "resolution": resolution, "speed": speed}
+
+    def render_settings_preview(self):
+        from preview_window import preview_plan
+
+        # La edición diferida ya tiene su propia vista previa del grafo
+        if not self.settings_preview_check.isChecked() or self.edit_graph is not None:
+            return
+        if not self.current_video_path or self.media_player is None or self.duration <= 0:
+            return
+        self.cancel_settings_preview()
+        settings = self.preview_settings()
+        position = self.timeline_position()
+        if settings is None:
+            self.leave_settings_preview()
+            return
+
+        # Con proxy se parte de él, escalando el tamaño del texto
+        source = self.playback_source(self.current_video_path)
+        scale = 1.0
+        if source != self.current_video_path and self.resolution[1] > 0:
+            scale = proxy_media.PROXY_HEIGHT / self.resolution[1]
+        output_file = tempfile.mktemp(suffix=".mp4")
+        self.temp_files.append(output_file)
+        plan = preview_plan(
+            source,
+            output_file,
+            position,
+            self.duration,
+            settings["text"],
+            settings["resolution"],
+            settings["speed"],
+            self.has_audio,
+            scale,
+        )
+
+        job = FFmpegJob(plan["commands"], plan["durations"], "Vista previa de ajustes")
+        job.succeeded.connect(lambda: self.show_settings_preview(plan, position))
+        job.failed.connect(
+            lambda error: self.job_status_label.setText(
+                f"Error en la vista previa: {error.splitlines()[-1] if error else ''}"
+            )
+        )
+        job.done.connect(job.deleteLater)
+        self.settings_preview_job = job
+        job.start()
+
+    def show_settings_preview(self, plan, position):
+        self.settings_preview_job = None
+        if not self.settings_preview_check.isChecked():
+            return
+        previous = self.settings_preview
+        self.settings_preview = plan
+        start, end = plan["window"]
+        self.set_playback_media(plan["outputs"][0])
+        self.media_player.setPosition(int((position - start) / plan["speed"]))
+        self.media_player.play()
+        self.job_status_label.setText(
+            f"Vista previa de ajustes: {self.format_time(start)} - {self.format_time(end)}"
+        )
+        # El render anterior ya no se muestra
+        if previous is not None and previous["outputs"][0] != plan["outputs"][0]:
+            try:
+                os.remove(previous["outputs"][0])
+            except OSError:
+                pass
+
+    def leave_settings_preview(self, position=None):
+        # Volver a reproducir el video editado (o su proxy) en la posición
+        # equivalente
+        if not self.showing_settings_preview():
+            self.settings_preview = None
+            return
+        if position is None:
+            position = self.timeline_position()
+        self.settings_preview = None
+        playing = self.is_playing
+        self.proxy_switch_pending = True
+        self.set_playback_media(self.playback_source(self.current_video_path))
+        self.media_player.setPosition(int(position))
+        if playing:
+            self.media_player.play()
+        else:
+            self.media_player.pause()
+
+    def cancel_settings_preview(self):
+        if self.settings_preview_job is not None:
+            try:
+                self.settings_preview_job.cancel()
+            except RuntimeError:
+                # El objeto de Qt ya fue destruido
+                pass
+            self.settings_preview_job = None
+
+    def cancel_graph_preview(self):
+        if self.preview_job is not None:
+            try:
+                self.preview_job.cancel()
+            except RuntimeError:
+                # El objeto de Qt ya fue destruido
+                pass
+            self.preview_job = None
+
+    def run_ffmpeg_job(self, label, commands, durations, on_success, error_message):
+        # Lanzar los comandos en segundo plano; el resultado vuelve por señales
+        job = FFmpegJob(commands, durations, label)
+        job.progress.connect(self.job_progress)
+        job.succeeded.connect(on_success)
+        job.failed.connect(
+            lambda error: QMessageBox.critical(
+                self, "Error", f"{error_message}: {error}"
+            )
+        )
+        job.cancelled.connect(
+            lambda: self.job_status_label.setText(f"{label}: cancelado")
+        )
+        self.job_manager.submit(job)
+        return job
+
+    def run_plan(self, label, plan, on_success, error_message):
+        # Ejecuta un plan de core; sus temporales se borran al cerrar
+        self.temp_files.extend(plan["temp_files"])
+        return self.run_ffmpeg_job(
+            label, plan["commands"], plan["durations"], on_success, error_message
+        )
+
+    def job_started(self, job):
+        self.set_busy(True)
+        self.job_progress_bar.setValue(0)
+        self.job_status_label.setText(f"{job.label}...")
+
+    def job_finished(self, job):
+        if not self.job_manager.is_busy():
+            self.set_busy(False)
+            self.job_progress_bar.setValue(0 if job.is_cancelled else 100)
+            if not job.is_cancelled:
+                self.job_status_label.setText(f"{job.label}: terminado")
+
+    def job_progress(self, progress):
+        self.job_progress_bar.setValue(progress["percent"])
+
+        status = f"{progress['label']}"
+        if progress["steps"] > 1:
+            status += f" ({progress['step']}/{progress['steps']})"
+        if progress["fps"] > 0:
+            status += f" | {progress['fps']:.1f} fps"
+        status += f" | {progress['speed']:.2f}x"
+        if progress["eta"] is not None:
+            status += f" | Restante: {format_eta(progress['eta'])}"
+        self.job_status_label.setText(status)
+
+    def cancel_job(self):
+        self.job_manager.cancel_all()
+        if self.chunked_render is not None:
+            self.chunked_render.cancel()
+
+    def set_busy(self, busy):
+        # Mientras hay un trabajo en curso solo se permite reproducir y cancelar
+        self.busy = busy
+        enabled = not busy and self.current_video_path is not None
+        self.trim_button.setEnabled(enabled)
+        self.split_button.setEnabled(enabled)
+        self.remove_segment_button.setEnabled(enabled)
+        self.join_segments_button.setEnabled(enabled)
+        self.export_button.setEnabled(enabled)
+        self.smart_cut_check.setEnabled(not busy)
+        self.load_button.setEnabled(not busy)
+        self.cancel_job_button.setEnabled(busy)
+        if "text" in self.built_tool_tabs:
+            self.apply_text_button.setEnabled(enabled)
+        if "audio" in self.built_tool_tabs:
+            self.apply_audio_button.setEnabled(enabled)
+        if "tech" in self.built_tool_tabs:
+            self.apply_tech_button.setEnabled(enabled)
+            self.parallel_check.setEnabled(not busy)
+        self.update_history_buttons()
+
     def toggle_controls(self, enabled):
         # Activar/desactivar controles de edición
+        self.controls_enabled = enabled
         self.timeline_slider.setEnabled(enabled)
         self.start_slider.setEnabled(enabled)
         self.end_slider.setEnabled(enabled)
@@ -885,19 +2506,39 @@ class VideoEditor(QMainWindow):
         self.split_button.setEnabled(enabled)
         self.remove_segment_button.setEnabled(enabled)
         self.join_segments_button.setEnabled(enabled)
-        self.apply_text_button.setEnabled(enabled)
-        self.load_audio_button.setEnabled(enabled)
-        self.apply_audio_button.setEnabled(enabled)
-        self.apply_tech_button.setEnabled(enabled)
         self.export_button.setEnabled(enabled)
+        if "text" in self.built_tool_tabs:
+            self.apply_text_button.setEnabled(enabled)
+        if "audio" in self.built_tool_tabs:
+            self.load_audio_button.setEnabled(enabled)
+            self.apply_audio_button.setEnabled(enabled)
+        if "tech" in self.built_tool_tabs:
+            self.apply_tech_button.setEnabled(enabled)
+            self.calibrate_button.setEnabled(enabled and not self.calibrating)
 
     def closeEvent(self, event):
         # Limpieza antes de cerrar
-        self.media_player.stop()
-        self.update_timer.stop()
-
-        # Eliminar archivos temporales
+        self.cancel_job()
+        self.cancel_graph_preview()
+        self.cancel_settings_preview()
+        if self.render_queue_runner is not None:
+            self.render_queue_runner.stop()
+        if self.render_cache is not None:
+            self.render_cache.close()
+        self.proxy_stop.set()
+        if self.thumbnail_track is not None:
+            self.thumbnail_track.close()
+        if self.media_player is not None:
+            self.media_player.stop()
+
+        # Eliminar archivos temporales (salvo los que esperan en la cola de
+        # renders)
+        queued_files = set()
+        if self.render_queue_runner is not None:
+            queued_files = set(self.render_queue_runner.queue.files_in_use())
         for temp_file in self.temp_files:
+            if temp_file in queued_files:
+                continue
             try:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
@@ -907,17 +2548,474 @@ class VideoEditor(QMainWindow):
         event.accept()
 
 
+# Panel con el registro de las invocaciones de ffmpeg/ffprobe
+class TelemetryPanel(QDockWidget):
+    recorded = pyqtSignal(dict)
+
+    COLUMNS = [
+        "Hora",
+        "Operación",
+        "Programa",
+        "Tiempo (s)",
+        "Velocidad",
+        "Entrada (MB)",
+        "Salida (MB)",
+        "Memoria (MB)",
+        "Código",
+        "Origen",
+    ]
+    # Filas visibles; el registro completo queda en TELEMETRY
+    MAX_ROWS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__("Registro de FFmpeg", parent)
+        self.setObjectName("telemetry_panel")
+        container = QWidget()
+        layout = QVBoxLayout(container)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        buttons_layout = QHBoxLayout()
+        self.summary_label = QLabel("Sin invocaciones")
+        buttons_layout.addWidget(self.summary_label)
+        export_button = QPushButton("Exportar JSONL")
+        export_button.clicked.connect(self.export_records)
+        buttons_layout.addWidget(export_button)
+        clear_button = QPushButton("Limpiar")
+        clear_button.clicked.connect(self.clear_records)
+        buttons_layout.addWidget(clear_button)
+        layout.addLayout(buttons_layout)
+
+        self.setWidget(container)
+        self.recorded.connect(self.add_record)
+        for record in TELEMETRY.snapshot():
+            self.add_record(record)
+
+    def add_record(self, record):
+        def megabytes(value):
+            return f"{value / 1024 / 1024:.1f}" if value else ""
+
+        values = [
+            time.strftime("%H:%M:%S", time.localtime(record["time"])),
+            record["label"],
+            record["program"],
+            f"{record['seconds']:.2f}",
+            f"{record['speed']:.2f}x" if record["speed"] else "",
+            megabytes(record["input_bytes"]),
+            megabytes(record["output_bytes"]),
+            f"{record['peak_rss_kb'] / 1024:.0f}" if record["peak_rss_kb"] else "",
+            str(record["exit_code"]),
+            os.path.basename(record["source"]),
+        ]
+        # Ordenar mientras se inserta movería la fila a mitad de rellenarla
+        self.table.setSortingEnabled(False)
+        if self.table.rowCount() >= self.MAX_ROWS:
+            self.table.removeRow(0)
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for column, value in enumerate(values):
+            item = QTableWidgetItem(value)
+            item.setToolTip(record["command"] + (f"\n{record['error']}" if record["error"] else ""))
+            if record["exit_code"] != 0:
+                item.setForeground(QColor(200, 60, 60))
+            self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+        self.update_summary()
+
+    def update_summary(self):
+        records = TELEMETRY.snapshot()
+        total = sum(record["seconds"] for record in records)
+        failed = sum(1 for record in records if record["exit_code"] != 0)
+        self.summary_label.setText(
+            f"{len(records)} invocaciones, {total:.1f} s en total, {failed} con error"
+        )
+
+    def export_records(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Exportar registro",
+            QDir.homePath() + "/registro_ffmpeg.jsonl",
+            "JSON lines (*.jsonl)",
+        )
+        if not file_path:
+            return
+        try:
+            count = TELEMETRY.export_jsonl(file_path)
+            QMessageBox.information(
+                self, "Éxito", f"{count} registros exportados a {file_path}"
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al exportar el registro: {str(e)}")
+
+    def clear_records(self):
+        TELEMETRY.clear()
+        self.table.setRowCount(0)
+        self.update_summary()
+
+
+# Panel de la cola de renders: estado, hilos, espera y velocidad de cada
+# trabajo
+class RenderQueuePanel(QDockWidget):
+    COLUMNS = [
+        "Trabajo",
+        "Prioridad",
+        "Estado",
+        "Progreso",
+        "Hilos",
+        "Espera",
+        "Velocidad",
+    ]
+    # Intervalo (ms) para actualizar esperas y velocidades sin cambios de
+    # estado
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self, runner, parent=None):
+        super().__init__("Cola de renders", parent)
+        self.setObjectName("render_queue_panel")
+        self.runner = runner
+        container = QWidget()
+        layout = QVBoxLayout(container)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        buttons_layout = QHBoxLayout()
+        self.summary_label = QLabel()
+        buttons_layout.addWidget(self.summary_label)
+        self.priority_combo = QComboBox()
+        for name in PRIORITY_NAMES:
+            self.priority_combo.addItem(PRIORITY_LABELS[name], name)
+        buttons_layout.addWidget(self.priority_combo)
+        priority_button = QPushButton("Cambiar prioridad")
+        priority_button.clicked.connect(self.change_priority)
+        buttons_layout.addWidget(priority_button)
+        self.pause_check = QCheckBox("Pausar")
+        self.pause_check.toggled.connect(self.runner.set_paused)
+        buttons_layout.addWidget(self.pause_check)
+        batch_button = QPushButton("Añadir lote...")
+        batch_button.clicked.connect(self.add_batch)
+        buttons_layout.addWidget(batch_button)
+        cancel_button = QPushButton("Cancelar")
+        cancel_button.clicked.connect(self.cancel_entry)
+        buttons_layout.addWidget(cancel_button)
+        clear_button = QPushButton("Limpiar terminados")
+        clear_button.clicked.connect(self.clear_finished)
+        buttons_layout.addWidget(clear_button)
+        layout.addLayout(buttons_layout)
+
+        self.setWidget(container)
+        self.runner.changed.connect(self.refresh)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def entries(self):
+        # En marcha primero, luego la cola en el orden en que se ejecutará y
+        # al final los terminados
+        queue = self.runner.queue
+        finished = [entry for entry in queue.entries if entry["status"] in FINISHED_STATUSES]
+        return queue.running() + queue.pending() + finished
+
+    def refresh(self):
+        if not self.isVisible() and self.table.rowCount():
+            return
+        now = time.time()
+        entries = self.entries()
+        self.table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            speed = entry_speed(entry, now)
+            values = [
+                entry["label"],
+                PRIORITY_LABELS[entry["priority"]],
+                STATUS_LABELS[entry["status"]],
+                f"{entry['percent']:.0f} %",
+                str(entry["threads"]) if entry["threads"] else "",
+                format_eta(entry_wait(entry, now)),
+                f"{speed:.2f}x" if speed else "",
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                # El id permite encontrar la entrada de la fila seleccionada
+                item.setData(Qt.UserRole, entry["id"])
+                if entry["error"]:
+                    item.setToolTip(entry["error"])
+                if entry["status"] == "failed":
+                    item.setForeground(QColor(200, 60, 60))
+                self.table.setItem(row, column, item)
+
+        stats = self.runner.queue.stats()
+        self.summary_label.setText(
+            f"{stats['pending']} en cola, {stats['running']} en marcha, "
+            f"espera media {format_eta(stats['average_wait'])}, "
+            f"velocidad media {stats['average_speed']:.2f}x"
+        )
+
+    def selected_entry(self):
+        items = self.table.selectedItems()
+        if not items:
+            return None
+        return self.runner.queue.get(items[0].data(Qt.UserRole))
+
+    def change_priority(self):
+        entry = self.selected_entry()
+        if entry is None or entry["status"] != "pending":
+            return
+        self.runner.queue.set_priority(entry, self.priority_combo.currentData())
+        self.refresh()
+
+    def cancel_entry(self):
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        self.runner.cancel(entry)
+
+    def clear_finished(self):
+        self.runner.queue.remove_finished()
+        self.refresh()
+
+    def add_batch(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Añadir lote",
+            QDir.homePath(),
+            "Especificaciones de lote (*.json *.yaml *.yml)",
+        )
+        if not file_path:
+            return
+        from queue_runner import load_batch
+
+        priority = self.priority_combo.currentData()
+
+        def loaded(jobs):
+            for job, seconds in jobs:
+                self.runner.add_batch(job, priority, seconds)
+
+        def failed(error):
+            QMessageBox.critical(self, "Error", f"Error al leer el lote: {error}")
+
+        self.runner.job_manager.run_task(
+            load_batch, file_path, on_result=loaded, on_error=failed
+        )
+
+
+# Tira de miniaturas de la línea de tiempo
+class FilmstripWidget(QWidget):
+    def __init__(self, frame_cache, parent=None):
+        super().__init__(parent)
+        self.frame_cache = frame_cache
+        self.track = None
+        self.position = 0.0
+        self.setMinimumHeight(54)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def set_track(self, track):
+        self.track = track
+        self.update()
+
+    def set_position(self, seconds):
+        self.position = seconds
+        self.update()
+
+    def tile_pixmap(self, sheet, index):
+        pixmap = self.frame_cache.get(THUMBNAIL_TIER, sheet.sprite_path, index)
+        if pixmap is None:
+            image = QImage(
+                sheet.tile_bytes(index),
+                sheet.tile_width,
+                sheet.tile_height,
+                sheet.tile_width * 3,
+                QImage.Format_RGB888,
+            )
+            pixmap = QPixmap.fromImage(image)
+            self.frame_cache.put(THUMBNAIL_TIER, sheet.sprite_path, index, pixmap)
+        return pixmap
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self.track is None or self.track.duration <= 0:
+            return
+
+        # Cada hueco muestra la miniatura más cercana a su instante central
+        height = self.height()
+        slot_width = max(1, int(height * 16 / 9))
+        slots = max(1, self.width() // slot_width + 1)
+        for slot in range(slots):
+            seconds = (slot + 0.5) * slot_width * self.track.duration / self.width()
+            if seconds > self.track.duration:
+                break
+            sheet, index = self.track.thumbnail_at(seconds)
+            painter.drawPixmap(
+                slot * slot_width, 0, slot_width, height, self.tile_pixmap(sheet, index)
+            )
+
+        # Cabezal de reproducción
+        x = int(self.position * self.width() / self.track.duration)
+        painter.setPen(QPen(Qt.red, 2))
+        painter.drawLine(x, 0, x, height)
+
+
+# Forma de onda con zoom (rueda del ratón) sobre una pirámide de picos
+class WaveformWidget(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source_path = None
+        self.waveform = None
+        self.view_start = 0.0
+        self.view_end = 0.0
+        self.setMinimumHeight(60)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+    def set_waveform(self, waveform):
+        self.waveform = waveform
+        self.view_start = 0.0
+        self.view_end = waveform.duration if waveform is not None else 0.0
+        self.update()
+
+    def wheelEvent(self, event):
+        if self.waveform is None or self.view_end <= self.view_start:
+            return
+        # Acercar o alejar alrededor de la posición del cursor
+        span = self.view_end - self.view_start
+        anchor = self.view_start + span * event.pos().x() / max(1, self.width())
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        new_span = min(self.waveform.duration, max(0.05, span * factor))
+        start = anchor - (anchor - self.view_start) * new_span / span
+        self.view_start = max(0.0, min(start, self.waveform.duration - new_span))
+        self.view_end = self.view_start + new_span
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(30, 30, 30))
+        if self.waveform is None:
+            painter.setPen(Qt.gray)
+            painter.drawText(self.rect(), Qt.AlignCenter, "Sin forma de onda")
+            return
+
+        width = self.width()
+        middle = self.height() / 2
+        mins, maxs, rms = self.waveform.peaks(self.view_start, self.view_end, width)
+        if len(mins) == 0:
+            return
+        scale = width / len(mins)
+
+        painter.setPen(QColor(80, 160, 220))
+        for column in range(len(mins)):
+            x = int(column * scale)
+            painter.drawLine(
+                x, int(middle - maxs[column] * middle), x, int(middle - mins[column] * middle)
+            )
+
+        painter.setPen(QColor(160, 210, 250))
+        for column in range(len(rms)):
+            x = int(column * scale)
+            level = int(rms[column] * middle)
+            painter.drawLine(x, int(middle - level), x, int(middle + level))
+
+
 # Clase para manejar la extracción de frames del video para previsualización
 class VideoFrameExtractor:
-    def __init__(self, video_path):
+    def __init__(
+        self,
+        video_path,
+        size=None,
+        use_pipe=True,
+        cache=None,
+        fps=None,
+        proxy_path=None,
+        on_error=None,
+    ):
         self.video_path = video_path
-        self.frames_cache = {}
+        # on_error(mensaje) recibe los errores de extracción; sin él se
+        # escriben en la consola
+        self.on_error = on_error
+        # Los frames se decodifican del proxy si existe (mismos tiempos)
+        self.decode_path = proxy_path or video_path
+        # Tamaño de salida: None (original), (ancho, alto) o (ancho, None)
+        self.size = size
+        # Con use_pipe se reutiliza un único proceso de ffmpeg por archivo
+        self.use_pipe = use_pipe
+        self.decoder = None
+        # La caché puede compartirse entre extractores; los frames completos
+        # y las miniaturas van a niveles distintos
+        self.frames_cache = cache if cache is not None else FrameCache()
+        self.cache_tier = FULL_TIER if size is None else THUMBNAIL_TIER
+        self.cache_source = (self.decode_path, size)
+        self._fps = fps
+
+    @property
+    def fps(self):
+        if not self._fps:
+            if self.use_pipe:
+                self._fps = self.get_decoder().fps
+            else:
+                stream = video_stream(probe(self.decode_path))
+                self._fps = parse_rate(stream.get("r_frame_rate"), 25.0)
+        return self._fps
+
+    def get_decoder(self):
+        if self.decoder is None:
+            self.decoder = PipeFrameDecoder(self.decode_path, self.size)
+        return self.decoder
+
+    def use_proxy(self, proxy_path):
+        # Cambiar al proxy cuando termina de generarse
+        self.close()
+        self.decode_path = proxy_path or self.video_path
+        self.cache_source = (self.decode_path, self.size)
+
+    def extract_image(self, position_ms):
+        # Devuelve un QImage que comparte el buffer leído de la tubería
+        try:
+            return self.get_decoder().frame_at(position_ms)
+        except Exception as e:
+            self.report_error(e)
+            return None
 
     def extract_frame(self, position_ms):
-        # Verificar si el frame ya está en caché
-        if position_ms in self.frames_cache:
-            return self.frames_cache[position_ms]
+        # Verificar si el frame ya está en caché (por número de frame)
+        try:
+            index = frame_index(position_ms, self.fps)
+        except Exception as e:
+            self.report_error(e)
+            return QPixmap()
+        pixmap = self.frames_cache.get(self.cache_tier, self.cache_source, index)
+        if pixmap is not None:
+            return pixmap
+
+        # Decodificar el inicio exacto del frame para que la entrada sirva
+        # a cualquier posición dentro de él
+        frame_ms = frame_time_ms(index, self.fps)
+        if self.use_pipe:
+            image = self.extract_image(frame_ms)
+            if image is None:
+                return QPixmap()
+            pixmap = QPixmap.fromImage(image)
+        else:
+            pixmap = self.extract_frame_process(frame_ms)
+            if pixmap.isNull():
+                return pixmap
+
+        # Almacenar en caché
+        self.frames_cache.put(self.cache_tier, self.cache_source, index, pixmap)
+        return pixmap
 
+    def extract_frame_process(self, position_ms):
+        # Modo anterior: un proceso de ffmpeg y un JPEG temporal por frame
         try:
             # Convertir posición a segundos
             position_sec = position_ms / 1000.0
@@ -926,38 +3024,75 @@ class VideoFrameExtractor:
             frame_file = tempfile.mktemp(suffix=".jpg")
 
             # Extraer el frame con ffmpeg
-            (
-                ffmpeg.input(self.video_path, ss=position_sec)
-                .output(frame_file, vframes=1)
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+            run_command(
+                [FFMPEG, "-y", "-ss", str(position_sec), "-i", self.decode_path]
+                + ["-frames:v", "1", frame_file]
             )
 
             # Cargar el frame como QPixmap
             pixmap = QPixmap(frame_file)
 
-            # Almacenar en caché
-            self.frames_cache[position_ms] = pixmap
-
             # Eliminar el archivo temporal
             os.remove(frame_file)
 
             return pixmap
         except Exception as e:
-            print(f"Error al extraer frame: {str(e)}")
+            self.report_error(e)
             return QPixmap()
 
+    def report_error(self, error):
+        message = f"Error al extraer frame: {str(error)}"
+        if self.on_error is not None:
+            self.on_error(message)
+        else:
+            print(message)
+
     def clear_cache(self):
-        self.frames_cache.clear()
+        self.frames_cache.clear(self.cache_source)
+
+    def cache_stats(self):
+        return self.frames_cache.stats()[self.cache_tier]
+
+    def close(self):
+        if self.decoder is not None:
+            self.decoder.close()
+            self.decoder = None
 
 
 # Función principal para iniciar la aplicación
 def main():
-    app = QApplication(sys.argv)
-    editor = VideoEditor()
-    editor.show()
+    # --startup-profile muestra cuánto tarda cada fase del arranque y sale
+    startup_profile = "--startup-profile" in sys.argv
+    if startup_profile:
+        sys.argv.remove("--startup-profile")
+
+    with PROFILE.phase("QApplication"):
+        app = QApplication(sys.argv)
+    with PROFILE.phase("VideoEditor.__init__"):
+        editor = VideoEditor()
+    with PROFILE.phase("mostrar ventana"):
+        editor.show()
+    # La cola de renders se carga con la ventana ya visible
+    QTimer.singleShot(0, editor.ensure_render_queue)
+
+    if startup_profile:
+        QTimer.singleShot(0, lambda: report_startup_profile(app, editor))
     sys.exit(app.exec_())
 
 
+def report_startup_profile(app, editor):
+    # Se ejecuta en la primera vuelta del bucle de eventos, con la ventana ya
+    # visible; después mide lo que se carga de forma diferida
+    ready = PROFILE.elapsed()
+    with PROFILE.phase("diferido: reproductor"):
+        editor.ensure_media_player()
+    for index in range(editor.tools_tabs.count()):
+        with PROFILE.phase(f"diferido: {editor.tools_tabs.tabText(index)}"):
+            editor.ensure_tool_tab(index)
+    PROFILE.report(ready=ready)
+    editor.close()
+    app.quit()
+
+
 if __name__ == "__main__":
     main()
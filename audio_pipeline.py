@@ -0,0 +1,110 @@
+# Cambios de audio en una sola pasada.
+#
+# El video se copia siempre sin recodificar: reemplazar, mezclar, silenciar o
+# desplazar el audio es un único comando de ffmpeg cuyo coste depende solo de
+# la duración del audio y no de la resolución del video. El audio cargado se
+# decodifica una vez a PCM con la frecuencia y los canales de trabajo y se
+# guarda en ~/.cache/EditorVideo/audio identificado por la versión del
+# archivo, así que los siguientes cambios con el mismo audio no vuelven a
+# decodificarlo ni a remuestrearlo.
+import os
+import tempfile
+
+from edit_graph import offset_filter
+from media_tools import FFMPEG, cache_dir, file_key, output_codecs, run_command
+
+
+AUDIO_RATE = 48000
+AUDIO_CHANNELS = 2
+# Espacio máximo del audio decodificado; se borra primero el menos usado
+AUDIO_BUDGET = 4 * 1024 * 1024 * 1024
+
+
+def decoded_path(path):
+    return os.path.join(cache_dir("audio"), f"{file_key(path)}.wav")
+
+
+def load_or_decode(path):
+    # Se ejecuta en un hilo de trabajo; devuelve la ruta del audio decodificado
+    output_path = decoded_path(path)
+    if os.path.exists(output_path):
+        # La fecha de acceso ordena los archivos al liberar espacio
+        os.utime(output_path)
+        return output_path
+
+    # Archivo parcial propio: dos decodificaciones simultáneas del mismo
+    # audio no se pisan y el resultado aparece completo o no aparece
+    partial_path = tempfile.mktemp(suffix=".part.wav", dir=cache_dir("audio"))
+    command = [FFMPEG, "-y", "-v", "error", "-i", path, "-map", "0:a:0", "-vn"]
+    command += ["-ac", str(AUDIO_CHANNELS), "-ar", str(AUDIO_RATE)]
+    # RF64 solo si el audio supera el límite de 4 GB de WAV
+    command += ["-c:a", "pcm_s16le", "-rf64", "auto", partial_path]
+    try:
+        run_command(command, "Decodificar audio")
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    prune_decoded(keep=output_path)
+    return output_path
+
+
+def prune_decoded(budget=AUDIO_BUDGET, keep=None):
+    directory = cache_dir("audio")
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".part.wav"):
+            continue
+        stat = os.stat(path)
+        files.append((stat.st_atime, stat.st_size, path))
+
+    used = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if used <= budget:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            used -= size
+        except OSError:
+            pass
+
+
+def audio_command(
+    source,
+    output,
+    duration_ms,
+    audio_path=None,
+    mute_original=False,
+    offset_ms=0,
+    has_audio=True,
+    audio_args=None,
+):
+    # audio_path es el audio nuevo (idealmente el de load_or_decode);
+    # offset_ms desplaza el audio nuevo respecto al video
+    command = [FFMPEG, "-y", "-i", source]
+    if not audio_path:
+        if not mute_original:
+            raise ValueError("No se han seleccionado cambios de audio.")
+        # Solo quitar el audio original
+        return command + ["-map", "0:v", "-c:v", "copy", "-an", output]
+
+    command += ["-i", audio_path]
+    # El audio nuevo se completa con silencio y se corta a la duración del
+    # video, para que el resultado dure exactamente lo mismo
+    new_filters = [offset_filter(offset_ms), "apad", f"atrim=end={duration_ms / 1000.0:.6f}"]
+    new_audio = ",".join(f for f in new_filters if f)
+    if mute_original or not has_audio:
+        # Reemplazar el audio original con el nuevo
+        graph = f"[1:a]{new_audio}[a]"
+    else:
+        # Mezclar el audio original con el nuevo
+        graph = (
+            f"[0:a]aresample={AUDIO_RATE}[original];[1:a]{new_audio}[new];"
+            f"[original][new]amix=inputs=2:duration=first[a]"
+        )
+    command += ["-filter_complex", graph, "-map", "0:v", "-map", "[a]", "-c:v", "copy"]
+    command += audio_args or ["-c:a", output_codecs(output)["audio"]]
+    return command + [output]
@@ -0,0 +1,403 @@
+# Benchmark reproducible de las operaciones de edición.
+#
+# Genera videos sintéticos con los generadores testsrc y sine de lavfi (los
+# mismos bytes en cada máquina con la misma versión de ffmpeg), ejecuta cada
+# operación de core.py sin interfaz y mide el tiempo real, los fps
+# procesados, el pico de memoria de los procesos de ffmpeg y los bytes
+# escritos. Cada ejecución se agrega a un historial JSON y se puede comparar
+# con una ejecución marcada como referencia para detectar regresiones:
+#
+#   python benchmark.py --quick --save-baseline
+#   python benchmark.py --quick --label mi-cambio --compare
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import core
+from media_tools import FFMPEG, cache_dir, run_command
+from mezzanine import INTERMEDIATE_NAMES, intermediate_extension
+
+try:
+    import resource
+except ImportError:
+    # Windows: no hay getrusage, el pico de memoria no se mide
+    resource = None
+
+
+# (ancho, alto) y duraciones en segundos de los videos sintéticos
+RESOLUTIONS = [(640, 360), (1280, 720), (1920, 1080)]
+LENGTHS = [10, 60]
+QUICK_RESOLUTIONS = [(640, 360)]
+QUICK_LENGTHS = [10]
+SOURCE_FPS = 30
+# Una operación es una regresión si tarda o usa más memoria que la
+# referencia por encima de este margen
+DEFAULT_THRESHOLD = 0.15
+
+
+def source_path(width, height, seconds):
+    return os.path.join(cache_dir("benchmark"), f"testsrc_{width}x{height}_{seconds}s.mp4")
+
+
+def make_source(width, height, seconds):
+    # Se genera una vez y se reutiliza; bitexact evita metadatos variables
+    path = source_path(width, height, seconds)
+    if os.path.exists(path):
+        return path
+    partial = path + ".part.mp4"
+    run_command(
+        [FFMPEG, "-y", "-v", "error", "-f", "lavfi"]
+        + ["-i", f"testsrc=size={width}x{height}:rate={SOURCE_FPS}:duration={seconds}"]
+        + ["-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}"]
+        + ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-g", str(SOURCE_FPS * 2)]
+        + ["-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", "128k", "-shortest"]
+        + ["-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact"]
+        + ["-f", "mp4", partial]
+    )
+    os.replace(partial, path)
+    return path
+
+
+def make_audio(seconds):
+    path = os.path.join(cache_dir("benchmark"), f"sine_{seconds}s.m4a")
+    if not os.path.exists(path):
+        partial = path + ".part.m4a"
+        run_command(
+            [FFMPEG, "-y", "-v", "error", "-f", "lavfi"]
+            + ["-i", f"sine=frequency=880:sample_rate=48000:duration={seconds}"]
+            + ["-c:a", "aac", "-b:a", "128k", "-fflags", "+bitexact", partial]
+        )
+        os.replace(partial, path)
+    return path
+
+
+def run_core_plan(plan):
+    try:
+        return core.run_plan(plan)
+    finally:
+        core.remove_temp_files(plan)
+
+
+# Cada operación recibe el caso (fuente, duración en ms, tamaño, perfil) y un
+# directorio de trabajo, y devuelve los archivos que escribió. La preparación
+# (dividir antes de unir) no se cronometra; es una copia sin recodificar
+def bench_trim(case, work_dir):
+    duration = case["duration"]
+    output = os.path.join(work_dir, "trim.mp4")
+    return run_core_plan(core.trim_plan(case["source"], duration / 4, duration * 3 / 4, output))
+
+
+def bench_split(case, work_dir):
+    duration = case["duration"]
+    part1 = os.path.join(work_dir, "split1.mp4")
+    part2 = os.path.join(work_dir, "split2.mp4")
+    return run_core_plan(core.split_plan(case["source"], duration / 2, duration, part1, part2))
+
+
+def setup_join(case, work_dir):
+    duration = case["duration"]
+    part1 = os.path.join(work_dir, "join1.mp4")
+    part2 = os.path.join(work_dir, "join2.mp4")
+    run_core_plan(core.split_plan(case["source"], duration / 2, duration, part1, part2))
+    case["parts"] = [part1, part2]
+
+
+def bench_join(case, work_dir):
+    output = os.path.join(work_dir, "join.mp4")
+    return [core.join_render(case["parts"], output).run()]
+
+
+def render_output(case, work_dir, name):
+    # Con --intermediate las operaciones que recodifican escriben el formato
+    # intermedio; sin él, MP4 con el perfil
+    intermediate = case["intermediate"]
+    extension = intermediate_extension(intermediate) if intermediate else ".mp4"
+    return os.path.join(work_dir, name + extension)
+
+
+def bench_audio(case, work_dir):
+    output = render_output(case, work_dir, "audio")
+    plan = core.audio_plan(
+        case["source"],
+        output,
+        case["duration"],
+        case["audio"],
+        mute_original=True,
+        intermediate=case["intermediate"],
+    )
+    return run_core_plan(plan)
+
+
+def bench_text(case, work_dir):
+    output = render_output(case, work_dir, "text")
+    plan = core.text_overlay_plan(
+        case["source"],
+        output,
+        case["duration"],
+        "Benchmark",
+        profile=case["profile"],
+        intermediate=case["intermediate"],
+    )
+    return run_core_plan(plan)
+
+
+def bench_technical(case, work_dir):
+    output = render_output(case, work_dir, "technical")
+    width, height = case["size"]
+    plan = core.technical_plan(
+        case["source"],
+        output,
+        case["duration"],
+        (width // 2 // 2 * 2, height // 2 // 2 * 2),
+        1.5,
+        profile=case["profile"],
+        intermediate=case["intermediate"],
+    )
+    return run_core_plan(plan)
+
+
+def bench_export(case, work_dir):
+    # MP4 -> MKV: remux sin recodificar
+    output = os.path.join(work_dir, "export.mkv")
+    return run_core_plan(core.export_plan(case["source"], output, profile=case["profile"]))
+
+
+def bench_export_transcode(case, work_dir):
+    # MP4 -> AVI: recodifica video y audio
+    output = os.path.join(work_dir, "export.avi")
+    return run_core_plan(core.export_plan(case["source"], output, profile=case["profile"]))
+
+
+# nombre -> (preparación o None, operación)
+OPERATIONS = {
+    "trim": (None, bench_trim),
+    "split": (None, bench_split),
+    "join": (setup_join, bench_join),
+    "audio": (None, bench_audio),
+    "text": (None, bench_text),
+    "technical": (None, bench_technical),
+    "export": (None, bench_export),
+    "export_transcode": (None, bench_export_transcode),
+}
+
+
+def peak_rss_kb():
+    # Pico de memoria de los procesos hijos (ffmpeg) ya terminados; ru_maxrss
+    # está en KB en Linux y en bytes en macOS
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(name, case):
+    # Se ejecuta en un proceso nuevo para que el pico de memoria de los
+    # hijos corresponda solo a esta operación
+    setup, operation = OPERATIONS[name]
+    work_dir = tempfile.mkdtemp(prefix="editorvideo-bench-")
+    try:
+        if setup is not None:
+            setup(case, work_dir)
+        started_at = time.perf_counter()
+        outputs = operation(case, work_dir)
+        wall = time.perf_counter() - started_at
+        written = sum(os.path.getsize(path) for path in outputs if os.path.exists(path))
+        return {"wall": wall, "bytes_written": written, "peak_rss_kb": peak_rss_kb()}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def measure(name, case, repeat):
+    # Mediana de repeat ejecuciones, cada una en su propio proceso
+    samples = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            samples.append(executor.submit(run_case, name, dict(case)).result())
+    wall = statistics.median(sample["wall"] for sample in samples)
+    peaks = [sample["peak_rss_kb"] for sample in samples if sample["peak_rss_kb"] is not None]
+    frames = case["duration"] / 1000.0 * SOURCE_FPS
+    width, height = case["size"]
+    return {
+        "operation": name,
+        "intermediate": case["intermediate"],
+        "source": {"width": width, "height": height, "seconds": case["duration"] / 1000.0},
+        "wall": wall,
+        "walls": [sample["wall"] for sample in samples],
+        "fps": frames / wall if wall > 0 else 0.0,
+        "peak_rss_kb": max(peaks) if peaks else None,
+        "bytes_written": samples[-1]["bytes_written"],
+    }
+
+
+def case_key(result):
+    # Las mediciones en formato intermedio no se comparan con las del perfil
+    source = result["source"]
+    operation = result["operation"]
+    if result.get("intermediate"):
+        operation += f"[{result['intermediate']}]"
+    return f"{operation}@{source['width']}x{source['height']}/{source['seconds']:g}s"
+
+
+def machine_info():
+    try:
+        version = run_command([FFMPEG, "-version"]).decode("utf-8", "replace").splitlines()[0]
+    except (OSError, RuntimeError):
+        version = "desconocida"
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "ffmpeg": version,
+    }
+
+
+def history_path():
+    return os.path.join(cache_dir("benchmark"), "history.json")
+
+
+def load_history(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"runs": []}
+
+
+def save_history(path, history):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def find_baseline(history, label=None):
+    # La ejecución con la etiqueta indicada o la última marcada como
+    # referencia
+    for run in reversed(history["runs"]):
+        if label is not None and run.get("label") == label:
+            return run
+        if label is None and run.get("baseline"):
+            return run
+    return None
+
+
+def compare(run, baseline, threshold=DEFAULT_THRESHOLD):
+    # Devuelve (clave, métrica, referencia, actual, cambio relativo) para
+    # cada métrica que empeoró más que threshold
+    previous = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in run["results"]:
+        key = case_key(result)
+        if key not in previous:
+            continue
+        for metric in ("wall", "peak_rss_kb"):
+            old, new = previous[key].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append((key, metric, old, new, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mide el rendimiento de las operaciones de edición con videos sintéticos."
+    )
+    parser.add_argument("--quick", action="store_true", help="solo 640x360 y 10 s")
+    parser.add_argument(
+        "--operations",
+        default=",".join(OPERATIONS),
+        help="operaciones separadas por comas (por defecto, todas)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones por caso (mediana)")
+    parser.add_argument("--profile", default="balanced", help="perfil de codificación")
+    parser.add_argument(
+        "--intermediate",
+        choices=INTERMEDIATE_NAMES,
+        default=None,
+        help="medir audio, text y technical en formato intermedio (por defecto, con el perfil)",
+    )
+    parser.add_argument("--label", default="", help="etiqueta de esta ejecución")
+    parser.add_argument("--history", default=history_path(), help="archivo JSON del historial")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="marcar esta ejecución como referencia"
+    )
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const="",
+        default=None,
+        help="comparar con la referencia (o con la ejecución de la etiqueta indicada)",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.operations.split(",") if name.strip()]
+    unknown = [name for name in names if name not in OPERATIONS]
+    if unknown:
+        print(f"Operaciones desconocidas: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    resolutions = QUICK_RESOLUTIONS if args.quick else RESOLUTIONS
+    lengths = QUICK_LENGTHS if args.quick else LENGTHS
+    results = []
+    for width, height in resolutions:
+        for seconds in lengths:
+            case = {
+                "source": make_source(width, height, seconds),
+                "audio": make_audio(seconds),
+                "duration": seconds * 1000.0,
+                "size": (width, height),
+                "profile": args.profile,
+                "intermediate": args.intermediate,
+            }
+            for name in names:
+                result = measure(name, case, max(1, args.repeat))
+                results.append(result)
+                peak = result["peak_rss_kb"]
+                memory = f"{peak / 1024:.0f} MB" if peak is not None else "n/d"
+                print(
+                    f"{case_key(result):32} {result['wall']:8.2f}s {result['fps']:8.1f} fps "
+                    f"{memory:>8} {result['bytes_written'] / 1024 / 1024:8.1f} MB escritos"
+                )
+
+    run = {
+        "time": time.time(),
+        "label": args.label,
+        "baseline": args.save_baseline,
+        "profile": args.profile,
+        "intermediate": args.intermediate,
+        "repeat": args.repeat,
+        "machine": machine_info(),
+        "results": results,
+    }
+    history = load_history(args.history)
+    baseline = None
+    if args.compare is not None:
+        baseline = find_baseline(history, args.compare or None)
+    history["runs"].append(run)
+    save_history(args.history, history)
+
+    if args.compare is None:
+        return 0
+    if baseline is None:
+        print("No hay una ejecución de referencia con la que comparar.", file=sys.stderr)
+        return 2
+    regressions = compare(run, baseline, args.threshold)
+    for key, metric, old, new, change in regressions:
+        print(f"REGRESIÓN {key} {metric}: {old:.2f} -> {new:.2f} (+{change * 100:.0f}%)")
+    if not regressions:
+        print(f"Sin regresiones respecto a la referencia (margen {args.threshold * 100:.0f}%).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
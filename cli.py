@@ -0,0 +1,310 @@
+# Procesamiento por lotes sin interfaz gráfica.
+#
+# Lee un archivo de especificación (JSON, o YAML si PyYAML está instalado)
+# con una lista de trabajos y ejecuta cada uno en su propio proceso usando las
+# mismas operaciones que el editor (core.py). Ejemplo:
+#
+#   {
+#     "jobs": [
+#       {
+#         "input": "entrada.mp4",
+#         "output": "salida.mp4",
+#         "operations": [
+#           {"op": "trim", "start": 5, "end": 35, "smart": true},
+#           {"op": "text", "text": "Hola", "position": 2},
+#           {"op": "technical", "resolution": "1280x720", "speed": 1.5}
+#         ]
+#       }
+#     ],
+#     "inputs": ["clips/*.mov"],
+#     "output_dir": "exportados",
+#     "format": "mp4",
+#     "profile": "draft",
+#     "intermediate": "intra_h264",
+#     "operations": [{"op": "audio", "mute": true}]
+#   }
+#
+# "inputs" aplica las mismas operaciones a todos los archivos que coincidan;
+# los tiempos se indican en segundos. "profile" (draft, balanced o archive)
+# elige el perfil de codificación, global o por trabajo. "intermediate"
+# (intra_h264, mjpeg o ffv1) guarda los pasos intermedios en un formato con
+# todos los frames intra; sin él se codifican directamente con el perfil.
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import core
+from audio_pipeline import load_or_decode
+from media_tools import audio_stream, duration_ms, probe, watch_stop
+from mezzanine import copy_extension, intermediate_extension, is_intermediate
+from parallel_encode import default_workers
+from render_queue import with_threads
+from telemetry import TELEMETRY
+
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def expand_jobs(spec):
+    jobs = [dict(job) for job in spec.get("jobs", [])]
+    for job in jobs:
+        job.setdefault("profile", spec.get("profile"))
+        job.setdefault("intermediate", spec.get("intermediate"))
+    if spec.get("inputs"):
+        patterns = spec["inputs"]
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        output_dir = spec.get("output_dir", ".")
+        output_format = spec.get("format")
+        for pattern in patterns:
+            for input_path in sorted(glob.glob(os.path.expanduser(pattern))):
+                name, extension = os.path.splitext(os.path.basename(input_path))
+                if output_format:
+                    extension = "." + output_format.lower()
+                jobs.append(
+                    {
+                        "input": input_path,
+                        "output": os.path.join(output_dir, name + extension),
+                        "operations": spec.get("operations", []),
+                        "profile": spec.get("profile"),
+                        "intermediate": spec.get("intermediate"),
+                    }
+                )
+    return jobs
+
+
+def apply_operation(state, operation, temp_dir):
+    # state lleva el archivo actual y los segmentos de la última división,
+    # igual que el editor con current_video_path y cut_segments
+    op = operation["op"]
+    source = state["current"]
+    info = probe(source)
+    duration = duration_ms(info)
+    # Las copias conservan el contenedor; lo que se recodifica va al
+    # formato intermedio
+    intermediate = state["intermediate"]
+    if op in ("trim", "split", "join") or (op == "text" and "end" in operation):
+        extension = copy_extension(source)
+    else:
+        extension = intermediate_extension(intermediate) if intermediate else ".mp4"
+    output = os.path.join(temp_dir, f"{len(os.listdir(temp_dir))}{extension}")
+
+    if op == "trim":
+        start = operation.get("start", 0) * 1000
+        end = operation.get("end", duration / 1000) * 1000
+        if operation.get("smart"):
+            plan = core.smart_trim_plan(source, [(start, end, output)])
+        else:
+            plan = core.trim_plan(source, start, end, output)
+    elif op == "split":
+        part2 = os.path.join(temp_dir, f"{len(os.listdir(temp_dir))}b{extension}")
+        plan = core.split_plan(source, operation["at"] * 1000, duration, output, part2)
+    elif op == "join":
+        # Los segmentos con otro perfil se normalizan antes de unirlos
+        render = core.join_render(state["segments"] or [source], output)
+        finished = watch_stop(state["stop"], render.cancel) if state.get("stop") else None
+        try:
+            render.run()
+        finally:
+            if finished is not None:
+                finished.set()
+        state["segments"] = []
+        state["current"] = output
+        return
+    elif op == "audio":
+        audio_path = operation.get("path")
+        plan = core.audio_plan(
+            source,
+            output,
+            duration,
+            load_or_decode(audio_path) if audio_path else None,
+            operation.get("mute", False),
+            intermediate,
+            operation.get("offset", 0) * 1000,
+            audio_stream(info) is not None,
+        )
+    elif op == "text" and "end" in operation:
+        # Texto con intervalo: solo se recodifican los GOP que cubre
+        plan = core.text_region_plan(
+            source,
+            output,
+            duration,
+            operation.get("text", ""),
+            operation.get("start", 0) * 1000,
+            operation["end"] * 1000,
+            operation.get("position", 2),
+            operation.get("font_size", 24),
+            operation.get("color", "0xffffff"),
+            operation.get("opacity", 1.0),
+            state["profile"],
+        )
+    elif op == "text":
+        plan = core.text_overlay_plan(
+            source,
+            output,
+            duration,
+            operation.get("text", ""),
+            operation.get("position", 2),
+            operation.get("font_size", 24),
+            operation.get("color", "0xffffff"),
+            operation.get("opacity", 1.0),
+            state["profile"],
+            intermediate,
+        )
+    elif op == "technical":
+        plan = core.technical_plan(
+            source,
+            output,
+            duration,
+            core.parse_resolution(operation.get("resolution")),
+            core.parse_speed(operation.get("speed", 1.0)),
+            profile=state["profile"],
+            intermediate=intermediate,
+        )
+    elif op == "export":
+        output = os.path.join(
+            temp_dir, f"{len(os.listdir(temp_dir))}.{operation.get('format', 'mp4')}"
+        )
+        plan = core.export_plan(source, output, profile=state["profile"])
+    else:
+        raise ValueError(f"Operación desconocida: {op}")
+
+    if state.get("threads"):
+        # Hilos asignados por el planificador de la cola de renders
+        plan["commands"] = [
+            with_threads(command, state["threads"]) for command in plan["commands"]
+        ]
+    try:
+        outputs = core.run_plan(plan, state.get("stop"))
+    finally:
+        core.remove_temp_files(plan)
+
+    if op == "split":
+        state["segments"] = outputs
+    state["current"] = outputs[0]
+
+
+def run_job(job):
+    # Se ejecuta en un proceso hijo; los procesos del pool se reutilizan, así
+    # que el registro es solo de este trabajo
+    TELEMETRY.clear()
+    result = process_job(job)
+    result["telemetry"] = TELEMETRY.snapshot()
+    return result
+
+
+def process_job(job, stop_event=None):
+    # Devuelve un resumen en lugar de lanzar excepciones para que un fallo no
+    # detenga el resto del lote. La cola de renders del editor lo llama
+    # directamente en un hilo de trabajo, con stop_event para cancelarlo
+    started_at = time.monotonic()
+    result = {"input": job["input"], "output": job["output"], "ok": True, "error": ""}
+    temp_dir = tempfile.mkdtemp(prefix="editorvideo-")
+    try:
+        state = {
+            "current": job["input"],
+            "segments": [],
+            "profile": job.get("profile"),
+            "intermediate": job.get("intermediate"),
+            "threads": job.get("threads"),
+            "stop": stop_event,
+        }
+        for operation in job.get("operations", []):
+            if stop_event is not None and stop_event.is_set():
+                raise RuntimeError("Cancelado")
+            apply_operation(state, operation, temp_dir)
+
+        output_dir = os.path.dirname(os.path.abspath(job["output"]))
+        os.makedirs(output_dir, exist_ok=True)
+        current_extension = os.path.splitext(state["current"])[1].lower()
+        output_extension = os.path.splitext(job["output"])[1].lower()
+        if (
+            state["current"] == job["input"]
+            or current_extension != output_extension
+            or is_intermediate(probe(state["current"]))
+        ):
+            # Sin operaciones, con otro contenedor o en formato intermedio:
+            # convertir al formato final
+            plan = core.export_plan(state["current"], job["output"], profile=state["profile"])
+            if state["threads"]:
+                plan["commands"] = [
+                    with_threads(command, state["threads"]) for command in plan["commands"]
+                ]
+            try:
+                core.run_plan(plan, stop_event)
+            finally:
+                core.remove_temp_files(plan)
+        else:
+            shutil.move(state["current"], job["output"])
+    except Exception as e:
+        result["ok"] = False
+        result["error"] = str(e)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    result["seconds"] = time.monotonic() - started_at
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Procesa videos por lotes sin abrir el editor."
+    )
+    parser.add_argument("spec", help="archivo de trabajos (JSON o YAML)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="trabajos que se ejecutan a la vez",
+    )
+    parser.add_argument("--report", help="guardar el resumen en un archivo JSON")
+    parser.add_argument(
+        "--telemetry", help="guardar cada invocación de ffmpeg/ffprobe en un archivo JSON lines"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = expand_jobs(load_spec(args.spec))
+    except Exception as e:
+        print(f"Error al leer {args.spec}: {e}", file=sys.stderr)
+        return 2
+    if not jobs:
+        print("No hay trabajos que procesar.", file=sys.stderr)
+        return 2
+
+    started_at = time.monotonic()
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "OK" if result["ok"] else f"ERROR: {result['error']}"
+            print(f"[{result['seconds']:7.1f}s] {result['input']} -> {result['output']}: {status}")
+
+    failed = sum(1 for result in results if not result["ok"])
+    total = time.monotonic() - started_at
+    print(f"{len(results) - failed}/{len(results)} trabajos completados en {total:.1f}s")
+
+    records = [record for result in results for record in result.pop("telemetry", [])]
+    if args.telemetry:
+        TELEMETRY.export_jsonl(args.telemetry, records)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"seconds": total, "jobs": results}, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# Planificador para unir segmentos.
+#
+# Sondea todos los segmentos y elige como perfil común el que cubre más
+# duración. Los segmentos que ya coinciden con ese perfil (códec, resolución,
+# fps, base de tiempo y formato de audio) se concatenan sin recodificar; solo
+# los distintos se normalizan, en paralelo, antes de la concatenación final.
+# El plan tiene el mismo formato que plan_chunked_render para ejecutarlo con
+# ChunkedRender.
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from media_tools import FFMPEG, audio_stream, duration_ms, probe, video_stream
+from mezzanine import is_intermediate, tag_command
+from smart_cut import matching_video_args
+
+
+# Codificador para cada códec de audio de destino
+AUDIO_ENCODERS = {
+    "aac": "aac",
+    "mp3": "libmp3lame",
+    "opus": "libopus",
+    "vorbis": "libvorbis",
+    "ac3": "ac3",
+    "flac": "flac",
+    "pcm_s16le": "pcm_s16le",
+}
+
+
+def segment_profile(info):
+    # Parámetros que deben coincidir para poder concatenar con -c copy
+    video = video_stream(info) or {}
+    audio = audio_stream(info)
+    profile = (
+        video.get("codec_name"),
+        video.get("width"),
+        video.get("height"),
+        video.get("pix_fmt"),
+        video.get("r_frame_rate"),
+        video.get("sample_aspect_ratio", "1:1"),
+        video.get("time_base"),
+    )
+    if audio is None:
+        return profile + (None, None, None, None)
+    return profile + (
+        audio.get("codec_name"),
+        audio.get("sample_rate"),
+        audio.get("channels"),
+        audio.get("channel_layout"),
+    )
+
+
+def normalize_command(path, info, target, output_path):
+    # Recodifica un segmento al perfil de target (video escalado con bandas si
+    # cambia la proporción, mismo fps, formato de píxel y audio)
+    video = video_stream(target)
+    audio = audio_stream(target)
+    width, height = video["width"], video["height"]
+    sar = video.get("sample_aspect_ratio", "1:1")
+    if sar in ("0:1", "N/A"):
+        sar = "1:1"
+    filters = [
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        f"setsar={sar.replace(':', '/')}",
+        f"fps={video['r_frame_rate']}",
+    ]
+
+    command = [FFMPEG, "-y", "-v", "error", "-i", path]
+    seconds = duration_ms(info) / 1000.0
+    source_audio = audio_stream(info)
+    if audio is not None and source_audio is None:
+        # Rellenar con silencio para que todos los segmentos tengan audio
+        layout = audio.get("channel_layout") or "stereo"
+        command += ["-f", "lavfi", "-t", f"{seconds:.6f}"]
+        command += ["-i", f"anullsrc=r={audio['sample_rate']}:cl={layout}"]
+        command += ["-map", "0:v:0", "-map", "1:a:0"]
+    elif audio is not None:
+        command += ["-map", "0:v:0", "-map", "0:a:0"]
+    else:
+        command += ["-map", "0:v:0", "-an"]
+
+    command += ["-vf", ",".join(filters)] + matching_video_args(video)
+    if audio is not None:
+        command += ["-c:a", AUDIO_ENCODERS.get(audio["codec_name"], "aac")]
+        command += ["-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"])]
+        if audio.get("bit_rate"):
+            command += ["-b:a", audio["bit_rate"]]
+
+    time_base = video.get("time_base", "")
+    if output_path.lower().endswith((".mp4", ".mov")) and "/" in time_base:
+        # Misma escala de tiempo que los segmentos copiados
+        command += ["-video_track_timescale", time_base.split("/")[1]]
+    command += ["-shortest", output_path]
+    return command
+
+
+def plan_join(paths, output_path, workers=1, infos=None):
+    if infos is None:
+        # Sondear en paralelo: con cientos de clips ffprobe domina el tiempo
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            infos = list(executor.map(probe, paths))
+
+    # Perfil común: el que cubre más duración, para recodificar lo mínimo
+    durations = defaultdict(float)
+    for info in infos:
+        durations[segment_profile(info)] += duration_ms(info)
+    target_profile = max(durations, key=durations.get)
+    target = next(info for info in infos if segment_profile(info) == target_profile)
+    if video_stream(target) is None:
+        raise ValueError("Los segmentos no contienen video")
+
+    plan = {
+        "chunks": [],
+        "audio_command": None,
+        "final_command": None,
+        "temp_files": [],
+        "output": output_path,
+        # El progreso se mide sobre lo que hay que normalizar
+        "duration": 0.0,
+        "normalized": 0,
+    }
+
+    parts = []
+    for path, info in zip(paths, infos):
+        if segment_profile(info) == target_profile:
+            parts.append(path)
+            continue
+        part = tempfile.mktemp(suffix=os.path.splitext(output_path)[1] or ".mp4")
+        plan["temp_files"].append(part)
+        plan["chunks"].append(
+            {
+                "command": normalize_command(path, info, target, part),
+                "seconds": duration_ms(info) / 1000.0,
+            }
+        )
+        plan["normalized"] += 1
+        plan["duration"] += duration_ms(info) / 1000.0
+        parts.append(part)
+
+    concat_file = tempfile.mktemp(suffix=".txt")
+    plan["temp_files"].append(concat_file)
+    with open(concat_file, "w") as f:
+        for part in parts:
+            f.write(f"file '{part}'\n")
+
+    plan["final_command"] = [
+        FFMPEG,
+        "-y",
+        "-v",
+        "error",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        concat_file,
+        "-map",
+        "0",
+        "-c",
+        "copy",
+        output_path,
+    ]
+    if any(is_intermediate(info) for info in infos):
+        # El demuxer concat no conserva la etiqueta de archivo de trabajo
+        plan["final_command"] = tag_command(plan["final_command"])
+    return plan
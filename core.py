@@ -0,0 +1,324 @@
+# Operaciones de edición sin dependencias de Qt.
+#
+# Cada operación devuelve un "plan": la lista de comandos de ffmpeg que hay
+# que ejecutar en orden, la duración (ms) que procesa cada uno, los archivos
+# de salida y los temporales que se pueden borrar al terminar. La interfaz
+# ejecuta los planes con JobManager y la línea de comandos con run_plan.
+import os
+
+from audio_pipeline import audio_command
+from edit_graph import atempo_chain, drawtext_filter
+from concat_planner import plan_join
+from encoding_profiles import encode_commands, video_args
+from export_planner import plan_export
+from media_tools import FFMPEG, output_codecs, probe, run_command, video_stream
+from mezzanine import (
+    intermediate_audio_args,
+    intermediate_video_args,
+    is_intermediate,
+    tag_command,
+)
+from packet_index import PacketIndex
+from parallel_encode import ChunkedRender, plan_chunked_render
+from smart_cut import can_match, plan_region_encode, plan_smart_cut
+
+
+def new_plan(outputs=None):
+    return {"commands": [], "durations": [], "outputs": list(outputs or []), "temp_files": []}
+
+
+def add_encode(plan, command, output, duration_ms, profile=None):
+    # Agrega la codificación de video con el perfil (una o dos pasadas)
+    commands, temp_files = encode_commands(command, output, profile)
+    plan["commands"] += commands
+    plan["durations"] += [duration_ms] * len(commands)
+    plan["temp_files"] += temp_files
+
+
+def add_render(plan, command, output, duration_ms, profile=None, intermediate=None):
+    # Los archivos de trabajo se codifican en el formato intermedio; el perfil
+    # solo se usa con el formato heredado y al exportar
+    args = intermediate_video_args(intermediate)
+    if args is None:
+        add_encode(plan, command, output, duration_ms, profile)
+        return
+    plan["commands"].append(command + args + [output])
+    plan["durations"].append(duration_ms)
+
+
+def trim_plan(source, start_ms, end_ms, output):
+    plan = new_plan([output])
+    duration_sec = (end_ms - start_ms) / 1000.0
+    plan["commands"].append(
+        [FFMPEG, "-y", "-ss", str(start_ms / 1000.0), "-i", source]
+        + ["-t", str(duration_sec), "-c", "copy", output]
+    )
+    plan["durations"].append(end_ms - start_ms)
+    return plan
+
+
+def smart_trim_plan(source, ranges):
+    # ranges es una lista de (inicio_ms, fin_ms, salida); usa el índice de
+    # keyframes del archivo (se construye si no existe)
+    info = probe(source)
+    keyframes = PacketIndex.load_or_build(source).keyframe_times()
+    plans = [
+        plan_smart_cut(source, start, end, output, keyframes, info)
+        for start, end, output in ranges
+    ]
+    if is_intermediate(info):
+        # La concatenación final no conserva los metadatos del original
+        for plan in plans:
+            plan["commands"][-1] = tag_command(plan["commands"][-1])
+    return merge_plans(plans)
+
+
+def split_plan(source, split_ms, duration_ms, part1, part2):
+    plan = new_plan([part1, part2])
+    plan["commands"].append(
+        [FFMPEG, "-y", "-i", source, "-t", str(split_ms / 1000), "-c", "copy", part1]
+    )
+    plan["commands"].append(
+        [FFMPEG, "-y", "-ss", str(split_ms / 1000), "-i", source, "-c", "copy", part2]
+    )
+    plan["durations"] += [split_ms, duration_ms - split_ms]
+    return plan
+
+
+def join_render(paths, output, workers=1, label=""):
+    # Une los segmentos copiando los que comparten perfil y normalizando en
+    # paralelo solo los distintos; devuelve un ChunkedRender
+    def planner():
+        return plan_join(paths, output, workers)
+
+    return ChunkedRender(planner, workers, label)
+
+
+def audio_plan(
+    source,
+    output,
+    duration_ms,
+    audio_path=None,
+    mute_original=False,
+    intermediate=None,
+    offset_ms=0,
+    has_audio=True,
+):
+    # Una sola pasada que copia el video; audio_path debería ser la versión
+    # decodificada del audio nuevo (audio_pipeline.load_or_decode)
+    plan = new_plan([output])
+    plan["commands"].append(
+        audio_command(
+            source,
+            output,
+            duration_ms,
+            audio_path,
+            mute_original,
+            offset_ms,
+            has_audio,
+            intermediate_audio_args(intermediate),
+        )
+    )
+    plan["durations"].append(duration_ms)
+    return plan
+
+
+def text_overlay_plan(
+    source,
+    output,
+    duration_ms,
+    text,
+    position=2,
+    font_size=24,
+    color="0xffffff",
+    opacity=1.0,
+    profile=None,
+    intermediate=None,
+):
+    if not text:
+        raise ValueError("Introduce un texto para agregar.")
+    plan = new_plan([output])
+    text_filter = drawtext_filter(text, position, font_size, color, opacity)
+    command = [FFMPEG, "-y", "-i", source, "-vf", text_filter]
+    if intermediate_audio_args(intermediate) is not None:
+        # El texto solo cambia la imagen: el audio se copia
+        command += ["-c:a", "copy"]
+    else:
+        command += ["-c:a", output_codecs(output)["audio"]]
+    add_render(plan, command, output, duration_ms, profile, intermediate)
+    return plan
+
+
+def text_region_plan(
+    source,
+    output,
+    duration_ms,
+    text,
+    start_ms,
+    end_ms,
+    position=2,
+    font_size=24,
+    color="0xffffff",
+    opacity=1.0,
+    profile=None,
+):
+    # Texto limitado a [start_ms, end_ms): solo se recodifican los GOP que
+    # cubre y el resto se copia. Si el códec no se puede igualar se codifica
+    # el archivo entero (con el mismo contenedor que el original)
+    if not text:
+        raise ValueError("Introduce un texto para agregar.")
+    info = probe(source)
+
+    def text_filter(offset):
+        return drawtext_filter(
+            text,
+            position,
+            font_size,
+            color,
+            opacity,
+            start_ms / 1000.0 - offset,
+            end_ms / 1000.0 - offset,
+        )
+
+    if not can_match(video_stream(info)):
+        plan = new_plan([output])
+        command = [FFMPEG, "-y", "-i", source, "-vf", text_filter(0.0), "-c:a", "copy"]
+        add_encode(plan, command, output, duration_ms, profile)
+        return plan
+    keyframes = PacketIndex.load_or_build(source).keyframe_times()
+    return plan_region_encode(source, start_ms, end_ms, output, text_filter, keyframes, info)
+
+
+def technical_filters(resolution=None, speed=1.0):
+    # Filtros de video y audio para escalar y cambiar la velocidad
+    video_filters = []
+    audio_filters = []
+    if resolution:
+        width, height = resolution
+        video_filters.append(f"scale={width}:{height}")
+    if speed != 1.0:
+        video_filters.append(f"setpts={1 / speed}*PTS")
+        audio_filters.append(atempo_chain(speed))
+    return video_filters, audio_filters
+
+
+def technical_plan(
+    source,
+    output,
+    duration_ms,
+    resolution=None,
+    speed=1.0,
+    has_audio=True,
+    profile=None,
+    intermediate=None,
+):
+    plan = new_plan([output])
+    video_filters, audio_filters = technical_filters(resolution, speed)
+    command = [FFMPEG, "-y", "-i", source]
+    if video_filters:
+        command += ["-vf", ",".join(video_filters)]
+    if audio_filters and has_audio:
+        command += ["-af", ",".join(audio_filters)]
+    if has_audio:
+        command += intermediate_audio_args(intermediate) or [
+            "-c:a",
+            output_codecs(output)["audio"],
+        ]
+    # La duración de salida cambia con la velocidad
+    add_render(plan, command, output, duration_ms / speed, profile, intermediate)
+    return plan
+
+
+def chunked_render(
+    source,
+    output,
+    duration_ms,
+    workers,
+    resolution=None,
+    speed=1.0,
+    has_audio=True,
+    label="",
+    profile=None,
+    intermediate=None,
+):
+    # Versión paralela por fragmentos de technical_plan/export_plan; devuelve
+    # un ChunkedRender que se ejecuta con run() y se puede cancelar. Cada
+    # fragmento es de una sola pasada y los hilos se reparten entre procesos
+    video_filters, _ = technical_filters(resolution)
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    args = intermediate_video_args(intermediate, threads)
+    output_args = []
+    if args is None:
+        args = video_args(output_codecs(output)["video"], profile, threads)
+    else:
+        # La etiqueta va en la unión final, no en los fragmentos
+        output_args = args[-2:]
+        args = args[:-2]
+
+    def planner():
+        keyframes = PacketIndex.load_or_build(source).keyframe_times()
+        return plan_chunked_render(
+            source,
+            output,
+            duration_ms / 1000.0,
+            keyframes,
+            workers,
+            video_filters,
+            speed,
+            has_audio,
+            args,
+            intermediate_audio_args(intermediate),
+            output_args,
+        )
+
+    return ChunkedRender(planner, workers, label)
+
+
+def export_plan(source, output, info=None, profile=None):
+    # Copia las pistas que admite el formato de salida y recodifica el resto
+    # con el perfil; el plan indica el modo ("remux" o "transcode") y la
+    # acción por stream
+    return plan_export(source, output, info, profile)
+
+
+def parse_resolution(text):
+    # "1280x720" -> (1280, 720); "Original" o vacío -> None
+    if not text or text == "Original":
+        return None
+    width, height = map(int, str(text).lower().split("x"))
+    return width, height
+
+
+def parse_speed(text):
+    # "1.5x", "1.0x (normal)" o 1.5 -> 1.5
+    if isinstance(text, (int, float)):
+        return float(text)
+    return float(str(text).split("x")[0])
+
+
+def merge_plans(plans):
+    # Combina varios planes en uno solo para ejecutarlos en un único trabajo
+    merged = new_plan()
+    for plan in plans:
+        for key in merged:
+            merged[key] += plan[key]
+    return merged
+
+
+def run_plan(plan, stop_event=None):
+    # Ejecuta los comandos del plan en orden (bloqueante); stop_event permite
+    # interrumpirlo desde otro hilo
+    for command in plan["commands"]:
+        if stop_event is not None and stop_event.is_set():
+            raise RuntimeError("Cancelado")
+        run_command(command, stop_event=stop_event)
+    return plan["outputs"]
+
+
+def remove_temp_files(plan):
+    for temp_file in plan["temp_files"]:
+        try:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        except OSError:
+            pass
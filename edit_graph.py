@@ -0,0 +1,305 @@
+# Modelo de edición diferida.
+#
+# En lugar de renderizar un archivo intermedio por cada operación, las
+# ediciones se guardan como nodos y se compilan en un único filter_complex
+# de FFmpeg que decodifica y codifica el video una sola vez al exportar.
+#
+# Los tiempos de los nodos de corte (trim, split, remove_segment) están en
+# milisegundos sobre la línea de tiempo resultante de los nodos anteriores,
+# igual que los ve el usuario en la vista previa.
+
+# Posiciones del texto tal como las ofrece la pestaña "Texto"
+TEXT_POSITIONS = {
+    0: ("10", "10"),  # Superior
+    1: ("main_w/2-text_w/2", "main_h/2-text_h/2"),  # Centro
+    2: ("10", "main_h-text_h-10"),  # Inferior
+}
+
+CUT_NODES = ("trim", "split", "remove_segment")
+
+
+def drawtext_filter(text, position_index, font_size, color, opacity, start=None, end=None):
+    # color en formato 0xRRGGBB; start y end (segundos) limitan el texto a
+    # un intervalo
+    x, y = TEXT_POSITIONS.get(position_index, TEXT_POSITIONS[2])
+    text_filter = (
+        f"drawtext=text='{text}':fontsize={font_size}:fontcolor={color}@{opacity}:"
+        f"x={x}:y={y}:box=1:boxcolor=0x00000000@0.5"
+    )
+    if start is not None and end is not None:
+        text_filter += f":enable='between(t,{start:.6f},{end:.6f})'"
+    return text_filter
+
+
+def atempo_chain(speed):
+    # atempo solo acepta factores entre 0.5 y 2.0 en todas las versiones
+    filters = []
+    while speed < 0.5:
+        filters.append("atempo=0.5")
+        speed /= 0.5
+    while speed > 2.0:
+        filters.append("atempo=2.0")
+        speed /= 2.0
+    filters.append(f"atempo={speed:g}")
+    return ",".join(filters)
+
+
+def offset_filter(offset_ms):
+    # Desplaza un audio: positivo lo retrasa con silencio, negativo recorta
+    # su comienzo. None si no hay desplazamiento
+    if offset_ms > 0:
+        return f"adelay=delays={int(offset_ms)}:all=1"
+    if offset_ms < 0:
+        return f"atrim=start={-offset_ms / 1000.0},asetpts=PTS-STARTPTS"
+    return None
+
+
+def apply_cut(segments, node):
+    # Aplica un nodo de corte a una lista de rangos (inicio, fin) en ms
+    if node["type"] == "trim":
+        start, end = node["start"], node["end"]
+        result = []
+        offset = 0
+        for seg_start, seg_end in segments:
+            # Posición del segmento dentro de la línea de tiempo actual
+            length = seg_end - seg_start
+            lo = max(start, offset)
+            hi = min(end, offset + length)
+            if hi > lo:
+                result.append((seg_start + lo - offset, seg_start + hi - offset))
+            offset += length
+        return result
+
+    if node["type"] == "split":
+        result = []
+        offset = 0
+        for seg_start, seg_end in segments:
+            length = seg_end - seg_start
+            if offset < node["at"] < offset + length:
+                cut = seg_start + node["at"] - offset
+                result.extend([(seg_start, cut), (cut, seg_end)])
+            else:
+                result.append((seg_start, seg_end))
+            offset += length
+        return result
+
+    if node["type"] == "remove_segment":
+        index = segment_index_at(segments, node["at"])
+        return segments[:index] + segments[index + 1 :]
+
+    return segments
+
+
+def segment_index_at(segments, position):
+    offset = 0
+    for index, (seg_start, seg_end) in enumerate(segments):
+        offset += seg_end - seg_start
+        if position < offset:
+            return index
+    return len(segments) - 1
+
+
+def segments_duration(segments):
+    return sum(seg_end - seg_start for seg_start, seg_end in segments)
+
+
+class FilterGraphBuilder:
+    # Acumula las cadenas del filter_complex y genera etiquetas únicas
+    def __init__(self):
+        self.filters = []
+        self.counter = 0
+
+    def label(self, kind):
+        self.counter += 1
+        return f"[{kind}{self.counter}]"
+
+    def chain(self, source, filters, kind):
+        output = self.label(kind)
+        self.filters.append(f"{source}{filters}{output}")
+        return output
+
+    def add(self, text):
+        self.filters.append(text)
+
+    def filter_complex(self):
+        return ";".join(self.filters)
+
+
+class EditGraph:
+    def __init__(self, source_path, duration_ms, has_audio=True):
+        self.source_path = source_path
+        self.duration = duration_ms
+        self.has_audio = has_audio
+        self.nodes = []
+
+    def add(self, node):
+        self.nodes.append(dict(node))
+
+    def clear(self):
+        self.nodes = []
+
+    def is_empty(self):
+        return not self.nodes
+
+    def timeline(self):
+        # Reproduce los nodos para conocer los segmentos pendientes y la
+        # duración de la salida sin generar ningún filtro
+        duration = self.duration
+        segments = [(0, duration)]
+        for node in self.nodes:
+            if node["type"] in CUT_NODES:
+                segments = apply_cut(segments, node)
+                continue
+            duration = segments_duration(segments)
+            segments = [(0, duration)]
+            if node["type"] == "speed":
+                duration = duration / node["factor"]
+                segments = [(0, duration)]
+        return segments
+
+    def output_duration(self):
+        return segments_duration(self.timeline())
+
+    def segment_count(self):
+        return len(self.timeline())
+
+    def compile(self, output_path, output_args=None, preview_height=None):
+        builder = FilterGraphBuilder()
+        inputs = [self.source_path]
+        video = "[0:v]"
+        audio = "[0:a]" if self.has_audio else None
+        duration = self.duration
+        segments = [(0, duration)]
+
+        def materialize(video, audio, segments):
+            # Convierte los segmentos pendientes en trim + concat
+            if segments == [(0, duration)]:
+                return video, audio
+            count = len(segments)
+            if count == 0:
+                raise ValueError("No quedan segmentos en la línea de tiempo")
+
+            video_inputs = [video]
+            audio_inputs = [audio]
+            if count > 1:
+                video_inputs = [builder.label("vs") for _ in range(count)]
+                builder.add(f"{video}split={count}{''.join(video_inputs)}")
+                if audio:
+                    audio_inputs = [builder.label("as") for _ in range(count)]
+                    builder.add(f"{audio}asplit={count}{''.join(audio_inputs)}")
+
+            parts = []
+            for index, (seg_start, seg_end) in enumerate(segments):
+                start_sec = seg_start / 1000.0
+                end_sec = seg_end / 1000.0
+                parts.append(
+                    builder.chain(
+                        video_inputs[index],
+                        f"trim=start={start_sec}:end={end_sec},setpts=PTS-STARTPTS",
+                        "vt",
+                    )
+                )
+                if audio:
+                    parts.append(
+                        builder.chain(
+                            audio_inputs[index],
+                            f"atrim=start={start_sec}:end={end_sec},asetpts=PTS-STARTPTS",
+                            "at",
+                        )
+                    )
+
+            if count == 1:
+                return parts[0], (parts[1] if audio else None)
+
+            video_out = builder.label("vc")
+            audio_out = builder.label("ac") if audio else None
+            streams = "".join(parts)
+            outputs = video_out + (audio_out or "")
+            builder.add(
+                f"{streams}concat=n={count}:v=1:a={1 if audio else 0}{outputs}"
+            )
+            return video_out, audio_out
+
+        for node in self.nodes:
+            kind = node["type"]
+            if kind in CUT_NODES:
+                segments = apply_cut(segments, node)
+                continue
+
+            video, audio = materialize(video, audio, segments)
+            duration = segments_duration(segments)
+            segments = [(0, duration)]
+
+            if kind == "text":
+                # Intervalo opcional del texto, en ms como los cortes
+                start = node["start"] / 1000.0 if node.get("end") else None
+                end = node["end"] / 1000.0 if node.get("end") else None
+                video = builder.chain(
+                    video,
+                    drawtext_filter(
+                        node["text"],
+                        node["position"],
+                        node["font_size"],
+                        node["color"],
+                        node["opacity"],
+                        start,
+                        end,
+                    ),
+                    "v",
+                )
+            elif kind == "scale":
+                video = builder.chain(
+                    video, f"scale={node['width']}:{node['height']}", "v"
+                )
+            elif kind == "speed":
+                factor = node["factor"]
+                video = builder.chain(video, f"setpts=PTS/{factor:g}", "v")
+                if audio:
+                    audio = builder.chain(audio, atempo_chain(factor), "a")
+                duration = duration / factor
+                segments = [(0, duration)]
+            elif kind == "audio":
+                audio = self.compile_audio(builder, inputs, node, audio, duration)
+
+        video, audio = materialize(video, audio, segments)
+
+        if preview_height:
+            video = builder.chain(video, f"scale=-2:{preview_height}", "v")
+
+        command = ["ffmpeg", "-y"]
+        for path in inputs:
+            command += ["-i", path]
+        if builder.filters:
+            command += ["-filter_complex", builder.filter_complex()]
+        command += ["-map", self.map_label(video)]
+        if audio:
+            command += ["-map", self.map_label(audio)]
+        command += list(output_args or [])
+        command.append(output_path)
+        return command
+
+    def compile_audio(self, builder, inputs, node, audio, duration):
+        mode = node["mode"]
+        if mode == "mute":
+            return None
+
+        inputs.append(node["path"])
+        new_audio = f"[{len(inputs) - 1}:a]"
+        offset = offset_filter(node.get("offset", 0))
+        if offset:
+            new_audio = builder.chain(new_audio, offset, "a")
+        # Limitar el audio nuevo a la duración actual del video
+        new_audio = builder.chain(
+            new_audio, f"atrim=end={duration / 1000.0},asetpts=PTS-STARTPTS", "a"
+        )
+        if mode == "mix" and audio:
+            output = builder.label("a")
+            builder.add(f"{audio}{new_audio}amix=inputs=2:duration=first{output}")
+            return output
+        return new_audio
+
+    def map_label(self, label):
+        # Las entradas sin filtrar se mapean sin corchetes ("0:v")
+        if label.startswith("[") and label[1].isdigit():
+            return label[1:-1]
+        return label
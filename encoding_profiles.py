@@ -0,0 +1,199 @@
+# Perfiles de codificación y calibración local.
+#
+# Cada perfil (borrador, equilibrado, archivo) fija para x264, x265, VP9 y
+# MPEG-4 el preset, la calidad constante y si se usa doble pasada. La doble
+# pasada solo se activa donde mejora el resultado en modo de calidad
+# constante (VP9); en x264/x265 con CRF no aporta nada.
+#
+# La calibración codifica un fragmento corto del video actual con cada
+# perfil en esta máquina, mide fps, bitrate y SSIM frente al original, y
+# sugiere el perfil más rápido que cumple el objetivo de calidad o tamaño.
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+from media_tools import (
+    FFMPEG,
+    cache_dir,
+    duration_ms,
+    output_codecs,
+    parse_rate,
+    probe,
+    run_command,
+    video_stream,
+)
+from telemetry import CommandRecord, parse_speed
+
+
+PROFILE_NAMES = ["draft", "balanced", "archive"]
+PROFILE_LABELS = {"draft": "Borrador", "balanced": "Equilibrado", "archive": "Archivo"}
+DEFAULT_PROFILE = "balanced"
+
+# Opciones de cada codificador por perfil; "two_pass" indica doble pasada
+ENCODER_PROFILES = {
+    "libx264": {
+        "draft": {"args": ["-preset:v", "ultrafast", "-crf:v", "28"]},
+        "balanced": {"args": ["-preset:v", "medium", "-crf:v", "21"]},
+        "archive": {"args": ["-preset:v", "slow", "-crf:v", "17"]},
+    },
+    "libx265": {
+        "draft": {"args": ["-preset:v", "ultrafast", "-crf:v", "30"]},
+        "balanced": {"args": ["-preset:v", "medium", "-crf:v", "26"]},
+        "archive": {"args": ["-preset:v", "slow", "-crf:v", "22"]},
+    },
+    "libvpx-vp9": {
+        "draft": {
+            "args": ["-deadline:v", "realtime", "-cpu-used:v", "8", "-crf:v", "38"]
+            + ["-b:v", "0", "-row-mt:v", "1"],
+        },
+        "balanced": {
+            "args": ["-deadline:v", "good", "-cpu-used:v", "4", "-crf:v", "32"]
+            + ["-b:v", "0", "-row-mt:v", "1"],
+            "two_pass": True,
+        },
+        "archive": {
+            "args": ["-deadline:v", "good", "-cpu-used:v", "1", "-crf:v", "28"]
+            + ["-b:v", "0", "-row-mt:v", "1"],
+            "two_pass": True,
+        },
+    },
+    "mpeg4": {
+        "draft": {"args": ["-q:v", "8"]},
+        "balanced": {"args": ["-q:v", "4"]},
+        "archive": {"args": ["-q:v", "2"]},
+    },
+}
+
+# Duración del fragmento de calibración (segundos)
+SAMPLE_SECONDS = 8.0
+DEFAULT_MIN_SSIM = 0.95
+
+
+def encoder_profile(encoder, profile):
+    return ENCODER_PROFILES.get(encoder, {}).get(profile or DEFAULT_PROFILE, {})
+
+
+def video_args(encoder, profile=None, threads=0):
+    # threads=0 deja que el codificador use todos los núcleos; en la
+    # codificación por fragmentos se reparte entre los trabajadores
+    args = ["-c:v", encoder] + list(encoder_profile(encoder, profile).get("args", []))
+    return args + ["-threads", str(threads)]
+
+
+def is_two_pass(encoder, profile):
+    return bool(encoder_profile(encoder, profile).get("two_pass"))
+
+
+def encode_commands(command, output_path, profile=None, threads=0):
+    # command es un comando de ffmpeg sin opciones de video ni salida.
+    # Devuelve los comandos (uno o dos si hay doble pasada) y los archivos
+    # temporales del registro de la primera pasada
+    encoder = output_codecs(output_path)["video"]
+    args = video_args(encoder, profile, threads)
+    if not is_two_pass(encoder, profile):
+        return [command + args + [output_path]], []
+    passlog = tempfile.mktemp(prefix="ffmpeg2pass-")
+    first = command + args + ["-pass:v", "1", "-passlogfile:v", passlog, "-an"]
+    first += ["-f", "null", os.devnull]
+    second = command + args + ["-pass:v", "2", "-passlogfile:v", passlog, output_path]
+    return [first, second], [passlog + "-0.log", passlog + "-0.log.mbtree"]
+
+
+def measure_ssim(encoded_path, source_path, start, seconds):
+    # SSIM medio del fragmento codificado frente al mismo tramo del original
+    command = [FFMPEG, "-i", encoded_path, "-ss", f"{start:.6f}", "-t", f"{seconds:.6f}"]
+    command += ["-i", source_path, "-lavfi", "[0:v][1:v]ssim", "-f", "null", "-"]
+    record = CommandRecord(command, "Calibración (SSIM)")
+    result = subprocess.run(command, capture_output=True)
+    output = result.stderr.decode("utf-8", "replace")
+    record.finish(result.returncode, speed=parse_speed(output), error=output)
+    match = re.search(r"All:([0-9.]+)", output)
+    return float(match.group(1)) if match else 0.0
+
+
+def calibrate(path, output_format="mp4", profiles=None, progress=None):
+    # Se ejecuta en un hilo de trabajo; devuelve un resultado por perfil con
+    # fps de codificación, bitrate y SSIM
+    info = probe(path)
+    stream = video_stream(info)
+    if stream is None:
+        raise ValueError("El archivo no contiene video")
+    total = duration_ms(info) / 1000.0
+    seconds = min(SAMPLE_SECONDS, total)
+    # Fragmento del centro: el inicio suele ser poco representativo
+    start = max(0.0, total / 2 - seconds / 2)
+    frames = seconds * parse_rate(stream.get("r_frame_rate"), 25.0)
+    encoder = output_codecs(f"sample.{output_format}")["video"]
+
+    profiles = profiles or PROFILE_NAMES
+    results = []
+    for step, profile in enumerate(profiles):
+        if progress is not None:
+            progress({"step": step, "steps": len(profiles), "profile": profile})
+        sample = tempfile.mktemp(suffix=f".{output_format}")
+        command = [FFMPEG, "-y", "-v", "error", "-ss", f"{start:.6f}"]
+        command += ["-t", f"{seconds:.6f}", "-i", path, "-map", "0:v:0", "-an"]
+        commands, temp_files = encode_commands(command, sample, profile)
+        try:
+            started_at = time.monotonic()
+            for encode in commands:
+                run_command(encode, f"Calibración ({profile})")
+            elapsed = time.monotonic() - started_at
+            size = os.path.getsize(sample)
+            results.append(
+                {
+                    "profile": profile,
+                    "encoder": encoder,
+                    "fps": frames / elapsed if elapsed > 0 else 0.0,
+                    "seconds": elapsed,
+                    "bitrate": size * 8 / seconds if seconds > 0 else 0.0,
+                    "ssim": measure_ssim(sample, path, start, seconds),
+                }
+            )
+        finally:
+            for temp_file in [sample] + temp_files:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+
+    save_calibration(encoder, results)
+    return results
+
+
+def suggest_profile(results, min_ssim=None, max_bytes=None, duration=0.0):
+    # El perfil más rápido que cumple los objetivos; max_bytes es el tamaño
+    # máximo del video completo de duration segundos
+    def meets(result):
+        if min_ssim is not None and result["ssim"] < min_ssim:
+            return False
+        if max_bytes and result["bitrate"] * duration / 8 > max_bytes:
+            return False
+        return True
+
+    candidates = [result for result in results if meets(result)]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda result: result["fps"])["profile"]
+
+
+def calibration_path():
+    return os.path.join(cache_dir("calibration"), "profiles.json")
+
+
+def load_calibration():
+    try:
+        with open(calibration_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_calibration(encoder, results):
+    # Se guarda la última medición por codificador, con la fecha y los
+    # núcleos de la máquina en que se midió
+    data = load_calibration()
+    data[encoder] = {"time": time.time(), "cpus": os.cpu_count(), "results": results}
+    with open(calibration_path(), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,192 @@
+# Planificador de exportación.
+#
+# Compara los streams del archivo con lo que admite el contenedor de destino
+# y copia sin recodificar todas las pistas que se pueden copiar; solo se
+# transcodifican las que el contenedor no acepta. Si todas se copian la
+# exportación es un remux, limitado solo por la velocidad del disco. Los
+# archivos en formato intermedio se recodifican siempre al formato de entrega.
+import os
+import tempfile
+
+from encoding_profiles import encoder_profile, is_two_pass
+from media_tools import FFMPEG, OUTPUT_CODECS, duration_ms, parse_rate, probe
+from mezzanine import INTERMEDIATE_TAG, is_intermediate
+
+
+# Códecs (nombres de ffprobe) que admite cada contenedor; None = cualquiera
+CONTAINER_CODECS = {
+    "mp4": {
+        "video": {"h264", "hevc", "mpeg4", "av1", "vp9", "mpeg2video", "mjpeg"},
+        "audio": {"aac", "mp3", "ac3", "eac3", "opus", "flac", "alac"},
+        "subtitle": {"mov_text"},
+    },
+    "mov": {
+        "video": {"h264", "hevc", "mpeg4", "prores", "mjpeg", "mpeg2video", "dnxhd"},
+        "audio": {"aac", "mp3", "alac", "ac3", "pcm_s16le", "pcm_s24le"},
+        "subtitle": {"mov_text"},
+    },
+    "mkv": {
+        "video": None,
+        "audio": None,
+        "subtitle": {"subrip", "ass", "ssa", "webvtt", "hdmv_pgs_subtitle", "dvd_subtitle"},
+    },
+    "avi": {
+        "video": {"mpeg4", "h264", "mjpeg", "msmpeg4v3", "mpeg2video"},
+        "audio": {"mp3", "ac3", "pcm_s16le"},
+        "subtitle": set(),
+    },
+    "webm": {
+        "video": {"vp8", "vp9", "av1"},
+        "audio": {"opus", "vorbis"},
+        "subtitle": {"webvtt"},
+    },
+}
+
+# Subtítulos de texto: se pueden convertir entre formatos sin pérdida
+TEXT_SUBTITLES = {"subrip", "ass", "ssa", "mov_text", "webvtt", "text"}
+SUBTITLE_ENCODERS = {"mp4": "mov_text", "mov": "mov_text", "mkv": "srt", "webm": "webvtt"}
+
+# Velocidades aproximadas para estimar la duración de la exportación
+REMUX_BYTES_PER_SECOND = 150 * 1024 * 1024
+ENCODE_PIXELS_PER_SECOND = {
+    "libx264": 120e6,
+    "libx265": 30e6,
+    "libvpx-vp9": 20e6,
+    "mpeg4": 400e6,
+}
+DEFAULT_PIXELS_PER_SECOND = 60e6
+# Segundos de audio que se codifican por segundo
+AUDIO_ENCODE_SPEED = 200.0
+
+
+def container_of(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return extension if extension in CONTAINER_CODECS else "mp4"
+
+
+def stream_action(stream, container, intermediate=False):
+    # Devuelve "copy", el codificador que hay que usar o None para descartar
+    kind = stream.get("codec_type")
+    codec = stream.get("codec_name")
+    allowed = CONTAINER_CODECS[container].get(kind, set())
+    if kind == "video" and stream.get("disposition", {}).get("attached_pic"):
+        # Las carátulas solo se conservan si se pueden copiar
+        return "copy" if allowed is None or codec in allowed else None
+    if kind in ("video", "audio"):
+        if intermediate:
+            return OUTPUT_CODECS[container][kind]
+        if allowed is None or codec in allowed:
+            return "copy"
+        return OUTPUT_CODECS[container][kind]
+    if kind == "subtitle":
+        if codec in allowed:
+            return "copy"
+        if codec in TEXT_SUBTITLES and container in SUBTITLE_ENCODERS:
+            return SUBTITLE_ENCODERS[container]
+    # Streams de datos, adjuntos y subtítulos incompatibles
+    return None
+
+
+def plan_export(path, output_path, info=None, profile=None):
+    info = info or probe(path)
+    container = container_of(output_path)
+    streams = []
+    command = [FFMPEG, "-y", "-i", path]
+    # Codificador de video con doble pasada según el perfil, si lo hay
+    two_pass = None
+    intermediate = is_intermediate(info)
+    for stream in info["streams"]:
+        action = stream_action(stream, container, intermediate)
+        streams.append(
+            {
+                "index": stream["index"],
+                "type": stream.get("codec_type"),
+                "codec": stream.get("codec_name"),
+                "action": action,
+            }
+        )
+        if action is None:
+            continue
+        output_index = sum(1 for s in streams[:-1] if s["action"] is not None)
+        command += ["-map", f"0:{stream['index']}"]
+        command += [f"-c:{output_index}", action]
+        if stream.get("codec_type") == "video" and action != "copy":
+            command += encoder_profile(action, profile).get("args", [])
+            if is_two_pass(action, profile):
+                two_pass = (stream["index"], action)
+        if action == "copy" and stream.get("codec_name") == "hevc" and container in ("mp4", "mov"):
+            # Etiqueta que necesitan los reproductores de Apple para HEVC
+            command += [f"-tag:{output_index}", "hvc1"]
+
+    if intermediate:
+        # La etiqueta de archivo de trabajo no pasa al archivo exportado
+        command += ["-metadata", f"{INTERMEDIATE_TAG}="]
+    if container in ("mp4", "mov"):
+        command += ["-movflags", "+faststart"]
+
+    commands = [command]
+    temp_files = []
+    if two_pass is not None:
+        # Primera pasada solo con el video; la segunda es el comando completo
+        index, encoder = two_pass
+        passlog = tempfile.mktemp(prefix="ffmpeg2pass-")
+        first = [FFMPEG, "-y", "-i", path, "-map", f"0:{index}", "-c:v", encoder]
+        first += encoder_profile(encoder, profile).get("args", [])
+        first += ["-pass:v", "1", "-passlogfile:v", passlog, "-an", "-f", "null", os.devnull]
+        command += ["-pass:v", "2", "-passlogfile:v", passlog]
+        commands.insert(0, first)
+        temp_files = [passlog + "-0.log", passlog + "-0.log.mbtree"]
+    command.append(output_path)
+
+    # Convertir subtítulos de texto no cuesta nada; el modo depende solo de
+    # si hay que recodificar video o audio
+    media = [s for s in streams if s["action"] is not None and s["type"] in ("video", "audio")]
+    mode = "remux" if all(s["action"] == "copy" for s in media) else "transcode"
+    return {
+        "commands": commands,
+        "durations": [duration_ms(info)] * len(commands),
+        "outputs": [output_path],
+        "temp_files": temp_files,
+        "mode": mode,
+        "profile": profile,
+        "streams": streams,
+        "info": info,
+    }
+
+
+def estimate_seconds(plan, workers=1):
+    # Estimación aproximada: el remux depende del tamaño del archivo y la
+    # transcodificación de los píxeles por segundo del codificador
+    info = plan["info"]
+    seconds = duration_ms(info) / 1000.0
+    size = int(info["format"].get("size", 0) or 0)
+    estimate = size / REMUX_BYTES_PER_SECOND
+    streams = {stream["index"]: stream for stream in info["streams"]}
+    for entry in plan["streams"]:
+        if entry["action"] in (None, "copy"):
+            continue
+        stream = streams[entry["index"]]
+        if entry["type"] == "video":
+            fps = parse_rate(stream.get("avg_frame_rate"), 25.0)
+            pixels = int(stream.get("width", 0)) * int(stream.get("height", 0)) * fps * seconds
+            speed = ENCODE_PIXELS_PER_SECOND.get(entry["action"], DEFAULT_PIXELS_PER_SECOND)
+            if is_two_pass(entry["action"], plan.get("profile")):
+                pixels *= 2
+            estimate += pixels / speed / max(1, workers)
+        elif entry["type"] == "audio":
+            estimate += seconds / AUDIO_ENCODE_SPEED
+    return estimate
+
+
+def describe_plan(plan):
+    # Texto para mostrar al usuario antes de exportar
+    lines = []
+    for entry in plan["streams"]:
+        name = f"{entry['type']} #{entry['index']} ({entry['codec']})"
+        if entry["action"] == "copy":
+            lines.append(f"{name}: copiar")
+        elif entry["action"] is None:
+            lines.append(f"{name}: se descarta (el formato no lo admite)")
+        else:
+            lines.append(f"{name}: recodificar con {entry['action']}")
+    return lines
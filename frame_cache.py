@@ -0,0 +1,116 @@
+# Caché LRU de frames con presupuesto de memoria.
+#
+# Los frames se identifican por su número (no por la posición exacta en ms),
+# de modo que dos posiciones dentro del mismo frame comparten la entrada. Hay
+# niveles separados para frames a tamaño completo y miniaturas, cada uno con
+# su propio presupuesto en bytes y contadores de aciertos, fallos y desalojos.
+from collections import OrderedDict
+
+
+FULL_TIER = "full"
+THUMBNAIL_TIER = "thumbnail"
+
+DEFAULT_BUDGETS = {
+    FULL_TIER: 256 * 1024 * 1024,
+    THUMBNAIL_TIER: 64 * 1024 * 1024,
+}
+
+
+def frame_index(position_ms, fps):
+    # Frame visible en la posición indicada; el pequeño margen evita que
+    # los errores de redondeo manden una posición al frame anterior
+    return int(position_ms * fps / 1000.0 + 1e-6)
+
+
+def frame_time_ms(index, fps):
+    return index * 1000.0 / fps
+
+
+def image_bytes(image):
+    # Tamaño aproximado en memoria de un QImage o QPixmap
+    if hasattr(image, "sizeInBytes"):
+        return image.sizeInBytes()
+    if hasattr(image, "byteCount"):
+        return image.byteCount()
+    return image.width() * image.height() * max(1, image.depth()) // 8
+
+
+class CacheTier:
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, size):
+        if key in self.entries:
+            self.used -= self.entries.pop(key)[1]
+        # Un frame más grande que el presupuesto no se guarda
+        if size > self.budget:
+            return
+        self.entries[key] = (value, size)
+        self.used += size
+        while self.used > self.budget:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.used -= evicted_size
+            self.evictions += 1
+
+    def set_budget(self, budget):
+        self.budget = budget
+        while self.used > self.budget and self.entries:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.used -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.used,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class FrameCache:
+    def __init__(self, budgets=None):
+        budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+        self.tiers = {name: CacheTier(budget) for name, budget in budgets.items()}
+
+    def get(self, tier, source, index):
+        return self.tiers[tier].get((source, index))
+
+    def put(self, tier, source, index, image):
+        self.tiers[tier].put((source, index), image, image_bytes(image))
+
+    def set_budget(self, tier, budget):
+        self.tiers[tier].set_budget(budget)
+
+    def clear(self, source=None):
+        for tier in self.tiers.values():
+            if source is None:
+                tier.clear()
+                continue
+            for key in [k for k in tier.entries if k[0] == source]:
+                tier.used -= tier.entries.pop(key)[1]
+
+    def stats(self):
+        return {name: tier.stats() for name, tier in self.tiers.items()}
@@ -0,0 +1,134 @@
+# Decodificador de frames con un proceso de ffmpeg persistente.
+#
+# En lugar de lanzar un ffmpeg por frame (y pasar por un JPEG en disco), se
+# mantiene un único proceso por archivo que envía frames rawvideo RGB24 por
+# una tubería al tamaño pedido. Las peticiones secuenciales o cercanas se
+# sirven decodificando hacia delante; solo un salto grande o hacia atrás
+# reinicia el proceso en la nueva posición.
+import subprocess
+
+from PyQt5.QtGui import QImage
+
+from media_tools import FFMPEG, parse_rate, probe, video_stream
+from telemetry import CommandRecord, wait_process
+
+
+# Distancia máxima (en segundos) que se decodifica hacia delante antes de
+# preferir reiniciar el proceso con una búsqueda
+FORWARD_WINDOW = 2.0
+
+
+def even(value):
+    return max(2, int(value) // 2 * 2)
+
+
+class PipeFrameDecoder:
+    def __init__(self, video_path, size=None, forward_window=FORWARD_WINDOW):
+        self.video_path = video_path
+        self.forward_window = forward_window
+
+        stream = video_stream(probe(video_path))
+        if stream is None:
+            raise ValueError("El archivo no contiene video")
+        self.fps = parse_rate(stream.get("r_frame_rate"), 25.0)
+        source_width = int(stream.get("width", 0))
+        source_height = int(stream.get("height", 0))
+        self.width, self.height = self.output_size(source_width, source_height, size)
+        self.frame_size = self.width * self.height * 3
+
+        self.process = None
+        self.start_time = 0.0
+        self.frames_read = 0
+        self.last_image = None
+
+    def output_size(self, source_width, source_height, size):
+        # size puede ser None (tamaño original), (ancho, alto) o (ancho, None)
+        if not size:
+            return even(source_width), even(source_height)
+        width, height = size
+        if not height:
+            height = width * source_height / max(1, source_width)
+        return even(width), even(height)
+
+    def frame_index(self, seconds):
+        return int(round((seconds - self.start_time) * self.fps))
+
+    def start(self, seconds):
+        self.close()
+        self.start_time = max(0.0, seconds)
+        self.frames_read = 0
+        self.last_image = None
+        # El filtro fps garantiza un frame por intervalo, de modo que el
+        # número de frames leídos indica exactamente la posición
+        command = [
+            FFMPEG,
+            "-v",
+            "error",
+            "-ss",
+            f"{self.start_time:.6f}",
+            "-i",
+            self.video_path,
+            "-an",
+            "-vf",
+            f"fps={self.fps},scale={self.width}:{self.height}",
+            "-f",
+            "rawvideo",
+            "-pix_fmt",
+            "rgb24",
+            "pipe:1",
+        ]
+        # El registro se cierra al terminar el proceso (normalmente matado
+        # por una búsqueda nueva o al cerrar)
+        self.record = CommandRecord(command, "Decodificador de frames")
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=self.frame_size,
+        )
+
+    def read_frame(self):
+        data = self.process.stdout.read(self.frame_size)
+        if len(data) < self.frame_size:
+            return None
+        self.frames_read += 1
+        # QImage usa directamente el buffer (sin copiar) y mantiene la
+        # referencia mientras la imagen exista
+        self.last_image = QImage(
+            data, self.width, self.height, self.width * 3, QImage.Format_RGB888
+        )
+        return self.last_image
+
+    def skip_frames(self, count):
+        # Descartar frames sin construir imágenes
+        for _ in range(count):
+            if len(self.process.stdout.read(self.frame_size)) < self.frame_size:
+                return False
+            self.frames_read += 1
+        return True
+
+    def frame_at(self, position_ms):
+        seconds = position_ms / 1000.0
+        if self.process is not None:
+            target = self.frame_index(seconds)
+            # El frame pedido es el último que se entregó
+            if target == self.frames_read - 1 and self.last_image is not None:
+                return self.last_image
+            ahead = target - self.frames_read
+            if 0 <= ahead <= self.forward_window * self.fps:
+                if self.skip_frames(ahead):
+                    image = self.read_frame()
+                    if image is not None:
+                        return image
+
+        # Salto hacia atrás, demasiado lejos o fin del stream: buscar de nuevo
+        self.start(seconds)
+        return self.read_frame()
+
+    def close(self):
+        if self.process is not None:
+            self.process.kill()
+            self.process.stdout.close()
+            returncode, peak = wait_process(self.process)
+            self.record.finish(returncode, peak)
+            self.process = None
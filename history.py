@@ -0,0 +1,84 @@
+# Historial de deshacer/rehacer.
+#
+# Cada paso guarda el estado del editor después de una operación (video
+# actual y segmentos) más la receta para volver a generarlo: la operación, sus
+# parámetros y sus entradas. Los archivos son los resultados ya renderizados,
+# así que moverse por el historial solo cambia el video cargado. Solo los
+# renders de los pasos más recientes quedan protegidos en la caché; si un paso
+# antiguo perdió sus archivos se vuelve a generar con su receta.
+import os
+
+
+# Pasos recientes cuyos renders no se pueden desalojar de la caché
+DEFAULT_KEEP_RENDERS = 5
+# Cantidad máxima de pasos (los registros son pequeños; los archivos no)
+MAX_STEPS = 200
+
+
+def state_files(state):
+    paths = [segment["path"] for segment in state["segments"]]
+    if state["current"] and state["current"] not in paths:
+        paths.append(state["current"])
+    return paths
+
+
+class EditHistory:
+    def __init__(self, keep_renders=DEFAULT_KEEP_RENDERS, max_steps=MAX_STEPS):
+        self.keep_renders = keep_renders
+        self.max_steps = max_steps
+        # Lista de {"description", "state", "recipe"}; position es el paso
+        # que está cargado en el editor
+        self.steps = []
+        self.position = -1
+
+    def reset(self, description, state):
+        self.steps = [{"description": description, "state": state, "recipe": None}]
+        self.position = 0
+
+    def push(self, description, state, recipe=None):
+        # Una operación nueva descarta los pasos que se podían rehacer
+        del self.steps[self.position + 1 :]
+        self.steps.append({"description": description, "state": state, "recipe": recipe})
+        if len(self.steps) > self.max_steps:
+            del self.steps[0]
+        self.position = len(self.steps) - 1
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return 0 <= self.position < len(self.steps) - 1
+
+    def undo(self):
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        return self.steps[self.position]
+
+    def redo(self):
+        if not self.can_redo():
+            return None
+        self.position += 1
+        return self.steps[self.position]
+
+    def undo_description(self):
+        return self.steps[self.position]["description"] if self.can_undo() else ""
+
+    def redo_description(self):
+        return self.steps[self.position + 1]["description"] if self.can_redo() else ""
+
+    def missing_files(self, index):
+        return [
+            path for path in state_files(self.steps[index]["state"]) if not os.path.exists(path)
+        ]
+
+    def pinned_files(self):
+        # Archivos del paso actual y de los keep_renders pasos más cercanos
+        # a él; el resto puede desalojarse y se regenera si hace falta
+        if not self.steps:
+            return []
+        order = sorted(range(len(self.steps)), key=lambda i: abs(i - self.position))
+        paths = []
+        for index in order[: self.keep_renders + 1]:
+            paths += state_files(self.steps[index]["state"])
+        return paths
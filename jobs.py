@@ -0,0 +1,329 @@
+# Ejecución de trabajos de FFmpeg fuera del hilo de la interfaz.
+#
+# Los comandos de FFmpeg se lanzan con QProcess (asíncrono, sin bloquear el
+# bucle de eventos de Qt) y el trabajo en Python puro (sondeos, planificación)
+# se ejecuta en el QThreadPool global. Los resultados vuelven al hilo de la
+# interfaz siempre mediante señales.
+import time
+import traceback
+from collections import deque
+
+from PyQt5.QtCore import QObject, QProcess, QRunnable, QThreadPool, pyqtSignal
+
+from telemetry import CommandRecord, process_peak_kb
+
+
+# Cantidad máxima de salida de error que se conserva para los mensajes de fallo
+STDERR_TAIL_BYTES = 4096
+
+
+def add_progress_args(command):
+    # Pedir a ffmpeg que informe su progreso por stdout en formato clave=valor
+    if command and command[0].endswith("ffmpeg") and "-progress" not in command:
+        return [command[0], "-progress", "pipe:1", "-nostats"] + list(command[1:])
+    return list(command)
+
+
+def parse_speed(value):
+    # ffmpeg informa la velocidad como "1.53x" o "N/A"
+    try:
+        return float(value.strip().rstrip("x"))
+    except (ValueError, AttributeError):
+        return 0.0
+
+
+def parse_out_time_ms(block):
+    # out_time_ms en realidad está en microsegundos (error histórico de ffmpeg)
+    for key in ("out_time_us", "out_time_ms"):
+        value = block.get(key)
+        if value and value != "N/A":
+            try:
+                return int(value) / 1000.0
+            except ValueError:
+                pass
+    return 0.0
+
+
+def format_eta(seconds):
+    seconds = max(0, int(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+class FFmpegJob(QObject):
+    # Señales emitidas en el hilo de la interfaz
+    progress = pyqtSignal(dict)
+    succeeded = pyqtSignal()
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    done = pyqtSignal()
+
+    def __init__(self, commands, durations=None, label="", parent=None):
+        super().__init__(parent)
+        # commands es una lista de comandos (listas de argumentos) que se
+        # ejecutan en orden; durations indica la duración en ms que procesa
+        # cada uno para poder calcular el porcentaje y el tiempo restante
+        self.commands = [add_progress_args(command) for command in commands]
+        self.durations = list(durations or [0] * len(self.commands))
+        self.label = label
+        self.step = 0
+        self.process = None
+        self.is_cancelled = False
+        self.is_running = False
+        self.started_at = 0.0
+        self.step_started_at = 0.0
+        self.stdout_buffer = b""
+        self.stderr_tail = deque()
+        self.stderr_size = 0
+        self.progress_block = {}
+        # Telemetría del paso en curso: QProcess recoge el proceso él mismo,
+        # así que el pico de memoria se muestrea con cada bloque de progreso
+        self.record = None
+        self.step_peak_kb = None
+        self.step_speed = None
+
+    def start(self):
+        self.is_running = True
+        self.started_at = time.monotonic()
+        self.start_step()
+
+    def start_step(self):
+        command = self.commands[self.step]
+        self.stdout_buffer = b""
+        self.progress_block = {}
+        self.step_started_at = time.monotonic()
+        self.record = CommandRecord(command, self.label)
+        self.step_peak_kb = None
+        self.step_speed = None
+
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.read_stdout)
+        self.process.readyReadStandardError.connect(self.read_stderr)
+        self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
+        self.process.start(command[0], command[1:])
+
+    def cancel(self):
+        if not self.is_running or self.is_cancelled:
+            return
+        self.is_cancelled = True
+        if self.process is not None and self.process.state() != QProcess.NotRunning:
+            self.process.kill()
+
+    def read_stdout(self):
+        self.stdout_buffer += bytes(self.process.readAllStandardOutput())
+        *lines, self.stdout_buffer = self.stdout_buffer.split(b"\n")
+        for raw_line in lines:
+            line = raw_line.decode("utf-8", "replace").strip()
+            if "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            self.progress_block[key] = value
+            # Cada bloque de progreso termina con la clave "progress"
+            if key == "progress":
+                self.sample_telemetry(self.progress_block)
+                self.emit_progress(self.progress_block)
+                self.progress_block = {}
+
+    def read_stderr(self):
+        chunk = bytes(self.process.readAllStandardError())
+        self.stderr_tail.append(chunk)
+        self.stderr_size += len(chunk)
+        while self.stderr_size > STDERR_TAIL_BYTES and len(self.stderr_tail) > 1:
+            self.stderr_size -= len(self.stderr_tail.popleft())
+
+    def sample_telemetry(self, block):
+        speed = parse_speed(block.get("speed", ""))
+        if speed > 0:
+            self.step_speed = speed
+        peak = process_peak_kb(int(self.process.processId()))
+        if peak is not None:
+            self.step_peak_kb = max(peak, self.step_peak_kb or 0)
+
+    def finish_record(self, exit_code, error=""):
+        if self.record is not None:
+            self.record.finish(exit_code, self.step_peak_kb, self.step_speed, error)
+            self.record = None
+
+    def error_text(self):
+        text = b"".join(self.stderr_tail).decode("utf-8", "replace").strip()
+        return text[-STDERR_TAIL_BYTES:]
+
+    def emit_progress(self, block):
+        steps = len(self.commands)
+        step_duration = self.durations[self.step] if self.step < len(self.durations) else 0
+        out_time = parse_out_time_ms(block)
+        speed = parse_speed(block.get("speed", ""))
+
+        fraction = 0.0
+        eta = None
+        if step_duration > 0:
+            fraction = min(1.0, out_time / step_duration)
+            remaining_media = max(0.0, step_duration - out_time) / 1000.0
+            if speed > 0:
+                eta = remaining_media / speed
+            elif fraction > 0:
+                elapsed = time.monotonic() - self.step_started_at
+                eta = elapsed / fraction - elapsed
+            # Sumar la duración de los pasos que aún no han empezado
+            pending = sum(self.durations[self.step + 1 :]) / 1000.0
+            if eta is not None and pending:
+                eta += pending / speed if speed > 0 else 0
+
+        try:
+            fps = float(block.get("fps", 0))
+        except ValueError:
+            fps = 0.0
+        try:
+            frame = int(block.get("frame", 0))
+        except ValueError:
+            frame = 0
+
+        self.progress.emit(
+            {
+                "label": self.label,
+                "step": self.step + 1,
+                "steps": steps,
+                "frame": frame,
+                "fps": fps,
+                "speed": speed,
+                "out_time_ms": out_time,
+                "percent": int(100 * (self.step + fraction) / steps),
+                "eta": eta,
+            }
+        )
+
+    def process_error(self, error):
+        # FailedToStart no emite finished, así que se gestiona aquí
+        if error == QProcess.FailedToStart:
+            self.finish_record(-1, self.process.errorString())
+            self.finish_with_error(
+                f"No se pudo iniciar {self.commands[self.step][0]}: "
+                f"{self.process.errorString()}"
+            )
+
+    def process_finished(self, exit_code, exit_status):
+        if not self.is_running:
+            return
+        if exit_status != QProcess.NormalExit:
+            exit_code = -1
+        self.finish_record(exit_code, self.error_text() if exit_code != 0 else "")
+        if self.is_cancelled:
+            self.is_running = False
+            self.cancelled.emit()
+            self.done.emit()
+            return
+        if exit_status != QProcess.NormalExit or exit_code != 0:
+            self.finish_with_error(
+                self.error_text() or f"ffmpeg terminó con código {exit_code}"
+            )
+            return
+
+        self.step += 1
+        if self.step < len(self.commands):
+            self.start_step()
+            return
+
+        self.is_running = False
+        self.succeeded.emit()
+        self.done.emit()
+
+    def finish_with_error(self, message):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.failed.emit(message)
+        self.done.emit()
+
+
+class TaskSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(dict)
+
+
+class TaskRunnable(QRunnable):
+    # Ejecuta una función de Python en el QThreadPool y devuelve el resultado
+    # al hilo de la interfaz mediante señales
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.result.emit(result)
+
+
+class JobManager(QObject):
+    # Cola de trabajos de FFmpeg: se ejecutan de uno en uno porque cada
+    # operación de edición parte del resultado de la anterior
+    job_started = pyqtSignal(object)
+    job_finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.pending_jobs = deque()
+        self.current_job = None
+        self.tasks = set()
+
+    def submit(self, job):
+        job.done.connect(lambda: self.job_done(job))
+        self.pending_jobs.append(job)
+        self.start_next()
+        return job
+
+    def start_next(self):
+        if self.current_job is not None or not self.pending_jobs:
+            return
+        self.current_job = self.pending_jobs.popleft()
+        self.job_started.emit(self.current_job)
+        self.current_job.start()
+
+    def job_done(self, job):
+        if job is self.current_job:
+            self.current_job = None
+        self.job_finished.emit(job)
+        job.deleteLater()
+        self.start_next()
+
+    def run_task(
+        self, fn, *args, on_result=None, on_error=None, on_progress=None, **kwargs
+    ):
+        task = TaskRunnable(fn, *args, **kwargs)
+        if on_progress is not None:
+            # La función recibe progress(dict), que se puede llamar desde el
+            # hilo de trabajo porque emitir una señal es seguro entre hilos
+            task.kwargs["progress"] = task.signals.progress.emit
+            task.signals.progress.connect(on_progress)
+        # Mantener una referencia hasta que termine para que Python no
+        # destruya las señales antes de tiempo
+        self.tasks.add(task)
+        if on_result is not None:
+            task.signals.result.connect(on_result)
+        if on_error is not None:
+            task.signals.error.connect(on_error)
+        task.signals.result.connect(lambda _: self.tasks.discard(task))
+        task.signals.error.connect(lambda _: self.tasks.discard(task))
+        task.setAutoDelete(False)
+        self.thread_pool.start(task)
+        return task
+
+    def is_busy(self):
+        return self.current_job is not None or bool(self.pending_jobs)
+
+    def cancel_all(self):
+        while self.pending_jobs:
+            job = self.pending_jobs.popleft()
+            job.deleteLater()
+        if self.current_job is not None:
+            self.current_job.cancel()
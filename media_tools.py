@@ -0,0 +1,152 @@
+# Utilidades para invocar ffmpeg/ffprobe sin depender de Qt
+import hashlib
+import json
+import os
+import subprocess
+import threading
+
+from telemetry import CommandRecord, parse_speed, wait_process
+
+
+FFMPEG = "ffmpeg"
+FFPROBE = "ffprobe"
+
+# Códecs por defecto para cada formato de salida del combo "Formato de salida"
+OUTPUT_CODECS = {
+    "mp4": {"video": "libx264", "audio": "aac"},
+    "mov": {"video": "libx264", "audio": "aac"},
+    "mkv": {"video": "libx264", "audio": "aac"},
+    "avi": {"video": "mpeg4", "audio": "libmp3lame"},
+    "webm": {"video": "libvpx-vp9", "audio": "libopus"},
+}
+
+
+def output_codecs(path):
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    return OUTPUT_CODECS.get(extension, OUTPUT_CODECS["mp4"])
+
+
+def cache_dir(name):
+    # Directorio de caché persistente de la aplicación (~/.cache/EditorVideo)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    path = os.path.join(base, "EditorVideo", name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_key(path):
+    # Identifica una versión concreta de un archivo por ruta, tamaño y fecha
+    # de modificación; sirve de nombre para los archivos auxiliares de caché
+    stat = os.stat(path)
+    text = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def watch_stop(stop_event, cancel):
+    # Llama a cancel() si stop_event se activa mientras dura el trabajo;
+    # devuelve el evento que hay que activar cuando el trabajo termina
+    finished = threading.Event()
+
+    def watch():
+        while not finished.wait(0.2):
+            if stop_event.is_set():
+                cancel()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    return finished
+
+
+def run_command(command, label="", stop_event=None):
+    # Ejecuta un comando y devuelve su salida estándar; si falla, el error
+    # incluye el final de la salida de error de ffmpeg. Cada llamada queda en
+    # el registro de telemetría. stop_event permite interrumpirlo desde otro
+    # hilo
+    record = CommandRecord(command, label)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finished = watch_stop(stop_event, process.kill) if stop_event is not None else None
+    # La salida de error se lee en otro hilo para que ninguna tubería se llene
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()))
+    reader.start()
+    stdout = process.stdout.read()
+    reader.join()
+    process.stdout.close()
+    process.stderr.close()
+    returncode, peak = wait_process(process)
+    if finished is not None:
+        finished.set()
+
+    error = stderr[0].decode("utf-8", "replace").strip()
+    record.finish(returncode, peak, parse_speed(error), error)
+    if returncode != 0 and stop_event is not None and stop_event.is_set():
+        raise RuntimeError("Cancelado")
+    if returncode != 0:
+        raise RuntimeError(error[-2000:] or f"{command[0]} terminó con código {returncode}")
+    return stdout
+
+
+def probe(path):
+    output = run_command(
+        [FFPROBE, "-v", "error", "-show_format", "-show_streams", "-of", "json", path],
+        "Sondeo",
+    )
+    return json.loads(output)
+
+
+def duration_ms(probe_info):
+    # Duración del contenedor en milisegundos
+    try:
+        return float(probe_info["format"].get("duration", 0)) * 1000
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def video_stream(probe_info):
+    return next(
+        (s for s in probe_info["streams"] if s["codec_type"] == "video"), None
+    )
+
+
+def audio_stream(probe_info):
+    return next(
+        (s for s in probe_info["streams"] if s["codec_type"] == "audio"), None
+    )
+
+
+def parse_rate(rate, default=0.0):
+    # Convierte fracciones de ffprobe ("30000/1001") a float
+    try:
+        num, _, den = str(rate).partition("/")
+        value = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return default
+    return value or default
+
+
+def probe_keyframes(path):
+    # Tiempos (en segundos) de los paquetes clave del primer stream de video
+    output = run_command(
+        [
+            FFPROBE,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,flags",
+            "-of",
+            "csv=p=0",
+            path,
+        ],
+        "Keyframes",
+    )
+    keyframes = []
+    for line in output.decode("utf-8", "replace").splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    keyframes.sort()
+    return keyframes
@@ -0,0 +1,107 @@
+# Formato intermedio para los archivos de trabajo.
+#
+# Los resultados de las operaciones que recodifican (texto, audio, cambios
+# técnicos) no son el archivo final: se vuelven a recortar, dividir y navegar.
+# Por eso se guardan en un formato intermedio con todos los frames intra,
+# donde cualquier corte cae en un keyframe (recortar es copiar y buscar es
+# decodificar un solo frame), y con el audio sin comprimir. La codificación
+# con GOP largo y el perfil elegido solo se hace al exportar.
+#
+# Los archivos intermedios llevan una etiqueta en los metadatos del
+# contenedor; la exportación la usa para recodificarlos siempre al formato de
+# entrega en lugar de copiar sus pistas.
+import os
+
+
+INTERMEDIATE_TAG = "editorvideo"
+INTERMEDIATE_VALUE = "intermediate"
+
+# "video" y "audio" son None en el formato heredado: se codifica directamente
+# con el perfil de exportación
+INTERMEDIATE_FORMATS = {
+    "intra_h264": {
+        "label": "H.264 intra (MKV)",
+        "extension": ".mkv",
+        "video": ["-c:v", "libx264", "-preset:v", "veryfast", "-crf:v", "16"]
+        + ["-g:v", "1", "-bf:v", "0", "-pix_fmt", "yuv420p"],
+        "audio": ["-c:a", "pcm_s16le"],
+    },
+    "mjpeg": {
+        "label": "MJPEG (MKV)",
+        "extension": ".mkv",
+        "video": ["-c:v", "mjpeg", "-q:v", "3", "-pix_fmt", "yuvj420p"],
+        "audio": ["-c:a", "pcm_s16le"],
+    },
+    "ffv1": {
+        "label": "FFV1 sin pérdida (NUT)",
+        "extension": ".nut",
+        "video": ["-c:v", "ffv1", "-level:v", "3", "-g:v", "1", "-slices:v", "16"],
+        "audio": ["-c:a", "pcm_s16le"],
+    },
+    "mp4": {
+        "label": "MP4 con el perfil de codificación",
+        "extension": ".mp4",
+        "video": None,
+        "audio": None,
+    },
+}
+INTERMEDIATE_NAMES = ["intra_h264", "mjpeg", "ffv1", "mp4"]
+DEFAULT_INTERMEDIATE = "intra_h264"
+
+
+def intermediate_format(name):
+    # None (o vacío) significa sin formato intermedio: se codifica con el
+    # perfil, igual que "mp4". DEFAULT_INTERMEDIATE solo es el valor inicial
+    # de la interfaz
+    if not name:
+        return None
+    return INTERMEDIATE_FORMATS.get(name, INTERMEDIATE_FORMATS["mp4"])
+
+
+def intermediate_extension(name):
+    return (intermediate_format(name) or INTERMEDIATE_FORMATS["mp4"])["extension"]
+
+
+def tag_args():
+    return ["-metadata", f"{INTERMEDIATE_TAG}={INTERMEDIATE_VALUE}"]
+
+
+def intermediate_video_args(name, threads=0):
+    # Opciones de video y etiqueta del contenedor; None si el formato no es
+    # intermedio
+    video = (intermediate_format(name) or INTERMEDIATE_FORMATS["mp4"])["video"]
+    if video is None:
+        return None
+    return list(video) + ["-threads", str(threads)] + tag_args()
+
+
+def intermediate_audio_args(name):
+    audio = (intermediate_format(name) or INTERMEDIATE_FORMATS["mp4"])["audio"]
+    return list(audio) if audio is not None else None
+
+
+def intermediate_output_args(name):
+    # Video y audio juntos, para comandos que generan todas las pistas
+    video = intermediate_video_args(name)
+    if video is None:
+        return None
+    return video + intermediate_audio_args(name)
+
+
+def is_intermediate(info):
+    # Las claves de las etiquetas cambian de mayúsculas según el contenedor
+    tags = info.get("format", {}).get("tags", {}) or {}
+    return any(
+        key.lower() == INTERMEDIATE_TAG and str(value).lower() == INTERMEDIATE_VALUE
+        for key, value in tags.items()
+    )
+
+
+def tag_command(command):
+    # Agrega la etiqueta justo antes de la salida (último argumento)
+    return command[:-1] + tag_args() + command[-1:]
+
+
+def copy_extension(path):
+    # Las operaciones que copian las pistas conservan el contenedor de origen
+    return os.path.splitext(path)[1].lower() or ".mp4"
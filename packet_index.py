@@ -0,0 +1,161 @@
+# Índice de paquetes de video por archivo.
+#
+# Guarda el PTS, si es keyframe, la posición en bytes y el tamaño de cada
+# paquete del primer stream de video en arrays compactos, y los persiste en
+# un archivo auxiliar identificado por ruta, tamaño y fecha de modificación
+# para no volver a sondear el archivo en las siguientes sesiones.
+import os
+import struct
+import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+
+from media_tools import FFPROBE, cache_dir, file_key
+from telemetry import CommandRecord, wait_process
+
+
+INDEX_MAGIC = b"EVIDX1"
+# magic, número de paquetes, número de keyframes
+HEADER = struct.Struct("<6sQQ")
+
+
+class PacketIndex:
+    def __init__(self, pts=None, keyframe=None, pos=None, size=None):
+        # Arrays paralelos ordenados por PTS (en segundos)
+        self.pts = pts if pts is not None else array("d")
+        self.keyframe = keyframe if keyframe is not None else array("B")
+        self.pos = pos if pos is not None else array("q")
+        self.size = size if size is not None else array("I")
+        self.keyframe_pts = array(
+            "d", (t for t, k in zip(self.pts, self.keyframe) if k)
+        )
+
+    @property
+    def frame_count(self):
+        return len(self.pts)
+
+    def frame_at(self, seconds):
+        # Número de frame que se muestra en el instante indicado
+        return max(0, bisect_right(self.pts, seconds + 1e-6) - 1)
+
+    def keyframe_before(self, seconds):
+        # Último keyframe en o antes del instante indicado
+        index = bisect_right(self.keyframe_pts, seconds + 1e-6) - 1
+        return self.keyframe_pts[index] if index >= 0 else None
+
+    def keyframe_after(self, seconds):
+        # Primer keyframe en o después del instante indicado
+        index = bisect_left(self.keyframe_pts, seconds - 1e-6)
+        if index < len(self.keyframe_pts):
+            return self.keyframe_pts[index]
+        return None
+
+    def nearest_keyframe(self, seconds):
+        before = self.keyframe_before(seconds)
+        after = self.keyframe_after(seconds)
+        if before is None:
+            return after
+        if after is None:
+            return before
+        return before if seconds - before <= after - seconds else after
+
+    def keyframe_times(self):
+        return list(self.keyframe_pts)
+
+    def bytes_between(self, start, end):
+        # Bytes de video en el rango [start, end), útil para estimar tiempos
+        lo = bisect_left(self.pts, start)
+        hi = bisect_left(self.pts, end)
+        return sum(self.size[lo:hi])
+
+    @classmethod
+    def build(cls, path):
+        # Leer los paquetes en streaming para no cargar toda la salida de
+        # ffprobe en memoria en archivos largos
+        command = [
+            FFPROBE,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "packet=pts_time,flags,pos,size",
+            "-of",
+            "csv=p=0",
+            path,
+        ]
+        record = CommandRecord(command, "Índice de paquetes")
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        rows = []
+        for line in process.stdout:
+            fields = line.decode("utf-8", "replace").strip().split(",")
+            if len(fields) < 4 or fields[0] in ("", "N/A"):
+                continue
+            pts_time, size, pos, flags = fields[:4]
+            rows.append(
+                (
+                    float(pts_time),
+                    1 if "K" in flags else 0,
+                    int(pos) if pos not in ("", "N/A") else -1,
+                    int(size) if size not in ("", "N/A") else 0,
+                )
+            )
+        process.stdout.close()
+        returncode, peak = wait_process(process)
+        record.finish(returncode, peak)
+        if returncode != 0:
+            raise RuntimeError(f"ffprobe no pudo indexar {os.path.basename(path)}")
+
+        # Con frames B el orden de decodificación no coincide con el de
+        # presentación, así que se ordena por PTS
+        rows.sort(key=lambda row: row[0])
+        return cls(
+            array("d", (row[0] for row in rows)),
+            array("B", (row[1] for row in rows)),
+            array("q", (row[2] for row in rows)),
+            array("I", (row[3] for row in rows)),
+        )
+
+    def save(self, index_path):
+        temp_path = index_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(INDEX_MAGIC, len(self.pts), len(self.keyframe_pts)))
+            self.pts.tofile(f)
+            self.keyframe.tofile(f)
+            self.pos.tofile(f)
+            self.size.tofile(f)
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path, "rb") as f:
+            magic, count, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != INDEX_MAGIC:
+                raise ValueError("Archivo de índice no válido")
+            arrays = []
+            for typecode in ("d", "B", "q", "I"):
+                values = array(typecode)
+                values.fromfile(f, count)
+                arrays.append(values)
+        return cls(*arrays)
+
+    @staticmethod
+    def sidecar_path(path):
+        return os.path.join(cache_dir("index"), file_key(path) + ".idx")
+
+    @classmethod
+    def load_or_build(cls, path):
+        index_path = cls.sidecar_path(path)
+        if os.path.exists(index_path):
+            try:
+                return cls.load(index_path)
+            except (OSError, ValueError, EOFError, struct.error):
+                # Índice dañado o de otra versión: reconstruirlo
+                pass
+        index = cls.build(path)
+        index.save(index_path)
+        return index
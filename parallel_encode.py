@@ -0,0 +1,225 @@
+# Codificación paralela por fragmentos.
+#
+# El video se divide en rangos de tiempo que empiezan en keyframes y cada
+# rango se codifica en un ffmpeg independiente, varios a la vez. Los
+# fragmentos se unen sin pérdida con el demuxer concat y el audio se procesa
+# en una sola pasada continua para evitar cortes audibles entre fragmentos.
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from edit_graph import atempo_chain
+from media_tools import FFMPEG, output_codecs
+from telemetry import CommandRecord, parse_speed, wait_process
+
+
+# Duración mínima de un fragmento; por debajo el arranque de ffmpeg pesa más
+# que la codificación
+MIN_CHUNK_SECONDS = 4.0
+# Fragmentos por trabajador, para repartir mejor la carga
+CHUNKS_PER_WORKER = 2
+
+
+def default_workers():
+    return max(1, os.cpu_count() or 1)
+
+
+def chunk_ranges(keyframes, duration, workers):
+    # Divide [0, duration) en rangos que empiezan en keyframes
+    target = max(1, workers * CHUNKS_PER_WORKER)
+    length = max(MIN_CHUNK_SECONDS, duration / target)
+    bounds = [0.0]
+    for keyframe in keyframes:
+        if keyframe - bounds[-1] >= length and duration - keyframe >= MIN_CHUNK_SECONDS / 2:
+            bounds.append(keyframe)
+    bounds.append(duration)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def plan_chunked_render(
+    path,
+    output_path,
+    duration,
+    keyframes,
+    workers,
+    video_filters=None,
+    speed=1.0,
+    has_audio=True,
+    video_args=None,
+    audio_args=None,
+    output_args=None,
+):
+    # duration en segundos del archivo de entrada; video_filters es una lista
+    # de filtros de video (sin el cambio de velocidad, que se agrega aquí).
+    # output_args se agregan a la unión final (metadatos del contenedor)
+    codecs = output_codecs(output_path)
+    video_args = video_args or ["-c:v", codecs["video"]]
+    audio_args = audio_args or ["-c:a", codecs["audio"]]
+    encoder = video_args[video_args.index("-c:v") + 1] if "-c:v" in video_args else ""
+    extension = ".ts" if encoder in ("libx264", "libx265", "mpeg4") else ".mkv"
+
+    filters = list(video_filters or [])
+    if speed != 1.0:
+        filters.append(f"setpts=(PTS-STARTPTS)/{speed:g}")
+
+    plan = {
+        "chunks": [],
+        "audio_command": None,
+        "final_command": None,
+        "temp_files": [],
+        "output": output_path,
+        "duration": duration,
+    }
+
+    def temp_path(suffix):
+        temp = tempfile.mktemp(suffix=suffix)
+        plan["temp_files"].append(temp)
+        return temp
+
+    parts = []
+    for start, end in chunk_ranges(keyframes, duration, workers):
+        part = temp_path(extension)
+        command = [FFMPEG, "-y", "-v", "error", "-ss", f"{start:.6f}"]
+        # -t como opción de entrada: limita la duración leída del original,
+        # independientemente del cambio de velocidad
+        command += ["-t", f"{end - start:.6f}", "-i", path, "-map", "0:v:0", "-an"]
+        if filters:
+            command += ["-vf", ",".join(filters)]
+        command += video_args + [part]
+        plan["chunks"].append({"command": command, "seconds": end - start})
+        parts.append(part)
+
+    concat_file = temp_path(".txt")
+    with open(concat_file, "w") as f:
+        for part in parts:
+            f.write(f"file '{part}'\n")
+
+    final = [FFMPEG, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", concat_file]
+    if has_audio:
+        audio_file = temp_path(".mka")
+        audio = [FFMPEG, "-y", "-v", "error", "-i", path, "-map", "0:a:0", "-vn"]
+        if speed != 1.0:
+            audio += ["-af", atempo_chain(speed)]
+        audio += audio_args + [audio_file]
+        plan["audio_command"] = audio
+        final += ["-i", audio_file, "-map", "0:v:0", "-map", "1:a:0"]
+    else:
+        final += ["-map", "0:v:0"]
+    final += ["-c", "copy"] + list(output_args or []) + [output_path]
+    plan["final_command"] = final
+    return plan
+
+
+class ChunkedRender:
+    # Ejecuta un plan de plan_chunked_render; pensado para correr en un hilo
+    # de trabajo, con progress(dict) como callback y cancel() desde otro hilo.
+    # planner es una función que devuelve el plan, para que el sondeo de
+    # keyframes también se haga fuera del hilo de la interfaz
+    def __init__(self, planner, workers, label=""):
+        self.planner = planner
+        self.plan = None
+        self.workers = max(1, workers)
+        self.label = label
+        self.progress = None
+        self.cancelled = threading.Event()
+        self.processes = set()
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+        with self.lock:
+            for process in self.processes:
+                process.kill()
+
+    def run_command(self, command):
+        if self.cancelled.is_set():
+            raise RuntimeError("Cancelado")
+        record = CommandRecord(command, self.label)
+        process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        with self.lock:
+            self.processes.add(process)
+        try:
+            stderr = process.stderr.read()
+            process.stderr.close()
+            returncode, peak = wait_process(process)
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+        error = stderr.decode("utf-8", "replace").strip()
+        record.finish(returncode, peak, parse_speed(error), error)
+        if self.cancelled.is_set():
+            raise RuntimeError("Cancelado")
+        if returncode != 0:
+            raise RuntimeError(error[-2000:])
+
+    def report(self, done_seconds, started_at, finished, total):
+        if self.progress is None:
+            return
+        elapsed = time.monotonic() - started_at
+        duration = self.plan["duration"] or 1.0
+        speed = done_seconds / elapsed if elapsed > 0 else 0.0
+        eta = (duration - done_seconds) / speed if speed > 0 else None
+        self.progress(
+            {
+                "label": self.label,
+                "step": finished,
+                "steps": total,
+                "frame": 0,
+                "fps": 0.0,
+                "speed": speed,
+                "out_time_ms": done_seconds * 1000,
+                "percent": int(100 * done_seconds / duration),
+                "eta": eta,
+            }
+        )
+
+    def run(self, progress=None):
+        self.progress = progress
+        self.plan = self.planner()
+        try:
+            return self.render()
+        finally:
+            # Los fragmentos y el audio intermedio ya no hacen falta
+            for temp_file in self.plan["temp_files"]:
+                try:
+                    if os.path.exists(temp_file):
+                        os.remove(temp_file)
+                except OSError:
+                    pass
+
+    def render(self):
+        started_at = time.monotonic()
+        chunks = self.plan["chunks"]
+        done_seconds = 0.0
+        finished = 0
+
+        # El audio ocupa un trabajador durante toda la codificación de video
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            audio_future = None
+            if self.plan["audio_command"]:
+                audio_future = executor.submit(
+                    self.run_command, self.plan["audio_command"]
+                )
+            futures = {
+                executor.submit(self.run_command, chunk["command"]): chunk
+                for chunk in chunks
+            }
+            try:
+                for future in as_completed(futures):
+                    future.result()
+                    finished += 1
+                    done_seconds += futures[future]["seconds"]
+                    self.report(done_seconds, started_at, finished, len(chunks))
+                if audio_future is not None:
+                    audio_future.result()
+            except Exception:
+                self.cancel()
+                raise
+
+        self.run_command(self.plan["final_command"])
+        return self.plan["output"]
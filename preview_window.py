@@ -0,0 +1,107 @@
+# Vista previa rápida de los ajustes de las herramientas.
+#
+# Para ver cómo queda un texto, un escalado o un cambio de velocidad no hace
+# falta aplicar la operación a todo el archivo: se renderizan unos segundos
+# alrededor del cabezal, a baja resolución y con el preset más rápido de x264,
+# y el resultado se reproduce en lugar del original. Cada render tarda menos
+# de un segundo, así que se puede repetir cada vez que cambia un ajuste.
+from core import new_plan, technical_filters
+from edit_graph import drawtext_filter
+from media_tools import FFMPEG
+
+
+PREVIEW_SECONDS = 4.0
+# Fracción de la ventana que queda antes del cabezal
+PREVIEW_LEAD = 0.25
+PREVIEW_HEIGHT = 360
+PREVIEW_ARGS = [
+    "-c:v",
+    "libx264",
+    "-preset",
+    "ultrafast",
+    "-tune",
+    "zerolatency",
+    "-crf",
+    "30",
+    "-pix_fmt",
+    "yuv420p",
+    "-c:a",
+    "aac",
+    "-b:a",
+    "96k",
+]
+
+
+def window_range(position_ms, duration_ms, seconds=PREVIEW_SECONDS):
+    # (inicio, fin) en ms de la ventana alrededor de position_ms, dentro del
+    # video
+    length = min(seconds * 1000, duration_ms)
+    start = max(0, position_ms - length * PREVIEW_LEAD)
+    start = max(0, min(start, duration_ms - length))
+    return start, start + length
+
+
+def preview_scale(resolution=None):
+    # Escalado final a baja resolución, con la proporción de la resolución
+    # elegida si la hay
+    if resolution is None:
+        return f"scale=-2:'min({PREVIEW_HEIGHT},ih)'"
+    width, height = resolution
+    preview_height = min(PREVIEW_HEIGHT, height)
+    preview_width = int(width * preview_height / height) // 2 * 2
+    return f"scale={preview_width}:{preview_height}"
+
+
+def preview_plan(
+    source,
+    output,
+    position_ms,
+    duration_ms,
+    text=None,
+    resolution=None,
+    speed=1.0,
+    has_audio=True,
+    scale=1.0,
+):
+    # text es un dict con los ajustes de la pestaña "Texto" (text, position,
+    # font_size, color, opacity y opcionalmente start/end en ms) o None.
+    # scale es la altura de source respecto al video editado (< 1 si source
+    # es un proxy), para que el tamaño del texto se vea igual
+    start, end = window_range(position_ms, duration_ms)
+    filters = []
+    if text:
+        text_start = text_end = None
+        if text.get("end") is not None:
+            # El filtro ve el tiempo desde el inicio de la ventana
+            text_start = (text["start"] - start) / 1000.0
+            text_end = (text["end"] - start) / 1000.0
+        filters.append(
+            drawtext_filter(
+                text["text"],
+                text["position"],
+                max(1, round(text["font_size"] * scale)),
+                text["color"],
+                text["opacity"],
+                text_start,
+                text_end,
+            )
+        )
+    filters.append(preview_scale(resolution))
+    speed_filters, audio_filters = technical_filters(None, speed)
+    filters += speed_filters
+
+    command = [FFMPEG, "-y", "-v", "error", "-ss", f"{start / 1000.0:.6f}"]
+    command += ["-t", f"{(end - start) / 1000.0:.6f}", "-i", source, "-map", "0:v:0"]
+    if has_audio:
+        command += ["-map", "0:a:0?"]
+        if audio_filters:
+            command += ["-af", ",".join(audio_filters)]
+    command += ["-vf", ",".join(filters)] + PREVIEW_ARGS + [output]
+
+    plan = new_plan([output])
+    plan["commands"].append(command)
+    plan["durations"].append((end - start) / speed)
+    # Para traducir las posiciones de la vista previa a la línea de tiempo
+    plan["window"] = (start, end)
+    plan["speed"] = speed
+    return plan
@@ -0,0 +1,174 @@
+# Proxies de baja resolución para la vista previa.
+#
+# Los videos 4K o de bitrate muy alto (HEVC sobre todo) son lentos de
+# decodificar al reproducir y al navegar. Para ellos se genera en segundo
+# plano una copia a 540p con todos los frames intra, que se decodifica al
+# instante en cualquier posición. La copia se guarda en
+# ~/.cache/EditorVideo/proxies identificada por la versión del original, así
+# que se reutiliza en las siguientes sesiones. Solo se usa para ver el video:
+# las operaciones y la exportación siempre leen el original.
+import os
+import subprocess
+import tempfile
+
+from media_tools import FFMPEG, cache_dir, duration_ms, file_key, probe, video_stream
+from mezzanine import is_intermediate
+from telemetry import CommandRecord, wait_process
+
+
+# Por encima de estos valores el original se reproduce a través de un proxy
+PROXY_MIN_PIXELS = 2560 * 1440
+PROXY_MIN_BITRATE = 40 * 1000 * 1000
+PROXY_HEIGHT = 540
+# Espacio máximo que ocupan los proxies; se borran primero los menos usados
+PROXY_BUDGET = 20 * 1024 * 1024 * 1024
+
+
+def needs_proxy(info):
+    video = video_stream(info)
+    if video is None:
+        return False
+    pixels = int(video.get("width", 0) or 0) * int(video.get("height", 0) or 0)
+    if is_intermediate(info):
+        # Los archivos de trabajo tienen mucho bitrate pero todos los frames
+        # intra: solo la resolución justifica un proxy
+        return pixels > PROXY_MIN_PIXELS
+    bit_rate = int(video.get("bit_rate") or info["format"].get("bit_rate") or 0)
+    return pixels > PROXY_MIN_PIXELS or bit_rate > PROXY_MIN_BITRATE
+
+
+def proxy_path(path):
+    return os.path.join(cache_dir("proxies"), f"{file_key(path)}.mp4")
+
+
+def find_proxy(path):
+    # Proxy ya generado (en esta sesión o en una anterior) o None
+    output_path = proxy_path(path)
+    if os.path.exists(output_path):
+        # La fecha de acceso ordena los proxies al liberar espacio
+        os.utime(output_path)
+        return output_path
+    return None
+
+
+def proxy_command(path, output_path):
+    # Todos los frames intra (-g 1) y sin B-frames: buscar cualquier frame
+    # cuesta lo mismo que decodificar uno solo
+    return [
+        FFMPEG,
+        "-y",
+        "-v",
+        "error",
+        "-i",
+        path,
+        "-map",
+        "0:v:0",
+        "-map",
+        "0:a:0?",
+        "-vf",
+        f"scale=-2:{PROXY_HEIGHT}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-tune",
+        "fastdecode",
+        "-crf",
+        "23",
+        "-g",
+        "1",
+        "-bf",
+        "0",
+        "-pix_fmt",
+        "yuv420p",
+        "-c:a",
+        "aac",
+        "-b:a",
+        "128k",
+        "-movflags",
+        "+faststart",
+        output_path,
+    ]
+
+
+def load_or_build(path, progress=None, stop_event=None):
+    # Se ejecuta en un hilo de trabajo; devuelve la ruta del proxy o None si
+    # el original se reproduce bien sin él
+    existing = find_proxy(path)
+    if existing is not None:
+        return existing
+    info = probe(path)
+    if not needs_proxy(info):
+        return None
+    return build_proxy(path, info, progress, stop_event)
+
+
+def build_proxy(path, info, progress=None, stop_event=None):
+    # progress recibe {"percent": ...} y stop_event permite interrumpir la
+    # generación (al cerrar el editor)
+    output_path = proxy_path(path)
+    # Se escribe en un archivo aparte para no dejar proxies a medias
+    partial_path = output_path[:-4] + ".part.mp4"
+    command = proxy_command(path, partial_path)
+    command[1:1] = ["-progress", "pipe:1", "-nostats"]
+    total = duration_ms(info)
+
+    record = CommandRecord(command, "Proxy")
+    # La salida de error va a un archivo: con una tubería que nadie lee
+    # mientras dura el progreso, ffmpeg se bloquearía al llenarla (avisos de
+    # un archivo dañado) y stdout no se cerraría nunca
+    error_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=error_file)
+    try:
+        for line in process.stdout:
+            if stop_event is not None and stop_event.is_set():
+                process.kill()
+                break
+            key, _, value = line.decode("utf-8", "replace").strip().partition("=")
+            if key == "out_time_us" and progress is not None and total > 0:
+                try:
+                    done = int(value) / 1000.0
+                except ValueError:
+                    continue
+                progress({"percent": min(100.0, done * 100.0 / total)})
+    finally:
+        process.stdout.close()
+    returncode, peak = wait_process(process)
+    with error_file:
+        error_file.seek(0)
+        error = error_file.read().decode("utf-8", "replace").strip()
+    record.finish(returncode, peak, error=error)
+
+    if returncode != 0:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        if stop_event is not None and stop_event.is_set():
+            raise RuntimeError("Generación del proxy cancelada")
+        raise RuntimeError(error[-2000:] or "ffmpeg no pudo generar el proxy")
+
+    os.replace(partial_path, output_path)
+    prune_proxies(keep=output_path)
+    return output_path
+
+
+def prune_proxies(budget=PROXY_BUDGET, keep=None):
+    directory = cache_dir("proxies")
+    files = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".part.mp4"):
+            continue
+        stat = os.stat(path)
+        files.append((stat.st_atime, stat.st_size, path))
+
+    used = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if used <= budget:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            used -= size
+        except OSError:
+            pass
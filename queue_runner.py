@@ -0,0 +1,162 @@
+# Ejecución de la cola de renders en la interfaz.
+#
+# Cada vez que un trabajo termina (o se agrega uno nuevo) se pregunta al
+# planificador cuántos trabajos pendientes pueden empezar y con cuántos
+# hilos. Los planes se ejecutan con FFmpegJob (QProcess) y los lotes de
+# cli.py en el QThreadPool; todos corren a la vez que las operaciones de
+# edición, que siguen usando su propia cola de uno en uno.
+import os
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import cli
+import core
+from jobs import FFmpegJob
+from media_tools import duration_ms, probe
+from render_queue import RenderQueue, missing_inputs, plan_inputs, with_threads
+
+
+def load_batch(spec_path):
+    # Se ejecuta en un hilo de trabajo: trabajos de un archivo de lote de
+    # cli.py con la duración de cada entrada, para medir la velocidad
+    jobs = []
+    for job in cli.expand_jobs(cli.load_spec(spec_path)):
+        try:
+            seconds = duration_ms(probe(job["input"])) / 1000.0
+        except Exception:
+            seconds = 0.0
+        jobs.append((job, seconds))
+    return jobs
+
+
+class RenderQueueRunner(QObject):
+    # Se emite con cada cambio de estado o de progreso de una entrada
+    changed = pyqtSignal()
+
+    def __init__(self, job_manager, queue=None, parent=None):
+        super().__init__(parent)
+        self.job_manager = job_manager
+        self.queue = queue or RenderQueue()
+        # id de la entrada -> FFmpegJob en marcha
+        self.jobs = {}
+        # id de la entrada -> evento para interrumpir un lote en marcha
+        self.stops = {}
+        self.paused = False
+        self.stopping = False
+
+    def add_plan(self, label, plan, priority):
+        entry = self.queue.add(
+            "plan",
+            label,
+            priority,
+            plan_inputs(plan["commands"]),
+            commands=plan["commands"],
+            durations=plan["durations"],
+            outputs=plan["outputs"],
+            temp_files=plan["temp_files"],
+            media_seconds=sum(plan["durations"]) / 1000.0,
+        )
+        self.changed.emit()
+        self.schedule()
+        return entry
+
+    def add_batch(self, job, priority, media_seconds=0.0):
+        label = f"Lote: {os.path.basename(job['input'])}"
+        entry = self.queue.add(
+            "batch", label, priority, [job["input"]], job=job, media_seconds=media_seconds
+        )
+        self.changed.emit()
+        self.schedule()
+        return entry
+
+    def set_paused(self, paused):
+        self.paused = paused
+        if not paused:
+            self.schedule()
+
+    def schedule(self):
+        if self.paused:
+            return
+        for entry, threads in self.queue.next_jobs():
+            missing = missing_inputs(entry)
+            if missing:
+                # Se borraron mientras el trabajo esperaba
+                self.queue.mark_finished(
+                    entry, "failed", f"Falta el archivo de entrada: {missing[0]}"
+                )
+                continue
+            self.start(entry, threads)
+        self.changed.emit()
+
+    def start(self, entry, threads):
+        self.queue.mark_running(entry, threads)
+        if entry["kind"] == "batch":
+            job = dict(entry["job"], threads=threads)
+            stop = threading.Event()
+            self.stops[entry["id"]] = stop
+            self.job_manager.run_task(
+                cli.process_job,
+                job,
+                stop,
+                on_result=lambda result: self.batch_finished(entry, result),
+                on_error=lambda error: self.finish(entry, "failed", error),
+            )
+            return
+
+        commands = [with_threads(command, threads) for command in entry["commands"]]
+        job = FFmpegJob(commands, entry["durations"], entry["label"], self)
+        job.progress.connect(lambda progress: self.job_progress(entry, progress))
+        job.succeeded.connect(lambda: self.finish(entry, "done"))
+        job.failed.connect(lambda error: self.finish(entry, "failed", error))
+        job.cancelled.connect(lambda: self.finish(entry, "cancelled"))
+        job.done.connect(job.deleteLater)
+        self.jobs[entry["id"]] = job
+        job.start()
+
+    def job_progress(self, entry, progress):
+        entry["percent"] = float(progress["percent"])
+        self.changed.emit()
+
+    def batch_finished(self, entry, result):
+        stop = self.stops.get(entry["id"])
+        if result["ok"]:
+            self.finish(entry, "done")
+        elif stop is not None and stop.is_set():
+            self.finish(entry, "cancelled")
+        else:
+            self.finish(entry, "failed", result["error"])
+
+    def finish(self, entry, status, error=""):
+        self.jobs.pop(entry["id"], None)
+        self.stops.pop(entry["id"], None)
+        if self.stopping:
+            # Se queda "running" en el archivo y vuelve a la cola al cargar
+            return
+        if entry["kind"] == "plan":
+            core.remove_temp_files(entry)
+            if status != "done":
+                # No dejar salidas a medias
+                for output in entry["outputs"]:
+                    if os.path.exists(output):
+                        os.remove(output)
+        self.queue.mark_finished(entry, status, error)
+        self.schedule()
+
+    def cancel(self, entry):
+        if entry["status"] == "pending":
+            self.queue.mark_finished(entry, "cancelled")
+            self.changed.emit()
+        elif entry["id"] in self.jobs:
+            self.jobs[entry["id"]].cancel()
+        elif entry["id"] in self.stops:
+            self.stops[entry["id"]].set()
+
+    def stop(self):
+        # Al cerrar el editor: los trabajos en marcha se interrumpen y quedan
+        # guardados como pendientes para la próxima sesión
+        self.stopping = True
+        for job in list(self.jobs.values()):
+            job.cancel()
+        for stop in list(self.stops.values()):
+            stop.set()
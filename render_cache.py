@@ -0,0 +1,214 @@
+# Caché persistente de resultados intermedios.
+#
+# Cada render se identifica por el contenido de sus archivos de entrada y los
+# parámetros canónicos de la operación. Si la misma operación ya se ejecutó
+# sobre la misma entrada, se devuelve el archivo existente sin volver a llamar
+# a ffmpeg. Las entradas se desalojan por orden de uso (LRU) para no pasar del
+# presupuesto de disco, y se lleva la cuenta de aciertos y bytes ahorrados.
+#
+# Las consultas solo actualizan el índice en memoria; se escribe al disco al
+# registrar o desalojar renders y al cerrar (close). Otra instancia del editor
+# o la línea de comandos pueden estar escribiendo en el mismo directorio, así
+# que los archivos que no están en el índice solo se borran si llevan tiempo
+# sin modificarse (restos de renders fallidos o cancelados).
+import hashlib
+import json
+import os
+import time
+
+from media_tools import cache_dir, file_key
+
+
+DEFAULT_BUDGET = 4 * 1024 * 1024 * 1024
+INDEX_NAME = "index.json"
+# Bytes de cada muestra para la huella de contenido de archivos externos
+SAMPLE_BYTES = 1024 * 1024
+# Antigüedad (s) a partir de la cual un archivo fuera del índice se considera
+# un resto y no un render en curso de otro proceso
+ORPHAN_AGE = 24 * 60 * 60
+
+
+def content_fingerprint(path):
+    # Huella del contenido basada en el tamaño y tres muestras (inicio, mitad
+    # y final); evita leer videos enteros y cambia si el archivo cambia
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        for offset in (0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)):
+            f.seek(offset)
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def canonical_params(params):
+    # Representación estable de los parámetros (orden de claves, floats)
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class RenderCache:
+    def __init__(self, directory=None, budget=None):
+        self.directory = directory or cache_dir("renders")
+        self.index_path = os.path.join(self.directory, INDEX_NAME)
+        # clave -> {"files": [...], "size": bytes, "last_used": timestamp}
+        self.entries = {}
+        self.budget = DEFAULT_BUDGET
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        # Huellas ya calculadas, por versión de archivo (ruta, tamaño, fecha)
+        self.fingerprints = {}
+        # Hay cambios (fechas de uso, estadísticas) sin escribir al disco
+        self.dirty = False
+        self.load()
+        if budget is not None:
+            self.budget = budget
+
+    def load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.budget = data.get("budget", self.budget)
+        stats = data.get("stats", {})
+        self.hits = stats.get("hits", 0)
+        self.misses = stats.get("misses", 0)
+        self.bytes_saved = stats.get("bytes_saved", 0)
+        self.evictions = stats.get("evictions", 0)
+        # Descartar entradas cuyos archivos ya no existen
+        for key, entry in data.get("entries", {}).items():
+            if all(os.path.exists(path) for path in entry["files"]):
+                self.entries[key] = entry
+
+        # Borrar renders antiguos que no llegaron a registrarse (fallidos o
+        # cancelados); los recientes pueden ser de otro proceso
+        known = {path for entry in self.entries.values() for path in entry["files"]}
+        limit = time.time() - ORPHAN_AGE
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name == INDEX_NAME or path in known:
+                continue
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def save(self):
+        data = {
+            "budget": self.budget,
+            "stats": {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            },
+            "entries": self.entries,
+        }
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.index_path)
+        self.dirty = False
+
+    def close(self):
+        # Escribir las fechas de uso y las estadísticas de las consultas
+        if self.dirty:
+            self.save()
+
+    def content_key(self, path):
+        # Los resultados de la propia caché se identifican por su clave, así
+        # las cadenas de operaciones no necesitan volver a leer los archivos
+        path = os.path.abspath(path)
+        for key, entry in self.entries.items():
+            if path in entry["files"]:
+                return f"{key}:{entry['files'].index(path)}"
+        version = file_key(path)
+        if version not in self.fingerprints:
+            self.fingerprints[version] = content_fingerprint(path)
+        return self.fingerprints[version]
+
+    def key(self, sources, operation, params):
+        text = "|".join(
+            [operation, canonical_params(params)]
+            + [self.content_key(path) for path in sources]
+        )
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def lookup(self, key):
+        # Devuelve la lista de archivos del render o None si no está
+        entry = self.entries.get(key)
+        if entry is not None and not all(os.path.exists(p) for p in entry["files"]):
+            del self.entries[key]
+            entry = None
+        self.dirty = True
+        if entry is None:
+            self.misses += 1
+            return None
+        entry["last_used"] = time.time()
+        self.hits += 1
+        self.bytes_saved += entry["size"]
+        return list(entry["files"])
+
+    def output_paths(self, key, extensions):
+        # Rutas donde se debe escribir el render de la clave
+        return [
+            os.path.join(self.directory, f"{key}-{i}{extension}")
+            for i, extension in enumerate(extensions)
+        ]
+
+    def store(self, key, files, keep=()):
+        # Registrar un render terminado; keep son archivos en uso que no se
+        # pueden desalojar aunque sean los más antiguos
+        files = [os.path.abspath(path) for path in files]
+        size = sum(os.path.getsize(path) for path in files if os.path.exists(path))
+        self.entries[key] = {"files": files, "size": size, "last_used": time.time()}
+        self.evict(keep)
+        self.save()
+
+    def evict(self, keep=()):
+        keep = {os.path.abspath(path) for path in keep if path}
+        used = self.used_bytes()
+        for key in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            if used <= self.budget:
+                break
+            entry = self.entries[key]
+            if keep.intersection(entry["files"]):
+                continue
+            for path in entry["files"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            used -= entry["size"]
+            del self.entries[key]
+            self.evictions += 1
+
+    def set_budget(self, budget, keep=()):
+        self.budget = budget
+        self.evict(keep)
+        self.save()
+
+    def clear(self, keep=()):
+        budget = self.budget
+        self.budget = 0
+        self.evict(keep)
+        self.budget = budget
+        self.save()
+
+    def used_bytes(self):
+        return sum(entry["size"] for entry in self.entries.values())
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "used": self.used_bytes(),
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,296 @@
+# Cola de renders persistente y planificador según núcleos y memoria.
+#
+# Las exportaciones y los lotes se apilan en una cola con prioridad (alta,
+# normal, baja) que se guarda en ~/.cache/EditorVideo/queue/queue.json, así
+# que los trabajos pendientes sobreviven a un reinicio (los que estaban en
+# marcha vuelven a quedar pendientes). El planificador decide cuántos
+# trabajos se ejecutan a la vez y con cuántos hilos cada uno a partir de los
+# núcleos y la memoria disponible. Cada entrada guarda cuándo se agregó,
+# empezó y terminó para calcular la espera en cola y la velocidad.
+#
+# Los planes guardan los comandos ya preparados, que pueden leer archivos
+# auxiliares (listas del demuxer concat en el directorio temporal). Todos se
+# registran como entradas: no se borran de la caché mientras el trabajo
+# espera y, si faltan al cargar la cola, la entrada se marca como fallida en
+# lugar de empezar y fallar a medias.
+# No depende de Qt; la ejecución está en queue_runner.py.
+import json
+import os
+import threading
+import time
+
+from media_tools import cache_dir
+from telemetry import input_paths
+
+
+PRIORITY_NAMES = ["high", "normal", "low"]
+PRIORITY_LABELS = {"high": "Alta", "normal": "Normal", "low": "Baja"}
+DEFAULT_PRIORITY = "normal"
+
+STATUS_LABELS = {
+    "pending": "En cola",
+    "running": "En marcha",
+    "done": "Terminado",
+    "failed": "Error",
+    "cancelled": "Cancelado",
+}
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+# Por debajo de estos hilos por trabajo es mejor esperar que repartir más
+MIN_THREADS_PER_JOB = 2
+# Memoria que se reserva para cada trabajo de ffmpeg
+MEMORY_PER_JOB = 1024 * 1024 * 1024
+
+
+def queue_path():
+    return os.path.join(cache_dir("queue"), "queue.json")
+
+
+def available_memory():
+    # Memoria disponible en bytes (MemAvailable en Linux) o None si no se
+    # puede saber
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def concat_list_files(path):
+    # Archivos que enumera una lista del demuxer concat ("file '...'")
+    files = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, ValueError):
+        return files
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("file "):
+            continue
+        name = line[5:].strip()
+        if len(name) >= 2 and name[0] == name[-1] == "'":
+            name = name[1:-1].replace("'\\''", "'")
+        files.append(os.path.join(os.path.dirname(path), name))
+    return files
+
+
+def plan_inputs(commands):
+    # Archivos que tienen que existir para ejecutar los comandos: las
+    # entradas (-i) y lo que enumeran las listas de concat. Las salidas de
+    # pasos anteriores del mismo plan aún no existen y no se incluyen
+    paths = []
+    for command in commands:
+        lists = [
+            command[index + 1]
+            for index, arg in enumerate(command[:-1])
+            if arg == "-i" and "concat" in command[max(0, index - 4) : index]
+        ]
+        for path in input_paths(command):
+            paths.append(path)
+            if path in lists:
+                paths += concat_list_files(path)
+    return sorted(set(paths))
+
+
+def missing_inputs(entry):
+    return [path for path in entry["inputs"] if not os.path.exists(path)]
+
+
+def with_threads(command, threads):
+    # Fija los hilos de un comando de ffmpeg: sustituye los -threads que ya
+    # tenga (perfiles de codificación) o los agrega antes de la salida
+    if not command or not os.path.basename(command[0]).startswith("ffmpeg"):
+        return list(command)
+    command = list(command)
+    found = False
+    for index, arg in enumerate(command[:-1]):
+        if arg == "-threads":
+            command[index + 1] = str(threads)
+            found = True
+    if not found:
+        command[-1:-1] = ["-threads", str(threads)]
+    return command
+
+
+def schedule(pending, running, cpus=None, memory=None):
+    # Devuelve cuántos trabajos de pending se pueden empezar ahora y los
+    # hilos de cada uno; running es la cantidad de trabajos en marcha
+    if not pending:
+        return 0, 0
+    cpus = cpus or os.cpu_count() or 1
+    limit = max(1, cpus // MIN_THREADS_PER_JOB)
+    free = limit - running
+    if memory is None:
+        memory = available_memory()
+    if memory is not None:
+        # MemAvailable ya descuenta lo que usan los trabajos en marcha
+        free = min(free, memory // MEMORY_PER_JOB)
+    if running == 0:
+        # Siempre se puede ejecutar al menos uno
+        free = max(1, free)
+    start = max(0, min(free, len(pending)))
+    if start == 0:
+        return 0, 0
+    # Los núcleos se reparten entre todos los que van a estar en marcha
+    concurrent = min(limit, running + len(pending))
+    return start, max(1, cpus // max(1, concurrent))
+
+
+class RenderQueue:
+    def __init__(self, path=None):
+        self.path = path or queue_path()
+        self.entries = []
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.entries = data.get("entries", [])
+        self.next_id = data.get("next_id", len(self.entries) + 1)
+        changed = False
+        for entry in self.entries:
+            if entry["status"] == "running":
+                # Se interrumpió al cerrar: vuelve a la cola
+                entry["status"] = "pending"
+                entry["started"] = None
+                entry["percent"] = 0.0
+            missing = missing_inputs(entry) if entry["status"] == "pending" else []
+            if missing:
+                # Las entradas o los archivos auxiliares (en el directorio
+                # temporal) desaparecieron entre sesiones
+                entry.update(
+                    {
+                        "status": "failed",
+                        "finished": time.time(),
+                        "error": f"Falta el archivo de entrada: {missing[0]}",
+                    }
+                )
+                changed = True
+        if changed:
+            self.save()
+
+    def save(self):
+        with self.lock:
+            data = {"next_id": self.next_id, "entries": self.entries}
+        # Se escribe aparte y se reemplaza para no dejar el archivo a medias
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def add(self, kind, label, priority=DEFAULT_PRIORITY, inputs=None, **payload):
+        # kind "plan" lleva commands/durations/outputs/temp_files de un plan de
+        # core; kind "batch" lleva job, un trabajo de cli.py
+        with self.lock:
+            entry = {
+                "id": self.next_id,
+                "kind": kind,
+                "label": label,
+                "priority": priority,
+                "inputs": list(inputs or []),
+                "status": "pending",
+                "added": time.time(),
+                "started": None,
+                "finished": None,
+                "threads": 0,
+                "percent": 0.0,
+                "error": "",
+            }
+            entry.update(payload)
+            self.next_id += 1
+            self.entries.append(entry)
+        self.save()
+        return entry
+
+    def get(self, entry_id):
+        return next((entry for entry in self.entries if entry["id"] == entry_id), None)
+
+    def pending(self):
+        # Por prioridad y, dentro de cada prioridad, por orden de llegada
+        entries = [entry for entry in self.entries if entry["status"] == "pending"]
+        return sorted(
+            entries, key=lambda entry: (PRIORITY_NAMES.index(entry["priority"]), entry["id"])
+        )
+
+    def running(self):
+        return [entry for entry in self.entries if entry["status"] == "running"]
+
+    def next_jobs(self, cpus=None, memory=None):
+        # Entradas que se pueden empezar ahora y los hilos de cada una
+        pending = self.pending()
+        count, threads = schedule(pending, len(self.running()), cpus, memory)
+        return [(entry, threads) for entry in pending[:count]]
+
+    def mark_running(self, entry, threads):
+        entry.update({"status": "running", "started": time.time(), "threads": threads})
+        self.save()
+
+    def mark_finished(self, entry, status, error=""):
+        entry.update({"status": status, "finished": time.time(), "error": error})
+        if status == "done":
+            entry["percent"] = 100.0
+        self.save()
+
+    def set_priority(self, entry, priority):
+        entry["priority"] = priority
+        self.save()
+
+    def remove_finished(self):
+        with self.lock:
+            self.entries = [
+                entry for entry in self.entries if entry["status"] not in FINISHED_STATUSES
+            ]
+        self.save()
+
+    def files_in_use(self):
+        # Entradas de los trabajos que faltan; no se pueden borrar de la caché
+        return [
+            path
+            for entry in self.entries
+            if entry["status"] in ("pending", "running")
+            for path in entry["inputs"]
+        ]
+
+    def stats(self):
+        now = time.time()
+        waits = [
+            entry_wait(entry, now) for entry in self.entries if entry["status"] != "cancelled"
+        ]
+        speeds = [entry_speed(entry, now) for entry in self.entries]
+        speeds = [speed for speed in speeds if speed]
+        return {
+            "pending": sum(1 for entry in self.entries if entry["status"] == "pending"),
+            "running": len(self.running()),
+            "done": sum(1 for entry in self.entries if entry["status"] == "done"),
+            "failed": sum(1 for entry in self.entries if entry["status"] == "failed"),
+            "average_wait": sum(waits) / len(waits) if waits else 0.0,
+            "average_speed": sum(speeds) / len(speeds) if speeds else 0.0,
+        }
+
+
+def entry_wait(entry, now=None):
+    # Segundos en cola hasta empezar (o hasta ahora si sigue esperando)
+    return (entry["started"] or now or time.time()) - entry["added"]
+
+
+def entry_speed(entry, now=None):
+    # Segundos de video procesados por segundo de reloj (1.0 = tiempo real)
+    if not entry.get("started") or not entry.get("media_seconds"):
+        return None
+    end = entry["finished"] or now or time.time()
+    elapsed = end - entry["started"]
+    if elapsed <= 0:
+        return None
+    return entry["media_seconds"] * entry["percent"] / 100.0 / elapsed
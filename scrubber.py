@@ -0,0 +1,76 @@
+# Navegación con el slider de la línea de tiempo.
+#
+# Arrastrar el slider genera un evento por píxel y cada búsqueda del
+# reproductor es cara, así que las peticiones se agrupan y solo cuenta el
+# último destino. Mientras se arrastra se busca como mucho una vez cada
+# PREVIEW_INTERVAL ms y al keyframe más cercano, que se decodifica sin
+# recorrer el GOP; cuando el arrastre se detiene SETTLE_DELAY ms (o se suelta
+# el slider) se hace una única búsqueda precisa al destino.
+from PyQt5.QtCore import QObject, QTimer
+
+
+PREVIEW_INTERVAL = 60
+SETTLE_DELAY = 150
+
+
+class ScrubController(QObject):
+    def __init__(self, seek, snap=None, parent=None):
+        super().__init__(parent)
+        # seek(ms) mueve el reproductor; snap(ms) devuelve el keyframe más
+        # cercano en ms o None si todavía no se conoce
+        self.seek = seek
+        self.snap = snap
+        self.target = None
+        self.shown = None
+        self.pending = False
+        self.dragging = False
+
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_INTERVAL)
+        self.preview_timer.timeout.connect(self.flush_preview)
+
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(SETTLE_DELAY)
+        self.settle_timer.timeout.connect(self.settle)
+
+    def begin(self):
+        self.dragging = True
+        self.shown = None
+
+    def move(self, position):
+        # Solo se guarda el último destino; la búsqueda se hace enseguida si
+        # no hubo otra en los últimos PREVIEW_INTERVAL ms
+        self.target = position
+        self.pending = True
+        if not self.preview_timer.isActive():
+            self.flush_preview()
+        self.settle_timer.start()
+
+    def flush_preview(self):
+        if not self.pending:
+            return
+        self.pending = False
+        position = self.target
+        if self.snap is not None:
+            snapped = self.snap(position)
+            if snapped is not None:
+                position = snapped
+        if position != self.shown:
+            self.shown = position
+            self.seek(position)
+        self.preview_timer.start()
+
+    def settle(self):
+        # Búsqueda precisa al último destino
+        self.preview_timer.stop()
+        self.settle_timer.stop()
+        self.pending = False
+        if self.target is not None and self.target != self.shown:
+            self.shown = self.target
+            self.seek(self.target)
+
+    def end(self):
+        self.settle()
+        self.dragging = False
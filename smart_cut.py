@@ -0,0 +1,290 @@
+# Recorte inteligente con precisión de frame.
+#
+# Los GOP completos que quedan dentro del rango se copian sin recodificar; solo
+# se recodifican los fragmentos parciales en los bordes del corte, con los
+# mismos parámetros de códec que el original, y al final todo se concatena.
+#
+# La misma idea sirve para filtros que afectan solo a un intervalo (un texto
+# de unos segundos): se recodifican los GOP que cubre el intervalo y el resto
+# del video se copia.
+import tempfile
+
+from media_tools import (
+    FFMPEG,
+    duration_ms,
+    parse_rate,
+    probe,
+    probe_keyframes,
+    video_stream,
+)
+from mezzanine import is_intermediate, tag_command
+
+
+# Codificador equivalente para cada códec de origen
+MATCHING_ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "mpeg4": "mpeg4",
+    "mpeg2video": "mpeg2video",
+    "vp8": "libvpx",
+    "vp9": "libvpx-vp9",
+    "av1": "libaom-av1",
+    "mjpeg": "mjpeg",
+    "prores": "prores_ks",
+    "ffv1": "ffv1",
+}
+
+H264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+    "High 10": "high10",
+    "High 4:2:2": "high422",
+    "High 4:4:4 Predictive": "high444",
+}
+
+# Modo de calidad constante de cada codificador para los bordes: son partes
+# cortas que empiezan con un frame I, así que con el bitrate medio del
+# original se verían peor que lo copiado. Sin entrada, -b:v del original
+EDGE_QUALITY = {
+    "libx264": ["-crf", "18"],
+    "libx265": ["-crf", "18"],
+    "libvpx-vp9": ["-crf", "20", "-b:v", "0"],
+    "libaom-av1": ["-crf", "20", "-b:v", "0"],
+    "mpeg4": ["-q:v", "2"],
+    "mpeg2video": ["-q:v", "2"],
+    "mjpeg": ["-q:v", "2"],
+    # Sin pérdida y de calidad fija por perfil
+    "ffv1": [],
+    "prores_ks": [],
+}
+
+# Márgenes para no caer en el keyframe anterior por errores de redondeo
+SEEK_EPSILON = 0.0005
+MIN_EDGE = 0.001
+
+
+def matching_video_args(stream):
+    # Argumentos de codificación lo más parecidos posible al stream original
+    # para que los bordes recodificados se puedan concatenar con la copia
+    codec = stream.get("codec_name", "h264")
+    encoder = MATCHING_ENCODERS.get(codec, "libx264")
+    args = ["-c:v", encoder]
+
+    if stream.get("pix_fmt"):
+        args += ["-pix_fmt", stream["pix_fmt"]]
+
+    profile = stream.get("profile")
+    if codec == "h264" and profile in H264_PROFILES:
+        args += ["-profile:v", H264_PROFILES[profile]]
+    level = stream.get("level")
+    if codec == "h264" and level and int(level) > 0:
+        args += ["-level:v", f"{int(level) / 10:.1f}"]
+
+    fps = parse_rate(stream.get("r_frame_rate"))
+    if fps:
+        args += ["-r", stream["r_frame_rate"]]
+
+    if encoder in EDGE_QUALITY:
+        args += EDGE_QUALITY[encoder]
+    elif stream.get("bit_rate"):
+        args += ["-b:v", stream["bit_rate"]]
+    return args
+
+
+def intermediate_extension(stream):
+    # MPEG-TS lleva los parámetros de H.264/H.265 dentro del stream, así que
+    # admite concatenar fragmentos codificados por separado
+    if stream.get("codec_name") in ("h264", "hevc", "mpeg2video"):
+        return ".ts"
+    return ".mkv"
+
+
+def plan_smart_cut(path, start_ms, end_ms, output_path, keyframes=None, info=None):
+    # Devuelve los comandos necesarios para extraer [start_ms, end_ms) de path
+    info = info or probe(path)
+    stream = video_stream(info)
+    if stream is None:
+        raise ValueError("El archivo no contiene video")
+    if keyframes is None:
+        keyframes = probe_keyframes(path)
+    has_audio = any(s["codec_type"] == "audio" for s in info["streams"])
+
+    start = start_ms / 1000.0
+    end = end_ms / 1000.0
+    if end <= start:
+        raise ValueError("El rango de recorte está vacío")
+
+    fps = parse_rate(stream.get("r_frame_rate"), 25.0)
+    frame_duration = 1.0 / fps
+    extension = intermediate_extension(stream)
+    encode_args = matching_video_args(stream)
+
+    inner = [k for k in keyframes if start <= k <= end]
+    first_key = inner[0] if inner else None
+    last_key = inner[-1] if inner else None
+
+    plan = {
+        "commands": [],
+        "durations": [],
+        "outputs": [output_path],
+        "temp_files": [],
+    }
+
+    def temp_path(suffix):
+        temp = tempfile.mktemp(suffix=suffix)
+        plan["temp_files"].append(temp)
+        return temp
+
+    def encode_part(part_start, part_end):
+        part = temp_path(extension)
+        plan["commands"].append(
+            [FFMPEG, "-y", "-ss", f"{part_start:.6f}", "-i", path]
+            + ["-t", f"{part_end - part_start:.6f}", "-map", "0:v:0", "-an"]
+            + encode_args
+            + [part]
+        )
+        plan["durations"].append((part_end - part_start) * 1000)
+        return part
+
+    def copy_part(part_start, part_end):
+        part = temp_path(extension)
+        # Excluir el keyframe final, que pertenece a la parte siguiente
+        length = part_end - part_start - frame_duration / 2
+        plan["commands"].append(
+            [FFMPEG, "-y", "-ss", f"{part_start + SEEK_EPSILON:.6f}", "-i", path]
+            + ["-t", f"{length:.6f}", "-map", "0:v:0", "-an", "-c", "copy", part]
+        )
+        plan["durations"].append((part_end - part_start) * 1000)
+        return part
+
+    parts = []
+    if first_key is None or last_key - first_key < frame_duration:
+        # El rango no contiene ningún GOP completo: recodificarlo entero
+        parts.append(encode_part(start, end))
+    else:
+        if first_key - start > MIN_EDGE:
+            parts.append(encode_part(start, first_key))
+        parts.append(copy_part(first_key, last_key))
+        if end - last_key > MIN_EDGE:
+            parts.append(encode_part(last_key, end))
+
+    concat_file = temp_path(".txt")
+    with open(concat_file, "w") as f:
+        for part in parts:
+            f.write(f"file '{part}'\n")
+
+    # El audio se corta aparte con precisión de muestra y se vuelve a unir
+    command = [FFMPEG, "-y", "-f", "concat", "-safe", "0", "-i", concat_file]
+    if has_audio:
+        command += ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", path]
+        command += ["-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", "-c:a", "aac"]
+    else:
+        command += ["-map", "0:v:0", "-c", "copy"]
+    command += ["-shortest", output_path]
+    plan["commands"].append(command)
+    plan["durations"].append((end - start) * 1000)
+    return plan
+
+
+def can_match(stream):
+    # Solo se puede concatenar con la copia si hay un codificador equivalente
+    return stream is not None and stream.get("codec_name") in MATCHING_ENCODERS
+
+
+def plan_region_encode(
+    path, start_ms, end_ms, output_path, video_filter, keyframes=None, info=None
+):
+    # Aplica video_filter(desplazamiento) solo a los GOP que cubren
+    # [start_ms, end_ms) y copia el resto; desplazamiento son los segundos
+    # del original en que empieza el tramo recodificado (el filtro ve el
+    # tiempo desde ese punto). El audio se copia entero
+    info = info or probe(path)
+    stream = video_stream(info)
+    if not can_match(stream):
+        raise ValueError("El códec del video no se puede recodificar por tramos")
+    if keyframes is None:
+        keyframes = probe_keyframes(path)
+    has_audio = any(s["codec_type"] == "audio" for s in info["streams"])
+
+    duration = duration_ms(info) / 1000.0
+    start = max(0.0, start_ms / 1000.0)
+    end = min(duration, end_ms / 1000.0)
+    if end <= start:
+        raise ValueError("El intervalo está vacío")
+
+    fps = parse_rate(stream.get("r_frame_rate"), 25.0)
+    frame_duration = 1.0 / fps
+    extension = intermediate_extension(stream)
+    encode_args = matching_video_args(stream)
+    if is_intermediate(info):
+        # El tramo recodificado sigue siendo todo intra
+        encode_args += ["-g", "1", "-bf", "0"]
+
+    # Tramo alineado a GOP: desde el último keyframe antes del inicio hasta
+    # el primero después del final
+    region_start = max([k for k in keyframes if k <= start + SEEK_EPSILON] or [0.0])
+    after = [k for k in keyframes if k >= end - SEEK_EPSILON and k > region_start]
+    region_end = after[0] if after and duration - after[0] > MIN_EDGE else duration
+
+    plan = {
+        "commands": [],
+        "durations": [],
+        "outputs": [output_path],
+        "temp_files": [],
+    }
+
+    def temp_path(suffix):
+        temp = tempfile.mktemp(suffix=suffix)
+        plan["temp_files"].append(temp)
+        return temp
+
+    parts = []
+    if region_start > MIN_EDGE:
+        part = temp_path(extension)
+        # Excluir el keyframe donde empieza el tramo recodificado
+        length = region_start - frame_duration / 2
+        plan["commands"].append(
+            [FFMPEG, "-y", "-i", path, "-t", f"{length:.6f}"]
+            + ["-map", "0:v:0", "-an", "-c", "copy", part]
+        )
+        plan["durations"].append(region_start * 1000)
+        parts.append(part)
+
+    part = temp_path(extension)
+    plan["commands"].append(
+        [FFMPEG, "-y", "-ss", f"{region_start:.6f}", "-i", path]
+        + ["-t", f"{region_end - region_start:.6f}", "-map", "0:v:0", "-an"]
+        + ["-vf", video_filter(region_start)]
+        + encode_args
+        + [part]
+    )
+    plan["durations"].append((region_end - region_start) * 1000)
+    parts.append(part)
+
+    if duration - region_end > MIN_EDGE:
+        part = temp_path(extension)
+        plan["commands"].append(
+            [FFMPEG, "-y", "-ss", f"{region_end + SEEK_EPSILON:.6f}", "-i", path]
+            + ["-map", "0:v:0", "-an", "-c", "copy", part]
+        )
+        plan["durations"].append((duration - region_end) * 1000)
+        parts.append(part)
+
+    concat_file = temp_path(".txt")
+    with open(concat_file, "w") as f:
+        for part in parts:
+            f.write(f"file '{part}'\n")
+
+    command = [FFMPEG, "-y", "-f", "concat", "-safe", "0", "-i", concat_file]
+    if has_audio:
+        command += ["-i", path, "-map", "0:v:0", "-map", "1:a", "-c", "copy"]
+    else:
+        command += ["-map", "0:v:0", "-c", "copy"]
+    command.append(output_path)
+    if is_intermediate(info):
+        command = tag_command(command)
+    plan["commands"].append(command)
+    plan["durations"].append(duration * 1000)
+    return plan
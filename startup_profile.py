@@ -0,0 +1,46 @@
+# Medición del tiempo de arranque.
+#
+# Las fases (importaciones, creación de la ventana, cargas diferidas) se
+# registran siempre porque medirlas no cuesta nada; el informe solo se muestra
+# al ejecutar la aplicación con --startup-profile.
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.depth = 0
+        # Lista de (profundidad, nombre, segundos) en orden de inicio
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        entry = [self.depth, name, 0.0]
+        self.phases.append(entry)
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry[2] = time.perf_counter() - start
+            self.depth -= 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def report(self, stream=None, ready=None):
+        # ready es el tiempo (s) hasta que la ventana quedó visible
+        stream = stream or sys.stderr
+        width = max([len(name) + 2 * depth for depth, name, _ in self.phases] + [20])
+        print("Perfil de arranque:", file=stream)
+        for depth, name, seconds in self.phases:
+            label = "  " * depth + name
+            print(f"  {label:<{width}}  {seconds * 1000:8.1f} ms", file=stream)
+        if ready is not None:
+            print(f"  Ventana lista en {ready * 1000:.1f} ms", file=stream)
+
+
+# Perfil del proceso actual; se crea al importar el módulo, antes que la interfaz
+PROFILE = StartupProfile()
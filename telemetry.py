@@ -0,0 +1,145 @@
+# Registro de cada invocación de ffmpeg/ffprobe.
+#
+# Cada proceso que lanza el editor deja un registro con el comando completo,
+# el tiempo desde que se lanza hasta que termina, la velocidad de
+# codificación, los bytes de entrada y salida, el pico de memoria del
+# proceso y el código de salida. Los registros se guardan en memoria (los
+# últimos MAX_RECORDS), se notifican a los oyentes (el panel de registro de
+# la interfaz) y se pueden exportar como JSON lines. No depende de Qt; los
+# oyentes pueden llamarse desde cualquier hilo.
+import json
+import os
+import re
+import shlex
+import sys
+import threading
+import time
+from collections import deque
+
+
+MAX_RECORDS = 2000
+# Argumentos de salida que no son archivos
+NON_FILE_OUTPUTS = {"-", "pipe:", "pipe:1", os.devnull}
+SPEED_PATTERN = re.compile(r"speed=\s*([0-9.]+)x")
+
+
+class Telemetry:
+    def __init__(self, max_records=MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener(record)
+
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.records)
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+
+    def export_jsonl(self, path, records=None):
+        records = self.snapshot() if records is None else records
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return len(records)
+
+
+TELEMETRY = Telemetry()
+
+
+def input_paths(command):
+    # Archivos que siguen a -i (los generadores de lavfi no son archivos)
+    return [
+        command[i + 1]
+        for i, arg in enumerate(command[:-1])
+        if arg == "-i" and os.path.isfile(command[i + 1])
+    ]
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def parse_speed(text):
+    # Última velocidad que informa ffmpeg en su salida de error ("1.5x")
+    matches = SPEED_PATTERN.findall(text or "")
+    return float(matches[-1]) if matches else None
+
+
+def process_peak_kb(pid):
+    # Pico de memoria residente (VmHWM) de un proceso en marcha; solo Linux
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def wait_process(process):
+    # Espera a un subprocess.Popen y devuelve (código, pico de memoria en
+    # KB). Con wait4 se obtiene el uso de recursos de ese hijo concreto
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Ya se recogió en otro sitio
+        return process.wait(), None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    peak = usage.ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux
+    return process.returncode, peak // 1024 if sys.platform == "darwin" else peak
+
+
+class CommandRecord:
+    # Se crea justo antes de lanzar el proceso y se cierra con finish()
+    def __init__(self, command, label=""):
+        self.command = [str(arg) for arg in command]
+        self.label = label
+        self.started_at = time.time()
+        self.started = time.monotonic()
+        self.inputs = input_paths(self.command)
+        self.input_bytes = sum(file_size(path) for path in self.inputs)
+
+    def finish(self, exit_code, peak_rss_kb=None, speed=None, error=""):
+        output = self.command[-1] if self.command else ""
+        output_bytes = 0
+        # En ffprobe el último argumento es la entrada, no una salida
+        if output not in NON_FILE_OUTPUTS and output not in self.inputs:
+            output_bytes = file_size(output)
+        lines = (error or "").strip().splitlines()
+        record = {
+            "time": self.started_at,
+            "label": self.label,
+            "program": os.path.basename(self.command[0]) if self.command else "",
+            "command": shlex.join(self.command),
+            "source": self.inputs[0] if self.inputs else "",
+            "seconds": time.monotonic() - self.started,
+            "speed": speed,
+            "input_bytes": self.input_bytes,
+            "output_bytes": output_bytes,
+            "peak_rss_kb": peak_rss_kb,
+            "exit_code": exit_code,
+            # Solo la última línea del error; el mensaje completo va al diálogo
+            "error": lines[-1] if exit_code != 0 and lines else "",
+        }
+        TELEMETRY.add(record)
+        return record
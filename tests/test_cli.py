@@ -0,0 +1,34 @@
+# Operaciones de la línea de comandos con archivos sin pista de audio.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli
+import core
+
+
+def test_cli_audio_on_input_without_audio(monkeypatch, tmp_path):
+    commands = []
+
+    def run_plan(plan, stop_event=None):
+        commands.extend(plan["commands"])
+        return plan["outputs"]
+
+    info = {"format": {"duration": "10"}, "streams": [{"codec_type": "video"}]}
+    monkeypatch.setattr(cli, "probe", lambda path: info)
+    monkeypatch.setattr(cli, "load_or_decode", lambda path: "decoded.wav")
+    monkeypatch.setattr(core, "run_plan", run_plan)
+    state = {
+        "current": "in.mp4",
+        "segments": [],
+        "profile": None,
+        "intermediate": None,
+        "threads": None,
+    }
+    cli.apply_operation(state, {"op": "audio", "path": "music.mp3"}, str(tmp_path))
+
+    graph = commands[0][commands[0].index("-filter_complex") + 1]
+    assert "[0:a]" not in graph
+    assert "amix" not in graph
+    assert graph.startswith("[1:a]")
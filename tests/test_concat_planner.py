@@ -0,0 +1,123 @@
+# Unión de segmentos: copiar los que comparten perfil y normalizar el resto.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core
+from concat_planner import plan_join, segment_profile
+
+
+def media_info(seconds=10, audio=True, tags=None, **video):
+    video_stream = {
+        "codec_type": "video",
+        "codec_name": "h264",
+        "width": 1920,
+        "height": 1080,
+        "pix_fmt": "yuv420p",
+        "r_frame_rate": "30/1",
+        "time_base": "1/15360",
+    }
+    video_stream.update(video)
+    streams = [video_stream]
+    if audio:
+        streams.append(
+            {
+                "codec_type": "audio",
+                "codec_name": "aac",
+                "sample_rate": "48000",
+                "channels": 2,
+                "channel_layout": "stereo",
+            }
+        )
+    return {"format": {"duration": str(seconds), "tags": tags or {}}, "streams": streams}
+
+
+@pytest.mark.parametrize(
+    "other, same",
+    [
+        (media_info(), True),
+        # La duración no forma parte del perfil
+        (media_info(seconds=3), True),
+        (media_info(codec_name="hevc"), False),
+        (media_info(width=1280, height=720), False),
+        (media_info(r_frame_rate="25/1"), False),
+        (media_info(pix_fmt="yuv420p10le"), False),
+        (media_info(time_base="1/90000"), False),
+        (media_info(sample_aspect_ratio="4:3"), False),
+        (media_info(audio=False), False),
+    ],
+)
+def test_segment_profile(other, same):
+    assert (segment_profile(media_info()) == segment_profile(other)) == same
+
+
+def final_parts(plan):
+    concat_file = plan["final_command"][plan["final_command"].index("-i") + 1]
+    with open(concat_file) as f:
+        return [line.strip()[len("file '") : -1] for line in f]
+
+
+@pytest.mark.parametrize(
+    "infos, copied",
+    [
+        # Todos iguales: solo se concatena
+        ([media_info(), media_info(), media_info()], [True, True, True]),
+        # El perfil común es el que suma más duración, no el más frecuente
+        (
+            [media_info(5), media_info(5), media_info(30, width=1280, height=720)],
+            [False, False, True],
+        ),
+        (
+            [media_info(10), media_info(4, r_frame_rate="25/1"), media_info(10)],
+            [True, False, True],
+        ),
+        # Un segmento sin audio se normaliza con silencio
+        ([media_info(), media_info(audio=False)], [True, False]),
+    ],
+)
+def test_plan_join(infos, copied):
+    paths = [f"clip{index}.mp4" for index in range(len(infos))]
+    plan = plan_join(paths, "out.mp4", infos=infos)
+    try:
+        parts = final_parts(plan)
+        assert [part == path for part, path in zip(parts, paths)] == copied
+        assert plan["normalized"] == copied.count(False)
+        assert len(plan["chunks"]) == copied.count(False)
+        normalized_seconds = sum(
+            float(info["format"]["duration"])
+            for info, copy in zip(infos, copied)
+            if not copy
+        )
+        assert plan["duration"] == pytest.approx(normalized_seconds)
+        assert plan["final_command"][-3:] == ["-c", "copy", "out.mp4"]
+    finally:
+        core.remove_temp_files(plan)
+
+
+def test_plan_join_fills_missing_audio_with_silence():
+    infos = [media_info(), media_info(audio=False)]
+    plan = plan_join(["a.mp4", "b.mp4"], "out.mp4", infos=infos)
+    try:
+        command = plan["chunks"][0]["command"]
+        assert "anullsrc=r=48000:cl=stereo" in command
+        assert command[command.index("-video_track_timescale") + 1] == "15360"
+    finally:
+        core.remove_temp_files(plan)
+
+
+def test_plan_join_keeps_intermediate_tag():
+    infos = [media_info(tags={"editorvideo": "intermediate"}), media_info()]
+    plan = plan_join(["a.mkv", "b.mkv"], "out.mkv", infos=infos)
+    try:
+        assert any("editorvideo" in arg for arg in plan["final_command"])
+    finally:
+        core.remove_temp_files(plan)
+
+
+def test_plan_join_requires_video():
+    info = {"format": {"duration": "10"}, "streams": [{"codec_type": "audio"}]}
+    with pytest.raises(ValueError):
+        plan_join(["a.mp3"], "out.mp4", infos=[info])
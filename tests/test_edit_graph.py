@@ -0,0 +1,125 @@
+# Compilación de los nodos de edición diferida a un único comando.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_graph import EditGraph
+
+
+def graph(nodes, has_audio=True):
+    edit_graph = EditGraph("in.mp4", 10000, has_audio)
+    for node in nodes:
+        edit_graph.add(node)
+    return edit_graph
+
+
+def filter_complex(command):
+    if "-filter_complex" not in command:
+        return ""
+    return command[command.index("-filter_complex") + 1]
+
+
+def maps(command):
+    return [command[i + 1] for i, arg in enumerate(command) if arg == "-map"]
+
+
+@pytest.mark.parametrize(
+    "nodes, duration, segments",
+    [
+        ([], 10000, 1),
+        ([{"type": "trim", "start": 2000, "end": 7000}], 5000, 1),
+        ([{"type": "split", "at": 4000}], 10000, 2),
+        (
+            [{"type": "split", "at": 4000}, {"type": "remove_segment", "at": 1000}],
+            6000,
+            1,
+        ),
+        ([{"type": "speed", "factor": 2.0}], 5000, 1),
+        (
+            [{"type": "trim", "start": 0, "end": 6000}, {"type": "speed", "factor": 0.5}],
+            12000,
+            1,
+        ),
+        # Los cortes después de un cambio de velocidad usan la nueva línea
+        # de tiempo
+        (
+            [{"type": "speed", "factor": 2.0}, {"type": "trim", "start": 1000, "end": 4000}],
+            3000,
+            1,
+        ),
+        (
+            [{"type": "scale", "width": 640, "height": 360}, {"type": "split", "at": 2500}],
+            10000,
+            2,
+        ),
+    ],
+)
+def test_output_duration(nodes, duration, segments):
+    edit_graph = graph(nodes)
+    assert edit_graph.output_duration() == pytest.approx(duration)
+    assert edit_graph.segment_count() == segments
+
+
+@pytest.mark.parametrize(
+    "nodes, has_audio, expected_filters, expected_maps",
+    [
+        # Sin nodos no hay filtros: se mapean las pistas originales
+        ([], True, [], ["0:v", "0:a"]),
+        ([], False, [], ["0:v"]),
+        (
+            [{"type": "trim", "start": 2000, "end": 7000}],
+            True,
+            ["trim=start=2.0:end=7.0", "atrim=start=2.0:end=7.0"],
+            ["[vt1]", "[at2]"],
+        ),
+        (
+            [{"type": "split", "at": 4000}, {"type": "remove_segment", "at": 5000}],
+            False,
+            ["trim=start=0.0:end=4.0"],
+            ["[vt1]"],
+        ),
+        (
+            [{"type": "split", "at": 4000}],
+            True,
+            ["split=2", "asplit=2", "concat=n=2:v=1:a=1"],
+            ["[vc9]", "[ac10]"],
+        ),
+        (
+            [{"type": "speed", "factor": 4.0}],
+            True,
+            ["setpts=PTS/4", "atempo=2.0,atempo=2"],
+            ["[v1]", "[a2]"],
+        ),
+        (
+            [{"type": "scale", "width": 640, "height": 360}],
+            True,
+            ["[0:v]scale=640:360[v1]"],
+            ["[v1]", "0:a"],
+        ),
+        ([{"type": "audio", "mode": "mute"}], True, [], ["0:v"]),
+        (
+            [{"type": "audio", "mode": "mix", "path": "music.mp3", "offset": 500}],
+            True,
+            ["[1:a]adelay=delays=500:all=1", "atrim=end=10.0", "amix=inputs=2"],
+            ["0:v", "[a3]"],
+        ),
+    ],
+)
+def test_compile(nodes, has_audio, expected_filters, expected_maps):
+    command = graph(nodes, has_audio).compile("out.mp4", ["-c:v", "libx264"])
+    filters = filter_complex(command)
+    for expected in expected_filters:
+        assert expected in filters
+    if not expected_filters:
+        assert "-filter_complex" not in command
+    assert maps(command) == expected_maps
+    assert command[-3:] == ["-c:v", "libx264", "out.mp4"]
+
+
+def test_compile_rejects_empty_timeline():
+    edit_graph = graph([{"type": "remove_segment", "at": 0}])
+    with pytest.raises(ValueError):
+        edit_graph.compile("out.mp4")
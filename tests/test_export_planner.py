@@ -0,0 +1,123 @@
+# Elección entre copiar (remux) y transcodificar cada pista al exportar.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export_planner import plan_export, stream_action
+
+
+def stream(index, kind, codec, **extra):
+    return dict(index=index, codec_type=kind, codec_name=codec, **extra)
+
+
+def media_info(streams, tags=None):
+    return {"format": {"duration": "10", "tags": tags or {}}, "streams": streams}
+
+
+@pytest.mark.parametrize(
+    "kind, codec, container, intermediate, expected",
+    [
+        ("video", "h264", "mp4", False, "copy"),
+        ("video", "h264", "webm", False, "libvpx-vp9"),
+        ("video", "vp9", "webm", False, "copy"),
+        ("video", "prores", "mp4", False, "libx264"),
+        ("video", "prores", "mov", False, "copy"),
+        ("video", "anything", "mkv", False, "copy"),
+        # Un archivo de trabajo se recodifica aunque se pueda copiar
+        ("video", "h264", "mp4", True, "libx264"),
+        ("audio", "aac", "mp4", False, "copy"),
+        ("audio", "aac", "avi", False, "libmp3lame"),
+        ("audio", "vorbis", "webm", False, "copy"),
+        ("audio", "pcm_s16le", "mp4", True, "aac"),
+        ("subtitle", "mov_text", "mp4", False, "copy"),
+        ("subtitle", "subrip", "mp4", False, "mov_text"),
+        ("subtitle", "mov_text", "mkv", False, "srt"),
+        ("subtitle", "hdmv_pgs_subtitle", "mp4", False, None),
+        ("subtitle", "subrip", "avi", False, None),
+        ("data", "bin_data", "mp4", False, None),
+    ],
+)
+def test_stream_action(kind, codec, container, intermediate, expected):
+    assert stream_action(stream(0, kind, codec), container, intermediate) == expected
+
+
+@pytest.mark.parametrize(
+    "codec, container, expected",
+    [("mjpeg", "mp4", "copy"), ("mjpeg", "webm", None), ("png", "mkv", "copy")],
+)
+def test_stream_action_attached_picture(codec, container, expected):
+    cover = stream(2, "video", codec, disposition={"attached_pic": 1})
+    assert stream_action(cover, container) == expected
+
+
+@pytest.mark.parametrize(
+    "streams, output, tags, mode, maps",
+    [
+        ([stream(0, "video", "h264"), stream(1, "audio", "aac")], "out.mp4", None, "remux", 2),
+        ([stream(0, "video", "h264"), stream(1, "audio", "aac")], "out.avi", None, "transcode", 2),
+        ([stream(0, "video", "h264"), stream(1, "audio", "aac")], "out.webm", None, "transcode", 2),
+        # Convertir subtítulos de texto no obliga a transcodificar
+        (
+            [stream(0, "video", "h264"), stream(1, "subtitle", "subrip")],
+            "out.mp4",
+            None,
+            "remux",
+            2,
+        ),
+        # Las pistas que el contenedor no admite se descartan
+        (
+            [stream(0, "video", "h264"), stream(1, "data", "bin_data")],
+            "out.mov",
+            None,
+            "remux",
+            1,
+        ),
+        (
+            [stream(0, "video", "h264"), stream(1, "audio", "aac")],
+            "out.mp4",
+            {"EDITORVIDEO": "intermediate"},
+            "transcode",
+            2,
+        ),
+    ],
+)
+def test_plan_export_mode(streams, output, tags, mode, maps):
+    plan = plan_export("in.mov", output, media_info(streams, tags), "draft")
+    command = plan["commands"][-1]
+    assert plan["mode"] == mode
+    assert command.count("-map") == maps
+    assert command[-1] == output
+    if tags:
+        assert "editorvideo=" in command
+
+
+@pytest.mark.parametrize(
+    "output, profile, commands, profile_arg",
+    [
+        ("out.mp4", "draft", 1, "ultrafast"),
+        ("out.webm", "draft", 1, "realtime"),
+        # VP9 equilibrado y archivo usan doble pasada
+        ("out.webm", "balanced", 2, "good"),
+        ("out.webm", "archive", 2, "good"),
+    ],
+)
+def test_plan_export_profile(output, profile, commands, profile_arg):
+    info = media_info([stream(0, "video", "prores"), stream(1, "audio", "pcm_s16le")])
+    plan = plan_export("in.mov", output, info, profile)
+    assert len(plan["commands"]) == commands
+    assert len(plan["durations"]) == commands
+    for command in plan["commands"]:
+        assert profile_arg in command
+    if commands == 2:
+        assert plan["commands"][0][-3:] == ["-f", "null", os.devnull]
+        assert "-pass:v" in plan["commands"][1]
+        assert len(plan["temp_files"]) == 2
+
+
+def test_plan_export_tags_hevc_for_apple_players():
+    info = media_info([stream(0, "video", "hevc")])
+    command = plan_export("in.mkv", "out.mp4", info)["commands"][0]
+    assert command[command.index("-tag:0") + 1] == "hvc1"
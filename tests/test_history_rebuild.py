@@ -0,0 +1,141 @@
+# Regenerar un paso del historial con otro video cargado en el editor.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("PyQt5")
+
+import app
+import core
+from history import EditHistory
+
+
+class Check:
+    def __init__(self, checked):
+        self.checked = checked
+
+    def isChecked(self):
+        return self.checked
+
+
+class Combo:
+    def __init__(self, text):
+        self.text = text
+
+    def currentText(self):
+        return self.text
+
+
+class Label:
+    def setText(self, text):
+        pass
+
+
+class Jobs:
+    def __init__(self):
+        self.tasks = []
+
+    def run_task(self, fn, *args, **kwargs):
+        self.tasks.append((fn, args))
+
+
+class Editor:
+    trim_video = app.VideoEditor.trim_video
+    apply_technical_changes = app.VideoEditor.apply_technical_changes
+    run_smart_cut = app.VideoEditor.run_smart_cut
+    run_chunked_render = app.VideoEditor.run_chunked_render
+    rebuild_history_step = app.VideoEditor.rebuild_history_step
+
+    def __init__(self, path):
+        self.current_video_path = path
+        self.duration = 10000
+        self.has_audio = True
+        self.edit_graph = None
+        self.history = EditHistory()
+        self.history.reset("Abrir", {"current": path, "segments": []})
+        self.job_manager = Jobs()
+        self.job_status_label = Label()
+        self.parallel_renders = []
+
+    def set_busy(self, busy):
+        pass
+
+    def worker_count(self):
+        return 2
+
+    def encoding_profile(self):
+        return "fast"
+
+    def intermediate_format(self):
+        return None
+
+    def on_technical_changes_finished(self, output_file):
+        pass
+
+    def run_parallel_render(self, label, render, on_success, error_message):
+        self.parallel_renders.append(render)
+
+    def cached_render(
+        self, sources, operation, params, extensions, render, on_success, description=None
+    ):
+        recipe = {
+            "sources": list(sources),
+            "operation": operation,
+            "params": params,
+            "extensions": extensions,
+            "render": render,
+        }
+        if description:
+            # Primera vez: solo se guarda la receta
+            self.history.push(description, {"current": "", "segments": []}, recipe)
+            return
+        render(["rebuilt" + ext for ext in extensions], lambda: None)
+
+
+def source_files(tmp_path):
+    paths = []
+    for name in ("first.mp4", "second.mp4"):
+        path = tmp_path / name
+        path.write_bytes(b"")
+        paths.append(str(path))
+    return paths
+
+
+def test_rebuild_smart_trim_uses_recorded_source(tmp_path):
+    first, second = source_files(tmp_path)
+    editor = Editor(first)
+    editor.start_time = 1000
+    editor.end_time = 3000
+    editor.smart_cut_check = Check(True)
+    editor.trim_video()
+
+    editor.current_video_path = second
+    editor.duration = 5000
+    editor.rebuild_history_step(1, lambda: None)
+
+    fn, args = editor.job_manager.tasks[0]
+    assert fn is core.smart_trim_plan
+    assert args == (first, [(1000, 3000, "rebuilt.mp4")])
+
+
+def test_rebuild_parallel_technical_uses_recorded_source(monkeypatch, tmp_path):
+    first, second = source_files(tmp_path)
+    calls = []
+    monkeypatch.setattr(core, "chunked_render", lambda *args: calls.append(args))
+    editor = Editor(first)
+    editor.resolution_combo = Combo("1280x720")
+    editor.speed_combo = Combo("2.0x")
+    editor.parallel_check = Check(True)
+    editor.apply_technical_changes()
+
+    editor.current_video_path = second
+    editor.duration = 5000
+    editor.has_audio = False
+    editor.rebuild_history_step(1, lambda: None)
+
+    args = calls[0]
+    # origen, duración, audio y perfil son los del paso, no los del editor
+    assert (args[0], args[2], args[6], args[8]) == (first, 10000, True, "fast")
@@ -0,0 +1,89 @@
+# Sin formato intermedio las operaciones y las exportaciones se codifican con
+# el perfil elegido: nada de GOP intra, audio PCM ni etiqueta de trabajo.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli
+import core
+from mezzanine import INTERMEDIATE_TAG, intermediate_format
+
+
+INTRA_ARGS = [["-g:v", "1"], ["-g", "1"], ["-bf:v", "0"]]
+
+
+def contains(command, args):
+    return any(command[i : i + len(args)] == args for i in range(len(command)))
+
+
+def assert_delivery_command(command):
+    for args in INTRA_ARGS:
+        assert not contains(command, args), command
+    assert "pcm_s16le" not in command
+    assert not any(INTERMEDIATE_TAG in arg for arg in command)
+
+
+class FakeIndex:
+    def keyframe_times(self):
+        return [0.0, 5.0, 10.0, 15.0]
+
+
+def test_none_is_not_an_intermediate():
+    assert intermediate_format(None) is None
+    assert intermediate_format("") is None
+
+
+def test_chunked_export_uses_profile(monkeypatch):
+    monkeypatch.setattr(core.PacketIndex, "load_or_build", lambda path: FakeIndex())
+    render = core.chunked_render("in.mp4", "export.mp4", 20000, 2, profile="draft")
+    plan = render.planner()
+    try:
+        commands = [chunk["command"] for chunk in plan["chunks"]]
+        commands += [plan["audio_command"], plan["final_command"]]
+        for command in commands:
+            assert_delivery_command(command)
+        for chunk in plan["chunks"]:
+            assert contains(chunk["command"], ["-preset:v", "ultrafast"])
+        assert contains(plan["audio_command"], ["-c:a", "aac"])
+    finally:
+        core.remove_temp_files(plan)
+
+
+def test_operation_plans_use_profile():
+    plans = [
+        core.text_overlay_plan("in.mp4", "out.webm", 10000, "Hola", profile="draft"),
+        core.technical_plan("in.mp4", "out.mp4", 10000, (1280, 720), 1.5, profile="draft"),
+        core.audio_plan("in.mp4", "out.mp4", 10000, "audio.wav"),
+    ]
+    for plan in plans:
+        for command in plan["commands"]:
+            assert_delivery_command(command)
+    assert contains(plans[0]["commands"][-1], ["-c:a", "libopus"])
+    assert contains(plans[1]["commands"][0], ["-preset:v", "ultrafast"])
+
+
+def test_cli_profile_only_job(monkeypatch, tmp_path):
+    commands = []
+
+    def run_plan(plan, stop_event=None):
+        commands.extend(plan["commands"])
+        return plan["outputs"]
+
+    monkeypatch.setattr(cli, "probe", lambda path: {"format": {"duration": "10"}})
+    monkeypatch.setattr(core, "run_plan", run_plan)
+    state = {
+        "current": "in.mp4",
+        "segments": [],
+        "profile": "draft",
+        "intermediate": None,
+        "threads": None,
+    }
+    cli.apply_operation(state, {"op": "text", "text": "Hola"}, str(tmp_path))
+    cli.apply_operation(state, {"op": "technical", "speed": 2}, str(tmp_path))
+
+    assert state["current"].endswith(".mp4")
+    assert len(commands) == 2
+    for command in commands:
+        assert_delivery_command(command)
+        assert contains(command, ["-preset:v", "ultrafast", "-crf:v", "28"])
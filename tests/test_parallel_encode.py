@@ -0,0 +1,84 @@
+# División en fragmentos y planificación de la codificación paralela.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core
+from parallel_encode import chunk_ranges, plan_chunked_render
+
+
+EVERY_2S = [float(t) for t in range(0, 40, 2)]
+
+
+@pytest.mark.parametrize(
+    "keyframes, duration, workers, expected",
+    [
+        (EVERY_2S, 40.0, 2, [(0.0, 10.0), (10.0, 20.0), (20.0, 30.0), (30.0, 40.0)]),
+        ([float(t) for t in range(0, 40, 5)], 40.0, 1, [(0.0, 20.0), (20.0, 40.0)]),
+        # Sin keyframes no se puede dividir
+        ([], 40.0, 4, [(0.0, 40.0)]),
+        # La longitud buscada nunca baja de MIN_CHUNK_SECONDS
+        ([0.0, 2.0, 4.0], 6.0, 8, [(0.0, 4.0), (4.0, 6.0)]),
+        # Un keyframe demasiado cerca del final no abre otro fragmento
+        ([11.0, 22.0, 40.0], 41.0, 2, [(0.0, 11.0), (11.0, 22.0), (22.0, 41.0)]),
+    ],
+)
+def test_chunk_ranges(keyframes, duration, workers, expected):
+    assert chunk_ranges(keyframes, duration, workers) == expected
+
+
+def option(command, name):
+    return command[command.index(name) + 1] if name in command else None
+
+
+@pytest.mark.parametrize(
+    "output, kwargs, extension, video_filter, audio_filter",
+    [
+        ("out.mp4", {}, ".ts", None, None),
+        ("out.webm", {}, ".mkv", None, None),
+        ("out.mp4", {"has_audio": False}, ".ts", None, None),
+        ("out.mp4", {"speed": 2.0}, ".ts", "setpts=(PTS-STARTPTS)/2", "atempo=2"),
+        (
+            "out.mkv",
+            {"speed": 0.25, "video_filters": ["scale=640:360"]},
+            ".ts",
+            "scale=640:360,setpts=(PTS-STARTPTS)/0.25",
+            "atempo=0.5,atempo=0.5",
+        ),
+        (
+            "out.mov",
+            {"video_args": ["-c:v", "prores_ks"], "output_args": ["-metadata", "x=1"]},
+            ".mkv",
+            None,
+            None,
+        ),
+    ],
+)
+def test_plan_chunked_render(output, kwargs, extension, video_filter, audio_filter):
+    plan = plan_chunked_render("in.mp4", output, 40.0, EVERY_2S, 2, **kwargs)
+    try:
+        assert len(plan["chunks"]) == 4
+        assert sum(chunk["seconds"] for chunk in plan["chunks"]) == pytest.approx(40.0)
+        for chunk in plan["chunks"]:
+            command = chunk["command"]
+            assert command[-1].endswith(extension)
+            assert option(command, "-vf") == video_filter
+            assert "-an" in command
+
+        final = plan["final_command"]
+        assert final[-1] == output
+        for arg in kwargs.get("output_args", []):
+            assert arg in final
+        if kwargs.get("has_audio", True):
+            assert option(plan["audio_command"], "-af") == audio_filter
+            assert final.count("-i") == 2
+        else:
+            assert plan["audio_command"] is None
+            assert final.count("-i") == 1
+        with open(option(final, "-i")) as f:
+            assert f.read().count("file ") == 4
+    finally:
+        core.remove_temp_files(plan)
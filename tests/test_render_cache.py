@@ -0,0 +1,41 @@
+# El índice de la caché de renders no se reescribe en cada consulta y los
+# renders recientes de otros procesos no se borran al cargarlo.
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render_cache import ORPHAN_AGE, RenderCache
+
+
+def test_lookup_does_not_rewrite_index(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    output = tmp_path / "render-0.mkv"
+    output.write_bytes(b"video")
+    cache.store("key", [str(output)])
+    written = os.path.getmtime(cache.index_path)
+    os.utime(cache.index_path, (written - 10, written - 10))
+
+    assert cache.lookup("key") == [str(output)]
+    assert cache.lookup("other") is None
+    assert os.path.getmtime(cache.index_path) == written - 10
+
+    cache.close()
+    reloaded = RenderCache(str(tmp_path))
+    assert reloaded.stats()["hits"] == 1
+    assert reloaded.stats()["misses"] == 1
+
+
+def test_load_keeps_recent_unknown_files(tmp_path):
+    RenderCache(str(tmp_path)).store("key", [])
+    fresh = tmp_path / "other-process-0.mkv"
+    fresh.write_bytes(b"video")
+    stale = tmp_path / "failed-0.mkv"
+    stale.write_bytes(b"video")
+    old = time.time() - ORPHAN_AGE - 60
+    os.utime(stale, (old, old))
+
+    RenderCache(str(tmp_path))
+    assert fresh.exists()
+    assert not stale.exists()
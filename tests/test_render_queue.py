@@ -0,0 +1,51 @@
+# Persistencia de la cola de renders: los archivos auxiliares de los planes
+# cuentan como entradas y las entradas que ya no existen no se ejecutan.
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli
+from render_queue import RenderQueue, plan_inputs
+
+
+def test_plan_inputs_include_concat_lists(tmp_path):
+    source = tmp_path / "source.mp4"
+    part = tmp_path / "it's.ts"
+    concat_list = tmp_path / "list.txt"
+    for path in (source, part):
+        path.write_bytes(b"")
+    concat_list.write_text("file 'it'\\''s.ts'\n")
+    commands = [
+        ["ffmpeg", "-y", "-i", str(source), "-c", "copy", str(tmp_path / "a.mp4")],
+        ["ffmpeg", "-f", "concat", "-safe", "0", "-i", str(concat_list), "out.mp4"],
+        ["ffmpeg", "-i", str(tmp_path / "not-yet.mp4"), "out2.mp4"],
+    ]
+    assert plan_inputs(commands) == sorted([str(source), str(concat_list), str(part)])
+
+
+def test_missing_inputs_fail_on_load(tmp_path):
+    source = tmp_path / "source.mp4"
+    source.write_bytes(b"")
+    concat_list = tmp_path / "list.txt"
+    queue_file = str(tmp_path / "queue.json")
+    queue = RenderQueue(queue_file)
+    kept = queue.add("plan", "kept", inputs=[str(source)])
+    lost = queue.add("plan", "lost", inputs=[str(source), str(concat_list)])
+    queue.mark_running(lost, 2)
+
+    reloaded = RenderQueue(queue_file)
+    assert reloaded.get(kept["id"])["status"] == "pending"
+    assert reloaded.get(lost["id"])["status"] == "failed"
+    assert str(concat_list) in reloaded.get(lost["id"])["error"]
+    assert [entry["id"] for entry in reloaded.pending()] == [kept["id"]]
+
+
+def test_cancelled_batch_job_stops_before_running(tmp_path):
+    stop = threading.Event()
+    stop.set()
+    job = {"input": "in.mp4", "output": str(tmp_path / "out.mp4"), "operations": [{"op": "x"}]}
+    result = cli.process_job(job, stop)
+    assert not result["ok"]
+    assert result["error"] == "Cancelado"
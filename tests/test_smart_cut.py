@@ -0,0 +1,101 @@
+# Partes copiadas y recodificadas del recorte inteligente.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core
+from smart_cut import matching_video_args, plan_smart_cut
+
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def media_info(codec="h264", has_audio=True, **stream):
+    video = dict(codec_type="video", codec_name=codec, r_frame_rate="25/1", **stream)
+    streams = [video]
+    if has_audio:
+        streams.append({"codec_type": "audio", "codec_name": "aac"})
+    return {"format": {"duration": "10"}, "streams": streams}
+
+
+def parts(plan):
+    # (tipo, inicio, duración) de cada parte antes de la concatenación final
+    result = []
+    for command in plan["commands"][:-1]:
+        kind = "copy" if "copy" in command else "encode"
+        start = float(command[command.index("-ss") + 1])
+        length = float(command[command.index("-t") + 1])
+        result.append((kind, round(start, 2), round(length, 2)))
+    return result
+
+
+@pytest.mark.parametrize(
+    "start_ms, end_ms, expected",
+    [
+        # Alineado a keyframes: solo se copia
+        (2000, 6000, [("copy", 2.0, 3.98)]),
+        # Bordes parciales a ambos lados
+        (1000, 7000, [("encode", 1.0, 1.0), ("copy", 2.0, 3.98), ("encode", 6.0, 1.0)]),
+        (2000, 7500, [("copy", 2.0, 3.98), ("encode", 6.0, 1.5)]),
+        (500, 4000, [("encode", 0.5, 1.5), ("copy", 2.0, 1.98)]),
+        # Sin un GOP completo dentro del rango: todo se recodifica
+        (2500, 3500, [("encode", 2.5, 1.0)]),
+        (1500, 2500, [("encode", 1.5, 1.0)]),
+    ],
+)
+def test_plan_smart_cut_parts(start_ms, end_ms, expected):
+    plan = plan_smart_cut("in.mp4", start_ms, end_ms, "out.mp4", KEYFRAMES, media_info())
+    try:
+        assert parts(plan) == expected
+        assert len(plan["durations"]) == len(plan["commands"])
+        assert plan["durations"][-1] == pytest.approx(end_ms - start_ms)
+    finally:
+        core.remove_temp_files(plan)
+
+
+@pytest.mark.parametrize(
+    "has_audio, expected_maps",
+    [(True, ["0:v:0", "1:a:0"]), (False, ["0:v:0"])],
+)
+def test_plan_smart_cut_audio(has_audio, expected_maps):
+    info = media_info(has_audio=has_audio)
+    plan = plan_smart_cut("in.mp4", 1000, 7000, "out.mp4", KEYFRAMES, info)
+    try:
+        final = plan["commands"][-1]
+        assert [final[i + 1] for i, arg in enumerate(final) if arg == "-map"] == expected_maps
+        assert final[-1] == "out.mp4"
+    finally:
+        core.remove_temp_files(plan)
+
+
+@pytest.mark.parametrize(
+    "codec, stream, included, excluded",
+    [
+        ("h264", {"bit_rate": "4000000"}, ["-c:v", "libx264", "-crf", "18"], ["-b:v"]),
+        ("vp9", {"bit_rate": "4000000"}, ["libvpx-vp9", "-crf", "-b:v", "0"], ["4000000"]),
+        ("mpeg2video", {}, ["mpeg2video", "-q:v", "2"], ["-crf"]),
+        ("ffv1", {"bit_rate": "4000000"}, ["ffv1"], ["-crf", "-b:v"]),
+        # Sin modo de calidad conocido se usa el bitrate del original
+        ("vp8", {"bit_rate": "4000000"}, ["libvpx", "-b:v", "4000000"], ["-crf"]),
+        (
+            "h264",
+            {"profile": "High", "level": 41, "pix_fmt": "yuv420p"},
+            ["-profile:v", "high", "-level:v", "4.1", "-pix_fmt", "yuv420p"],
+            [],
+        ),
+    ],
+)
+def test_matching_video_args(codec, stream, included, excluded):
+    args = matching_video_args(media_info(codec, **stream)["streams"][0])
+    for arg in included:
+        assert arg in args
+    for arg in excluded:
+        assert arg not in args
+
+
+def test_plan_smart_cut_rejects_empty_range():
+    with pytest.raises(ValueError):
+        plan_smart_cut("in.mp4", 3000, 3000, "out.mp4", KEYFRAMES, media_info())
@@ -0,0 +1,203 @@
+# Pista de miniaturas (filmstrip) generada en una sola pasada.
+#
+# Un único ffmpeg decodifica el archivo, toma N frames (equiespaciados o
+# alineados a keyframes) con los filtros fps/select y los compone en una
+# hoja de sprites con el filtro tile. La hoja se guarda como RGB24 sin
+# comprimir junto a un JSON de metadatos y se abre con mmap, de modo que
+# solo las miniaturas que se dibujan llegan a memoria.
+import json
+import math
+import mmap
+import os
+from bisect import bisect_left
+
+from media_tools import FFMPEG, cache_dir, file_key, run_command
+
+
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+SPRITE_COLUMNS = 10
+DEFAULT_THUMB_COUNT = 60
+# Miniaturas extra que se generan alrededor del cabezal de reproducción
+DETAIL_THUMB_COUNT = 20
+DETAIL_SPAN = 10.0
+
+
+def tile_filter(count, width, height):
+    rows = max(1, math.ceil(count / SPRITE_COLUMNS))
+    columns = min(count, SPRITE_COLUMNS)
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,"
+        f"tile={columns}x{rows}"
+    ), columns, rows
+
+
+class SpriteSheet:
+    def __init__(self, sprite_path, meta):
+        self.sprite_path = sprite_path
+        self.meta = meta
+        self.times = meta["times"]
+        self.tile_width = meta["tile_width"]
+        self.tile_height = meta["tile_height"]
+        self.columns = meta["columns"]
+        self.sheet_width = self.columns * self.tile_width
+        self.file = open(sprite_path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def open(cls, sprite_path):
+        with open(sprite_path + ".json") as f:
+            meta = json.load(f)
+        return cls(sprite_path, meta)
+
+    @property
+    def start(self):
+        return self.meta["start"]
+
+    @property
+    def end(self):
+        return self.meta["end"]
+
+    def __len__(self):
+        return len(self.times)
+
+    def tile_bytes(self, index):
+        # Copia solo las filas de la miniatura pedida desde el archivo mapeado
+        row, column = divmod(index, self.columns)
+        stride = self.sheet_width * 3
+        line = self.tile_width * 3
+        first = row * self.tile_height * stride + column * line
+        return b"".join(
+            self.data[first + y * stride : first + y * stride + line]
+            for y in range(self.tile_height)
+        )
+
+    def nearest(self, seconds):
+        index = bisect_left(self.times, seconds)
+        if index >= len(self.times):
+            return len(self.times) - 1
+        if index > 0 and seconds - self.times[index - 1] < self.times[index] - seconds:
+            return index - 1
+        return index
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def sprite_path(path, name):
+    return os.path.join(cache_dir("thumbnails"), f"{file_key(path)}_{name}.rgb")
+
+
+def generate_sprite(
+    path,
+    output_path,
+    start,
+    end,
+    count,
+    keyframes=None,
+    size=(THUMB_WIDTH, THUMB_HEIGHT),
+):
+    width, height = size
+    command = [FFMPEG, "-y", "-v", "error"]
+
+    if keyframes:
+        # Decodificar solo los keyframes y quedarse con uno de cada step
+        inner = [k for k in keyframes if start <= k <= end]
+        step = max(1, math.ceil(len(inner) / count))
+        times = inner[::step][:count]
+        tiles, columns, rows = tile_filter(len(times), width, height)
+        select = f"select='not(mod(n\\,{step}))',"
+        command += ["-skip_frame", "nokey"]
+    else:
+        span = end - start
+        times = [start + i * span / count for i in range(count)]
+        tiles, columns, rows = tile_filter(count, width, height)
+        select = f"fps={count}/{span:.6f},"
+
+    if start > 0:
+        command += ["-ss", f"{start:.6f}"]
+    command += ["-i", path, "-t", f"{end - start:.6f}", "-an"]
+    command += ["-vf", select + tiles, "-frames:v", "1"]
+    command += ["-f", "rawvideo", "-pix_fmt", "rgb24", output_path]
+    run_command(command, "Miniaturas")
+
+    expected = columns * width * rows * height * 3
+    if os.path.getsize(output_path) < expected:
+        raise RuntimeError("La hoja de miniaturas generada está incompleta")
+
+    meta = {
+        "source": path,
+        "start": start,
+        "end": end,
+        "times": times,
+        "tile_width": width,
+        "tile_height": height,
+        "columns": columns,
+        "rows": rows,
+    }
+    with open(output_path + ".json", "w") as f:
+        json.dump(meta, f)
+    return SpriteSheet(output_path, meta)
+
+
+def load_or_generate(path, name, start, end, count, keyframes=None):
+    output_path = sprite_path(path, name)
+    if os.path.exists(output_path) and os.path.exists(output_path + ".json"):
+        try:
+            return SpriteSheet.open(output_path)
+        except (OSError, ValueError, KeyError):
+            pass
+    return generate_sprite(path, output_path, start, end, count, keyframes)
+
+
+class ThumbnailTrack:
+    def __init__(self, path, duration, base):
+        self.path = path
+        self.duration = duration
+        self.base = base
+        # Hojas de detalle alrededor de posiciones concretas
+        self.details = {}
+
+    @classmethod
+    def load_or_generate(cls, path, duration, keyframes=None, count=DEFAULT_THUMB_COUNT):
+        # Con keyframes suficientes basta decodificar frames clave, mucho
+        # más rápido que decodificar el archivo entero
+        if keyframes and len(keyframes) < count:
+            keyframes = None
+        name = f"{'key' if keyframes else 'even'}{count}"
+        base = load_or_generate(path, name, 0.0, duration, count, keyframes)
+        return cls(path, duration, base)
+
+    def detail_window(self, seconds):
+        # Ventanas fijas para que las hojas de detalle se reutilicen
+        window = int(seconds // DETAIL_SPAN)
+        start = window * DETAIL_SPAN
+        return window, start, min(self.duration, start + DETAIL_SPAN)
+
+    def has_detail(self, seconds):
+        return self.detail_window(seconds)[0] in self.details
+
+    def generate_detail(self, seconds):
+        # Se ejecuta fuera del hilo de la interfaz; devuelve la hoja creada
+        window, start, end = self.detail_window(seconds)
+        sheet = load_or_generate(
+            self.path, f"detail{window}", start, end, DETAIL_THUMB_COUNT
+        )
+        return window, sheet
+
+    def add_detail(self, window, sheet):
+        self.details[window] = sheet
+
+    def thumbnail_at(self, seconds):
+        # Devuelve (hoja, índice) de la miniatura más cercana, prefiriendo
+        # las hojas de detalle cuando cubren la posición
+        sheet = self.details.get(self.detail_window(seconds)[0], self.base)
+        return sheet, sheet.nearest(seconds)
+
+    def close(self):
+        self.base.close()
+        for sheet in self.details.values():
+            sheet.close()
+        self.details.clear()
@@ -0,0 +1,232 @@
+# Motor de formas de onda.
+#
+# El audio se decodifica en streaming con ffmpeg (PCM mono float32) y por
+# cada bloque de muestras se calculan mínimo, máximo y RMS con NumPy. Con
+# esos picos se construye una pirámide de resoluciones (cada nivel agrupa
+# PYRAMID_FACTOR bloques del anterior) que se guarda en un archivo auxiliar
+# mapeado en memoria. Dibujar cualquier zoom solo lee los picos visibles del
+# nivel adecuado, sin volver a decodificar el audio.
+import os
+import struct
+import subprocess
+
+import numpy as np
+
+from media_tools import FFMPEG, cache_dir, file_key
+from telemetry import CommandRecord, wait_process
+
+
+SAMPLE_RATE = 22050
+BASE_BLOCK = 256
+PYRAMID_FACTOR = 4
+# Se dejan de generar niveles cuando el nivel tiene menos picos que esto
+MIN_LEVEL_PEAKS = 1024
+# Segundos de audio que se leen de la tubería en cada iteración
+CHUNK_SECONDS = 10
+
+WAVEFORM_MAGIC = b"EVWAV1"
+# magic, frecuencia de muestreo, bloque base, factor, número de niveles
+HEADER = struct.Struct("<6sIIII")
+# desplazamiento (en picos) y cantidad de picos de cada nivel
+LEVEL_ENTRY = struct.Struct("<QQ")
+MAX_LEVELS = 16
+
+
+def block_peaks(samples, block):
+    # samples tiene una longitud múltiplo de block
+    frames = samples.reshape(-1, block)
+    peaks = np.empty((frames.shape[0], 3), dtype=np.float32)
+    peaks[:, 0] = frames.min(axis=1)
+    peaks[:, 1] = frames.max(axis=1)
+    peaks[:, 2] = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return peaks
+
+
+def reduce_peaks(peaks, factor):
+    # Agrupa factor picos consecutivos en uno (el último grupo puede ser menor)
+    count = len(peaks)
+    starts = np.arange(0, count, factor)
+    reduced = np.empty((len(starts), 3), dtype=np.float32)
+    reduced[:, 0] = np.minimum.reduceat(peaks[:, 0], starts)
+    reduced[:, 1] = np.maximum.reduceat(peaks[:, 1], starts)
+    sizes = np.diff(np.append(starts, count))
+    reduced[:, 2] = np.sqrt(np.add.reduceat(np.square(peaks[:, 2]), starts) / sizes)
+    return reduced
+
+
+def decode_base_peaks(path):
+    # Decodifica el audio por trozos y calcula los picos del nivel base sin
+    # tener nunca el audio completo en memoria
+    command = [
+        FFMPEG,
+        "-v",
+        "error",
+        "-i",
+        path,
+        "-map",
+        "0:a:0",
+        "-ac",
+        "1",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-f",
+        "f32le",
+        "pipe:1",
+    ]
+    record = CommandRecord(command, "Forma de onda")
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    chunk_bytes = SAMPLE_RATE * CHUNK_SECONDS * 4
+    pending = np.empty(0, dtype=np.float32)
+    parts = []
+    while True:
+        data = process.stdout.read(chunk_bytes)
+        if not data:
+            break
+        samples = np.frombuffer(data[: len(data) // 4 * 4], dtype=np.float32)
+        if len(pending):
+            samples = np.concatenate((pending, samples))
+        usable = len(samples) // BASE_BLOCK * BASE_BLOCK
+        if usable:
+            parts.append(block_peaks(samples[:usable], BASE_BLOCK))
+        pending = samples[usable:].copy()
+    process.stdout.close()
+    returncode, peak = wait_process(process)
+    record.finish(returncode, peak)
+    if returncode != 0 and not parts:
+        raise RuntimeError(f"No se pudo decodificar el audio de {os.path.basename(path)}")
+    if len(pending):
+        # Último bloque incompleto
+        rms = np.sqrt(np.mean(np.square(pending)))
+        parts.append(
+            np.array([[pending.min(), pending.max(), rms]], dtype=np.float32)
+        )
+    if not parts:
+        return np.zeros((0, 3), dtype=np.float32)
+    return np.concatenate(parts)
+
+
+class WaveformPyramid:
+    def __init__(self, path, sample_rate, block, factor, levels, data):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.block = block
+        self.factor = factor
+        # Lista de (desplazamiento, cantidad) en picos dentro de data
+        self.levels = levels
+        self.data = data
+
+    @property
+    def duration(self):
+        if not self.levels:
+            return 0.0
+        return self.levels[0][1] * self.block / self.sample_rate
+
+    def level_seconds(self, level):
+        # Segundos de audio que representa cada pico del nivel
+        return self.block * self.factor**level / self.sample_rate
+
+    def level(self, level):
+        offset, count = self.levels[level]
+        return self.data[offset : offset + count]
+
+    def peaks(self, start, end, columns):
+        # Devuelve (min, max, rms) con aproximadamente columns valores para el
+        # rango [start, end) en segundos, leyendo solo los picos visibles
+        if not self.levels or end <= start or columns <= 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+
+        seconds_per_column = (end - start) / columns
+        level = 0
+        while (
+            level + 1 < len(self.levels)
+            and self.level_seconds(level + 1) <= seconds_per_column
+        ):
+            level += 1
+
+        peaks = self.level(level)
+        step = self.level_seconds(level)
+        first = max(0, int(start / step))
+        last = min(len(peaks), int(np.ceil(end / step)))
+        visible = np.asarray(peaks[first:last])
+        if len(visible) == 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+
+        # Agrupar los picos visibles en las columnas pedidas
+        if len(visible) > columns:
+            bounds = np.linspace(0, len(visible), columns + 1).astype(int)[:-1]
+            bounds = np.unique(bounds)
+            mins = np.minimum.reduceat(visible[:, 0], bounds)
+            maxs = np.maximum.reduceat(visible[:, 1], bounds)
+            sizes = np.diff(np.append(bounds, len(visible)))
+            rms = np.sqrt(np.add.reduceat(np.square(visible[:, 2]), bounds) / sizes)
+            return mins, maxs, rms
+        return visible[:, 0], visible[:, 1], visible[:, 2]
+
+    @classmethod
+    def build(cls, path, output_path):
+        levels_data = [decode_base_peaks(path)]
+        while (
+            len(levels_data[-1]) > MIN_LEVEL_PEAKS and len(levels_data) < MAX_LEVELS
+        ):
+            levels_data.append(reduce_peaks(levels_data[-1], PYRAMID_FACTOR))
+
+        temp_path = output_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    WAVEFORM_MAGIC, SAMPLE_RATE, BASE_BLOCK, PYRAMID_FACTOR, len(levels_data)
+                )
+            )
+            offset = 0
+            for level in levels_data:
+                f.write(LEVEL_ENTRY.pack(offset, len(level)))
+                offset += len(level)
+            for level in levels_data:
+                f.write(level.astype(np.float32).tobytes())
+        os.replace(temp_path, output_path)
+        return cls.open(path, output_path)
+
+    @classmethod
+    def open(cls, path, waveform_path):
+        with open(waveform_path, "rb") as f:
+            magic, sample_rate, block, factor, count = HEADER.unpack(
+                f.read(HEADER.size)
+            )
+            if magic != WAVEFORM_MAGIC:
+                raise ValueError("Archivo de forma de onda no válido")
+            levels = [
+                LEVEL_ENTRY.unpack(f.read(LEVEL_ENTRY.size)) for _ in range(count)
+            ]
+        total = sum(level_count for _, level_count in levels)
+        data_offset = HEADER.size + LEVEL_ENTRY.size * count
+        if total:
+            data = np.memmap(
+                waveform_path,
+                dtype=np.float32,
+                mode="r",
+                offset=data_offset,
+                shape=(total, 3),
+            )
+        else:
+            data = np.zeros((0, 3), dtype=np.float32)
+        return cls(path, sample_rate, block, factor, levels, data)
+
+    @staticmethod
+    def sidecar_path(path):
+        return os.path.join(cache_dir("waveforms"), file_key(path) + ".peaks")
+
+    @classmethod
+    def load_or_build(cls, path):
+        waveform_path = cls.sidecar_path(path)
+        if os.path.exists(waveform_path):
+            try:
+                return cls.open(path, waveform_path)
+            except (OSError, ValueError, struct.error):
+                pass
+        return cls.build(path, waveform_path)